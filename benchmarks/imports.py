@@ -0,0 +1,117 @@
+"""
+Import-time benchmarks, each import is measured in a fresh interpreter
+
+Usage:
+    python -m benchmarks.imports                # Compare to the stored baselines
+    python -m benchmarks.imports --save         # Store the measurements as the new baselines
+    python -m benchmarks.imports --check        # Exit with an error if any import regressed, or pulled in a module
+                                                # it must not
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .parsers import BASELINES_PATH
+from .runner import Measurement, compare, load_baselines, save_baselines
+
+DEFAULT_REPEAT = 7
+DEFAULT_IMPORT_TOLERANCE = 0.5  # Import times vary between runs much more than parsing throughput
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Statement of each benchmark, and the heavy packages it must not import
+IMPORTS = {
+    'package': ('import google_search', ('selenium', 'numpy', 'aiohttp', 'asyncio', 'lxml', 'requests', 'httpx')),
+    'searcher': ('from google_search import Searcher', ('selenium', 'numpy', 'aiohttp', 'asyncio', 'httpx')),
+    'hybrid_searcher': ('from google_search import HybridSearcher',
+                        ('selenium', 'numpy', 'aiohttp', 'asyncio', 'httpx')),
+    'async_searcher': ('from google_search import AsyncSearcher', ('selenium', 'numpy')),
+    'cli': ('import google_search.cli', ('selenium', 'numpy', 'aiohttp', 'asyncio', 'httpx')),
+    'selenium_searcher': ('from google_search import SeleniumSearcher', ('numpy', 'aiohttp')),
+}
+
+# Runs in the child interpreter. Memory is the peak resident set size of the interpreter in KiB, read from /proc
+# where available, since ru_maxrss carries over the peak of the forked parent on Linux
+_CHILD_SCRIPT = '''
+import json, resource, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+seconds = time.perf_counter() - start
+try:
+    with open('/proc/self/status') as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': seconds, 'rss_kb': rss_kb, 'modules': sorted(sys.modules)}))
+'''
+
+
+def import_in_subprocess(statement):
+    """
+    Args:
+        statement (str): Import statement to run in a fresh interpreter
+
+    Returns:
+        dict: Seconds the import took, peak resident set size of the interpreter (KiB) and names of loaded modules
+    """
+    output = subprocess.run([sys.executable, '-c', _CHILD_SCRIPT, statement], cwd=ROOT_DIR, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output)
+
+
+def measure_import(name, statement, repeat=DEFAULT_REPEAT):
+    """
+    Notes:
+        * Time is the best of several imports, memory is the lowest
+
+    Returns:
+        tuple[Measurement, set]: Measurement of the import, and top level packages it loaded
+    """
+    runs = [import_in_subprocess(statement) for _ in range(repeat)]
+    measurement = Measurement(f'import.{name}', 1 / min(run['seconds'] for run in runs),
+                              min(run['rss_kb'] for run in runs))
+    return measurement, {module.split('.')[0] for module in runs[0]['modules']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='keyword', help='only run benchmarks whose name contains this keyword')
+    parser.add_argument('--baselines', default=BASELINES_PATH, help='baselines file to compare to or save to')
+    parser.add_argument('--save', action='store_true', help='store the measurements as the new baselines')
+    parser.add_argument('--check', action='store_true', help='exit with an error if any import regressed')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_IMPORT_TOLERANCE,
+                        help='relative slowdown or memory growth that is considered a regression')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='imports of each benchmark')
+    args = parser.parse_args(argv)
+
+    measurements = []
+    forbidden_imports = []
+    for name, (statement, forbidden) in IMPORTS.items():
+        if args.keyword is not None and args.keyword not in name:
+            continue
+        measurement, packages = measure_import(name, statement, repeat=args.repeat)
+        measurements.append(measurement)
+        forbidden_imports += [f'{name} imports {package}' for package in forbidden if package in packages]
+
+    baselines = load_baselines(args.baselines)
+    report, regressions = compare(measurements, baselines, tolerance=args.tolerance)
+    print(report)
+    if forbidden_imports:
+        print(f'\nForbidden imports: {", ".join(forbidden_imports)}')
+
+    if args.save:
+        # Benchmarks that did not run keep their previous baselines
+        baselines.update({m.name: m for m in measurements})
+        save_baselines(args.baselines, baselines.values())
+        print(f'\nBaselines saved to {args.baselines}')
+    elif regressions:
+        print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: '
+              f'{", ".join(regressions)}')
+    if args.check and (forbidden_imports or (regressions and not args.save)):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
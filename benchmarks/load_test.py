@@ -0,0 +1,205 @@
+"""
+Load test of Searcher against a local mock of Google (see mock_google.py), or against any other server
+
+Reports throughput (queries/sec), latency percentiles of queries and of their first results, downloaded bytes per
+query (decompressed and on the wire), connections opened to the mock server and error rates for each number of workers
+
+Usage:
+    python -m benchmarks.load_test --workers 1 4 16 --queries 200
+    python -m benchmarks.load_test --mode image --latency 0.05 --throttle-rate 0.02
+    python -m benchmarks.load_test --streaming --workers 4                 # Cut pages short once results were read
+    python -m benchmarks.load_test --http2 --compression --workers 16     # Multiplex compressed pages over HTTP/2
+    python -m benchmarks.load_test --url http://10.0.0.5:8000 --rate 20     # A mock server that is already running
+"""
+import argparse
+import collections
+import concurrent.futures
+import math
+import time
+
+import requests
+
+from google_search import Searcher
+from google_search.metrics import Counter, Metrics, tracing
+from google_search.parse_executor import ParseExecutor
+from google_search.rate_limit import RateLimiter
+from google_search.session import create_session
+from google_search.throttle import AdaptiveThrottle
+
+from .mock_google import MockGoogleServer, add_mock_arguments, options_from_arguments
+
+DEFAULT_WORKERS = (1, 2, 4, 8, 16)
+DEFAULT_QUERIES = 100  # For each number of workers
+UNLIMITED_RATE = 1e9  # Requests per second, effectively disables pacing
+PERCENTILES = (50, 90, 99)
+
+LoadTestResult = collections.namedtuple('LoadTestResult', ('workers', 'queries', 'duration', 'latencies', 'errors',
+                                                         'first_result_latencies', 'bytes_downloaded', 'wire_bytes',
+                                                         'connections'), defaults=(None,))
+
+
+def search_query(searcher, index, max_results, prefetch):
+    searcher.search(f'query {index}')
+    return searcher.scan_search_results(max_iterations=max_results, prefetch=prefetch)
+
+
+def image_query(searcher, index, max_results, prefetch):
+    searcher.search_image(f'https://example.com/image{index}.jpg')
+    searcher.navigate_to_identical_images()
+    return searcher.scan_image_results(max_iterations=max_results)
+
+
+QUERIES = {'search': search_query, 'image': image_query}
+
+
+def error_kind(error):
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f'HTTP {error.response.status_code}'
+    return type(error).__name__
+
+
+def run(base_url, workers, queries, mode='search', max_results=None, rate=None, prefetch=0, parse_executor=None,
+        adaptive=False, streaming=False, http2=False):
+    """
+    Runs queries through a pool of searchers that share a connection pool and a rate limiter
+
+    Args:
+        base_url (str): Scheme and host of the server to search in
+        workers (int): Number of queries to run concurrently, each with its own searcher
+        queries (int): Total number of queries
+        mode (str): 'search' for standard search with pagination, 'image' for search by image
+        max_results (int): Limit of results of each query, None for all of them
+        rate (float): Requests per second allowed to the server, None for no limit
+        prefetch (int): Pages fetched ahead by standard search scans, see Searcher.scan_search_results()
+        parse_executor (ParseExecutor): Pool of processes to parse pages in, None to parse in the workers' threads
+        adaptive (bool): Whether to pace requests with an adaptive throttle, which retries blocked requests
+        streaming (bool): Whether to parse pages while they are downloaded and cut them short, see Searcher
+        http2 (bool): Whether to multiplex the requests over HTTP/2, see session.create_session()
+
+    Returns:
+        LoadTestResult: Latencies are of successful queries, errors are counted by kind. Connections are unknown
+    """
+    query = QUERIES[mode]
+    session = create_session(pool_maxsize=workers * max(1, prefetch), http2=http2)
+    rate_limiter = RateLimiter(rate=rate or UNLIMITED_RATE, burst=max(1, workers))
+    throttle = AdaptiveThrottle(initial_delay=0.0, max_concurrency=workers * max(1, prefetch)) if adaptive else None
+
+    metrics = Metrics()
+
+    def timed_query(index):
+        with tracing(metrics), Searcher(session=session, rate_limiter=rate_limiter, base_url=base_url,
+                                        parse_executor=parse_executor, throttle=throttle,
+                                        streaming=streaming) as searcher:
+            start = time.perf_counter()
+            first_result_latency = None
+            for _ in query(searcher, index, max_results, prefetch):
+                if first_result_latency is None:
+                    first_result_latency = time.perf_counter() - start
+            return time.perf_counter() - start, first_result_latency
+
+    latencies = []
+    first_result_latencies = []
+    errors = collections.Counter()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(timed_query, i) for i in range(queries)]):
+            try:
+                latency, first_result_latency = future.result()
+            except Exception as e:
+                errors[error_kind(e)] += 1
+                continue
+            latencies.append(latency)
+            if first_result_latency is not None:
+                first_result_latencies.append(first_result_latency)
+    duration = time.perf_counter() - start
+    session.close()
+
+    counters = metrics.snapshot()['counters']
+    return LoadTestResult(workers, queries, duration, sorted(latencies), errors, sorted(first_result_latencies),
+                          counters.get(Counter.BYTES_DOWNLOADED, 0), counters.get(Counter.WIRE_BYTES, 0))
+
+
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return math.nan
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
+
+
+def report(results):
+    """
+    Args:
+        results (list[LoadTestResult]):
+
+    Returns:
+        str: Table of throughput, latency percentiles (in milliseconds), median latency of first results, downloaded
+             KiB per query (decompressed and on the wire), connections and error rates
+    """
+    rows = [('workers', 'queries', 'qps', *(f'p{p} ms' for p in PERCENTILES), 'max ms', 'first p50 ms', 'KiB/query',
+             'wire KiB/query', 'conns', 'errors', 'error kinds')]
+    for result in results:
+        latencies_ms = [latency * 1000 for latency in result.latencies]
+        num_errors = sum(result.errors.values())
+        rows.append((str(result.workers), str(result.queries),
+                     f'{len(result.latencies) / result.duration:.1f}',
+                     *(f'{percentile(latencies_ms, p):.0f}' for p in PERCENTILES),
+                     f'{latencies_ms[-1]:.0f}' if latencies_ms else 'nan',
+                     f'{percentile(result.first_result_latencies, 50) * 1000:.0f}',
+                     f'{result.bytes_downloaded / 1024 / result.queries:.0f}',
+                     f'{result.wire_bytes / 1024 / result.queries:.0f}',
+                     '-' if result.connections is None else str(result.connections),
+                     f'{num_errors / result.queries:.1%}',
+                     ', '.join(f'{kind}: {count}' for kind, count in result.errors.most_common())))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ['  '.join(cell.rjust(width) if i < len(row) - 1 else cell
+                       for i, (cell, width) in enumerate(zip(row, widths))).rstrip()
+             for row in rows]
+    lines.insert(1, '-' * max(map(len, lines)))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='server to load, by default a mock server is started for the test')
+    parser.add_argument('--workers', type=int, nargs='+', default=DEFAULT_WORKERS, help='numbers of workers to test')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES, help='queries for each number of workers')
+    parser.add_argument('--mode', choices=sorted(QUERIES), default='search')
+    parser.add_argument('--max-results', type=int, help='limit of results of each query')
+    parser.add_argument('--rate', type=float, help='requests per second allowed to the server')
+    parser.add_argument('--prefetch', type=int, default=0, help='pages fetched ahead by standard search scans')
+    parser.add_argument('--adaptive', action='store_true', help='pace requests adaptively and retry blocked ones')
+    parser.add_argument('--streaming', action='store_true', help='parse pages while downloading and cut them short')
+    parser.add_argument('--http2', action='store_true', help='multiplex requests over HTTP/2 (h2c to the mock)')
+    parser.add_argument('--parse-processes', type=int, default=0, help='processes to parse pages in, 0 for none')
+    add_mock_arguments(parser.add_argument_group('mock server'))
+    args = parser.parse_args(argv)
+
+    def run_all(base_url, server=None):
+        parse_executor = ParseExecutor(max_workers=args.parse_processes) if args.parse_processes else None
+        results = []
+        for workers in args.workers:
+            connections = server.connections if server else None
+            result = run(base_url, workers, args.queries, mode=args.mode, max_results=args.max_results, rate=args.rate,
+                         prefetch=args.prefetch, parse_executor=parse_executor, adaptive=args.adaptive,
+                         streaming=args.streaming, http2=args.http2)
+            if server:
+                result = result._replace(connections=server.connections - connections)
+            results.append(result)
+            print(f'Finished {workers} worker(s)')
+        if parse_executor:
+            parse_executor.shutdown()
+        return results
+
+    if args.url:
+        results = run_all(args.url)
+    else:
+        with MockGoogleServer(options_from_arguments(args), http2=args.http2) as server:
+            results = run_all(server.url, server)
+
+    print()
+    print(report(results))
+
+
+if __name__ == '__main__':
+    main()
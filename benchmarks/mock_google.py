@@ -0,0 +1,439 @@
+"""
+Local HTTP server that stands in for Google, for load tests that must not reach the network
+
+Serves:
+    /search?q=...[&start=N]         Standard results, chained by a "pnnext" link for a configurable number of pages
+    /search?q=...&tbm=isch          Image results, with the GRID_STATE0 payload in the page's script
+    /searchbyimage?image_url=...    Redirects to search by image results (/search?tbs=sbi:...), like Google does
+    /search?tbs=sbi:...[&tbm=isch]  Search by image results, and image results of all sizes of the image
+    /sorry/index                    "Unusual traffic" interstitial, that throttled requests are redirected to
+
+Pages are compressed with brotli or gzip when the client accepts them and the server is told to. The server speaks
+HTTP/1.1, or HTTP/2 with prior knowledge (h2c, which requires the h2 package)
+
+Usage:
+    python -m benchmarks.mock_google --port 8000 --latency 0.05 --throttle-rate 0.01
+    python -m benchmarks.mock_google --port 8000 --http2 --compression
+"""
+import argparse
+import functools
+import gzip
+import hashlib
+import http.server
+import json
+import random
+import socketserver
+import string
+import threading
+import time
+import urllib.parse
+
+try:
+    import brotli
+except ImportError:  # Pages are then compressed with gzip only
+    brotli = None
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:  # Only HTTP/1.1 is then served
+    h2 = None
+
+RESULTS_PER_PAGE = 10
+DEFAULT_PAGES = 5  # Standard results pages of each query
+DEFAULT_IMAGE_RESULTS = 100  # Image results in a page
+DEFAULT_PADDING_KB = 200  # Inline script added to each page, as Google's pages are mostly script
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Brotli's default quality (11) is too slow to compress pages on the fly
+MAX_CONCURRENT_STREAMS = 100  # Of each HTTP/2 connection, as Google allows
+
+
+class MockGoogleOptions(object):
+    def __init__(self, pages=DEFAULT_PAGES, image_results=DEFAULT_IMAGE_RESULTS, padding_kb=DEFAULT_PADDING_KB,
+                 latency=0.0, latency_jitter=0.0, throttle_rate=0.0, unavailable_rate=0.0, seed=None,
+                 compression=False):
+        """
+        Args:
+            pages (int): Number of standard results pages of each query
+            image_results (int): Number of results in an image results page
+            padding_kb (int): Size of inline script added to each page, in KiB. Half of it is added to the head, and
+                              half after the results, as in Google's pages
+            latency (float): Seconds to wait before responding
+            latency_jitter (float): Maximal seconds added to the latency, uniformly at random
+            throttle_rate (float): Fraction of requests redirected to the "unusual traffic" page, which is served
+                                   with status 429
+            unavailable_rate (float): Fraction of requests answered with status 503
+            seed (int): Seed of the random injection of latency and errors
+            compression (bool): Whether to compress pages with the best encoding the client accepts, brotli (if
+                                the brotli package is installed) or gzip
+        """
+        self.pages = pages
+        self.image_results = image_results
+        self.padding_kb = padding_kb
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.unavailable_rate = unavailable_rate
+        self.compression = compression
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """
+        Returns:
+            tuple[float, float, float]: Random values deciding whether a request is throttled, whether it is
+                                        unavailable, and its latency in seconds
+        """
+        # Draws are serialized, as the server handles requests in threads
+        with self.lock:
+            latency = self.latency + self.random.uniform(0, self.latency_jitter)
+            return self.random.random(), self.random.random(), latency
+
+
+@functools.lru_cache(maxsize=None)
+def _padding(kb):
+    # Minified script of varying identifiers, which compresses about as well as Google's scripts do
+    names = random.Random(kb)
+    statements = []
+    size = 0
+    while size < kb * 1024:
+        a, b, c = (''.join(names.choices(string.ascii_letters, k=3)) for _ in range(3))
+        value = names.randrange(10 ** 6)
+        statements.append(f'var {a}=function({b},{c}){{return {b}.apply({c},arguments)||"{value}"}};')
+        size += len(statements[-1])
+    return f'<script nonce="mock">{"".join(statements)}</script>'
+
+
+def _head_padding(options):
+    return _padding(options.padding_kb // 2)
+
+
+def _trailing_padding(options):
+    return _padding(options.padding_kb - options.padding_kb // 2)
+
+
+def _token(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def search_page(query, start, options):
+    page = start // RESULTS_PER_PAGE
+    results = ''.join(
+        f'<div class="g"><div class="yuRUbf"><a href="https://site{position}.com/{_token(query)}">'
+        f'<h3>Result {position} for {query}</h3><cite>site{position}.com › {_token(query)}</cite></a></div>'
+        f'<div class="VwiC3b"><span>Snippet of result {position}</span></div></div>'
+        for position in range(start + 1, start + RESULTS_PER_PAGE + 1))
+    # Numbers of up to 10 pages around the current one link to them, as in Google's footer
+    page_links = ''.join(f'<a href="{_page_url(query, linked_page)}">{linked_page + 1}</a>'
+                         for linked_page in range(max(0, page - 4), min(options.pages, page + 6))
+                         if linked_page != page)
+    next_link = f'<a id="pnnext" href="{_page_url(query, page + 1)}">Next</a>' if page < options.pages - 1 else ''
+    return (f'<html><head><title>{query} - Google Search</title>{_head_padding(options)}</head><body>'
+            f'<div id="hdtb-msb"><a href="/search?q={urllib.parse.quote_plus(query)}&amp;tbm=isch">Images</a></div>'
+            f'<div id="rso">{results}</div><div id="foot">{page_links}{next_link}</div>{_trailing_padding(options)}'
+            '</body></html>')
+
+
+def _page_url(query, page):
+    url = f'/search?{urllib.parse.urlencode({"q": query, "start": page * RESULTS_PER_PAGE})}'
+    return url.replace('&', '&amp;')
+
+
+def image_results_page(query, options):
+    entries = []
+    for i in range(options.image_results):
+        metadata = {'2003': [None, f'id{i}', f'https://site{i}.com/{_token(query)}', f'Image {i} for {query}'],
+                    '2008': [None, f'Image {i} for {query}'],
+                    '183836587': [f'site{i}.com']}
+        entries.append([1, [0, f'id{i}', [f'https://encrypted-tbn0.gstatic.com/images?q=tbn:{i}', 200, 150],
+                            [f'https://site{i}.com/{i}.jpg', 600, 400], None, None, None, None, None, metadata]])
+    data = f'[null,[["GRID_STATE0",null,{json.dumps(entries)},"","","",null]]]'
+    return (f'<html><head><title>{query} - Google Images</title>{_head_padding(options)}</head>'
+            f'<body id="yDmH0d"><div id="islrg"><div></div></div>'
+            f"<script nonce=\"mock\">AF_initDataCallback({{key: 'ds:1', hash: '2', data:{data}, sideChannel: {{}}}});"
+            f'</script>{_trailing_padding(options)}</body></html>')
+
+
+def search_by_image_page(token, options):
+    all_sizes_url = f'/search?{urllib.parse.urlencode({"tbs": token, "tbm": "isch"})}'.replace('&', '&amp;')
+    return (f'<html><head><title>Google Search</title>{_head_padding(options)}</head><body>'
+            f'<div class="card-section"><span>600 × 400</span><a href="{all_sizes_url}">All sizes</a></div>'
+            f'<div id="rso"></div>{_trailing_padding(options)}</body></html>')
+
+
+SORRY_PAGE = ('<html><head><title>Sorry...</title></head><body><div>Our systems have detected unusual traffic from '
+              'your computer network.</div><form id="captcha-form" action="index" method="post"></form></body></html>')
+
+
+def respond(path, options):
+    """
+    Args:
+        path (str): Path and query of the request
+        options (MockGoogleOptions): Behavior of the server
+
+    Returns:
+        tuple[int, dict, bytes]: Status, headers and body of the response
+    """
+    url = urllib.parse.urlsplit(path)
+    query = dict(urllib.parse.parse_qsl(url.query))
+
+    throttled, unavailable, latency = options.draw()
+    if latency:
+        time.sleep(latency)
+
+    if url.path == '/sorry/index':
+        return _page(429, SORRY_PAGE)
+    elif throttled < options.throttle_rate:
+        return _redirect(f'/sorry/index?{urllib.parse.urlencode({"continue": path})}')
+    elif unavailable < options.unavailable_rate:
+        return _page(503, '<html><body>Service Unavailable</body></html>')
+    elif url.path == '/searchbyimage' and 'image_url' in query:
+        return _redirect(f'/search?{urllib.parse.urlencode({"tbs": "sbi:" + _token(query["image_url"])})}')
+    elif url.path == '/search' and query.get('tbm') == 'isch':
+        return _page(200, image_results_page(query.get('q') or query.get('tbs', ''), options))
+    elif url.path == '/search' and query.get('tbs', '').startswith('sbi:'):
+        return _page(200, search_by_image_page(query['tbs'], options))
+    elif url.path == '/search' and 'q' in query:
+        return _page(200, search_page(query['q'], int(query.get('start', 0)), options))
+    else:
+        return _page(404, '<html><body>Not Found</body></html>')
+
+
+def _page(status, page):
+    return status, {'content-type': 'text/html; charset=utf-8'}, page.encode()
+
+
+def _redirect(location):
+    return 302, {'location': location}, b''
+
+
+def encode(headers, body, accept_encoding, options):
+    """
+    Compresses a body with the best encoding the client accepts, if the server compresses pages
+
+    Args:
+        headers (dict): Headers of the response
+        body (bytes): Body of the response
+        accept_encoding (str): Value of the accept-encoding header of the request
+        options (MockGoogleOptions): Behavior of the server
+
+    Returns:
+        tuple[dict, bytes]: Headers and body of the response, as sent
+    """
+    if not options.compression or not body:
+        return headers, body
+    accepted = {encoding.split(';')[0].strip().lower() for encoding in accept_encoding.split(',')}
+    if 'br' in accepted and brotli is not None:
+        return {**headers, 'content-encoding': 'br'}, brotli.compress(body, quality=BROTLI_QUALITY)
+    if 'gzip' in accepted:
+        return {**headers, 'content-encoding': 'gzip'}, gzip.compress(body, GZIP_LEVEL)
+    return headers, body
+
+
+class MockGoogleHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, which would wait for the client's delayed ack of small responses
+    disable_nagle_algorithm = True
+    options = MockGoogleOptions()
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Streaming clients close the connection once they read the part of the page they need
+
+    def do_GET(self):
+        status, headers, body = respond(self.path, self.options)
+        headers, body = encode(headers, body, self.headers.get('accept-encoding', ''), self.options)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockGoogleHTTP2Handler(socketserver.BaseRequestHandler):
+    """
+    Serves a connection over HTTP/2 with prior knowledge. Each request is answered in a thread of its own, so that
+    the latency of a stream does not hold back the other streams of the connection
+    """
+    options = MockGoogleOptions()
+
+    def setup(self):
+        self._connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False,
+                                                                                header_encoding='utf-8'))
+        self._connection.local_settings = h2.settings.Settings(
+            client=False, initial_values={h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: MAX_CONCURRENT_STREAMS})
+        self._lock = threading.Lock()  # Guards the state of the connection and writes to the socket
+        self._pending = {}  # Body left to send of each stream, once the client's flow control window allows
+
+    def handle(self):
+        try:
+            with self._lock:
+                self._connection.initiate_connection()
+                self.request.sendall(self._connection.data_to_send())
+
+            while True:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                with self._lock:
+                    for event in self._connection.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            threading.Thread(target=self._respond, args=(event.stream_id, dict(event.headers)),
+                                             daemon=True).start()
+                        elif isinstance(event, h2.events.StreamReset):
+                            # Streaming clients reset streams once they read the part of the page they need
+                            self._pending.pop(event.stream_id, None)
+                    self._flush()
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+
+    def _respond(self, stream_id, request_headers):
+        status, headers, body = respond(request_headers[':path'], self.options)
+        headers, body = encode(headers, body, request_headers.get('accept-encoding', ''), self.options)
+        with self._lock:
+            try:
+                self._connection.send_headers(stream_id, [(':status', str(status)), *headers.items(),
+                                                          ('content-length', str(len(body)))], end_stream=not body)
+                if body:
+                    self._pending[stream_id] = memoryview(body)
+                self._flush()
+            except (OSError, h2.exceptions.ProtocolError):
+                pass  # The stream was reset or the connection was closed meanwhile
+
+    def _flush(self):
+        # Sends as much of the pending bodies as flow control allows
+        for stream_id, body in list(self._pending.items()):
+            try:
+                while body:
+                    size = min(len(body), self._connection.local_flow_control_window(stream_id),
+                               self._connection.max_outbound_frame_size)
+                    if size <= 0:
+                        break
+                    self._connection.send_data(stream_id, bytes(body[:size]), end_stream=size == len(body))
+                    body = body[size:]
+            except h2.exceptions.StreamClosedError:
+                body = None
+            if body:
+                self._pending[stream_id] = body
+            else:
+                del self._pending[stream_id]
+        self.request.sendall(self._connection.data_to_send())
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0  # Accepted so far
+
+    def process_request(self, request, client_address):
+        # Connections are accepted by a single thread
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class MockGoogleServer(object):
+    """
+    Runs the mock server in a background thread
+
+    Examples:
+        with MockGoogleServer(MockGoogleOptions(latency=0.05)) as server:
+            with Searcher(base_url=server.url, rate_limiter=RateLimiter(rate=100)) as searcher:
+                searcher.search('cat')
+    """
+
+    def __init__(self, options=None, host='127.0.0.1', port=0, http2=False):
+        """
+        Args:
+            options (MockGoogleOptions): Behavior of the server
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 for any free port
+            http2 (bool): Whether to serve HTTP/2 with prior knowledge rather than HTTP/1.1, see
+                          session.create_session()
+        """
+        if http2 and h2 is None:
+            raise ImportError('Serving HTTP/2 requires the h2 package')
+        base_handler = MockGoogleHTTP2Handler if http2 else MockGoogleHandler
+        handler = type('Handler', (base_handler,), {'options': options or MockGoogleOptions()})
+        self._server = _Server((host, port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def connections(self):
+        """
+        Returns:
+            int: Number of connections accepted so far
+        """
+        return self._server.connections
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def add_mock_arguments(parser):
+    """
+    Adds the options of the mock server to a command line parser, see options_from_arguments()
+
+    Args:
+        parser (argparse.ArgumentParser): Parser or argument group
+    """
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES, help='standard results pages of each query')
+    parser.add_argument('--image-results', type=int, default=DEFAULT_IMAGE_RESULTS, help='results in an image page')
+    parser.add_argument('--padding-kb', type=int, default=DEFAULT_PADDING_KB, help='inline script added to pages')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before responding')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='maximal seconds added to the latency')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--unavailable-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--compression', action='store_true', help='compress pages with brotli or gzip')
+
+
+def options_from_arguments(args):
+    """
+    Args:
+        args (argparse.Namespace): Parsed command line, with the arguments of add_mock_arguments()
+
+    Returns:
+        MockGoogleOptions:
+    """
+    return MockGoogleOptions(pages=args.pages, image_results=args.image_results, padding_kb=args.padding_kb,
+                             latency=args.latency, latency_jitter=args.latency_jitter,
+                             throttle_rate=args.throttle_rate, unavailable_rate=args.unavailable_rate,
+                             seed=args.seed, compression=args.compression)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    add_mock_arguments(parser)
+    parser.add_argument('--http2', action='store_true', help='serve HTTP/2 with prior knowledge (h2c)')
+    args = parser.parse_args(argv)
+
+    options = options_from_arguments(args)
+    with MockGoogleServer(options, args.host, args.port, http2=args.http2) as server:
+        print(f'Serving at {server.url}, press Ctrl+C to stop')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Offline benchmarks of page parsing, run against the recorded pages in tests/fixtures
+
+Usage:
+    python -m benchmarks.parsers                # Compare to the stored baselines
+    python -m benchmarks.parsers --save         # Store the measurements as the new baselines
+    python -m benchmarks.parsers --check        # Exit with an error if any benchmark regressed
+    python -m benchmarks.parsers -k xpath       # Only run benchmarks whose name contains "xpath"
+"""
+import argparse
+import itertools
+import os
+import sys
+
+from google_search import Searcher
+from google_search.basic_searcher import BasicSearcher
+from google_search.const import GoogleRegex, GoogleXpaths
+from google_search.metrics import Metrics, Stage, timed, tracing
+from google_search.page import Page
+from google_search.utils import (extract_value_from_url, iter_json_array, normalize_url,
+                                 parse_image_result_image_url, parse_search_result_url)
+
+from .runner import DEFAULT_MIN_TIME, DEFAULT_TOLERANCE, compare, load_baselines, measure, save_baselines
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+FIXTURE_URL = 'https://www.google.com/search?q=cat'
+
+SEARCH_FIXTURES = ('search_en', 'search_he', 'searchbyimage_en')
+IMAGE_FIXTURES = ('images_en', 'images_he')
+XPATHS = {
+    'results_divs': ('search_en', GoogleXpaths.Search.RESULTS_DIVS),
+    'next_page_link': ('search_en', GoogleXpaths.Search.NEXT_PAGE_LINK),
+    'sections_links': ('search_he', GoogleXpaths.SECTIONS_LINKS),
+    'all_sizes_link': ('searchbyimage_en', GoogleXpaths.Search.ALL_SIZES_LINK),
+    'image_results_divs': ('images_en', GoogleXpaths.ImageSearch.RESULTS_DIVS),
+}
+URLS = {
+    'redirect': '/url?q=https://www.example.com/some/article%3Fid%3D42&sa=U&ved=2ahUKEwj&usg=AOvVaw',
+    'imgres': 'https://www.google.com/imgres?imgurl=https%3A%2F%2Fexample.com%2Fcat.jpg&imgrefurl=https%3A%2F%2F'
+              'example.com%2Fcats&tbnid=abc&vet=1&docid=def&w=600&h=400',
+    'plain': 'HTTPS://WWW.Example.com/Some/Article/#comments',
+}
+
+
+def load_fixture(name):
+    """
+    Args:
+        name (str): Name of a fixture in tests/fixtures, without extension
+
+    Returns:
+        Page:
+    """
+    with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'rb') as f:
+        return Page(FIXTURE_URL, f.read(), 'utf-8')
+
+
+def loaded_searcher(page):
+    searcher = Searcher()
+    searcher._load(page)
+    return searcher
+
+
+def benchmarks():
+    """
+    Yields:
+        tuple[str, callable]: Name of a benchmark and the function that runs a single operation of it
+    """
+    pages = {name: load_fixture(name) for name in SEARCH_FIXTURES + IMAGE_FIXTURES}
+
+    # Whole parsing of a page, from its bytes to results
+    for name in SEARCH_FIXTURES:
+        searcher = loaded_searcher(pages[name])
+
+        def search_results(searcher=searcher, page=pages[name]):
+            searcher._load(page)
+            return list(itertools.islice(searcher.scan_search_results(prefetch=0), 8))
+        yield f'search_results.{name}', search_results
+
+    for name in IMAGE_FIXTURES:
+        searcher = loaded_searcher(pages[name])
+        for limit in (5, None):
+            def image_results(searcher=searcher, page=pages[name], limit=limit):
+                searcher._load(page)
+                return list(searcher.scan_image_results(max_iterations=limit))
+            yield f'image_results.{"all" if limit is None else f"first_{limit}"}.{name}', image_results
+
+    # Stages of parsing, separately
+    for name in IMAGE_FIXTURES:
+        searcher = loaded_searcher(pages[name])
+        script_text = searcher._get_element_text(searcher._find_element_by_xpath(GoogleXpaths.ImageSearch.RESULTS_JSON))
+        yield f'parse_image_results.{name}', lambda text=script_text: list(BasicSearcher._parse_image_results(text))
+
+        prefix = GoogleRegex.IMAGE_RESULTS_JSON_PREFIX
+        raw_results = list(iter_json_array(script_text, script_text.find(prefix) + len(prefix)))
+        yield (f'parse_image_result_metadata.{name}',
+               lambda raw_results=raw_results: [BasicSearcher._parse_image_result_metadata(r) for r in raw_results])
+
+    for name in SEARCH_FIXTURES + IMAGE_FIXTURES:
+        searcher = loaded_searcher(pages[name])
+
+        def build_tree(searcher=searcher, page=pages[name]):
+            searcher._load(page)
+            return searcher._document()
+        yield f'xpath.build_tree.{name}', build_tree
+
+    for xpath_name, (name, xpath) in XPATHS.items():
+        searcher = loaded_searcher(pages[name])
+        searcher._document()
+        yield (f'xpath.{xpath_name}.{name}',
+               lambda searcher=searcher, xpath=xpath: searcher._find_elements_by_xpath(xpath))
+
+    # Url helpers, per call
+    yield 'utils.extract_value_from_url', lambda url=URLS['imgres']: extract_value_from_url('imgrefurl', url)
+    yield 'utils.parse_search_result_url', lambda url=URLS['redirect']: parse_search_result_url(url)
+    yield 'utils.parse_image_result_image_url', lambda url=URLS['imgres']: parse_image_result_image_url(url)
+    yield 'utils.normalize_url', lambda url=URLS['plain']: normalize_url(url)
+
+    # Overhead of instrumenting a stage, see metrics
+    def timed_stage():
+        with timed(Stage.XPATH):
+            pass
+    yield 'metrics.timed.disabled', timed_stage
+
+    def traced_stage(metrics=Metrics()):
+        with tracing(metrics):
+            timed_stage()
+    yield 'metrics.timed.enabled', traced_stage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='keyword', help='only run benchmarks whose name contains this keyword')
+    parser.add_argument('--baselines', default=BASELINES_PATH, help='baselines file to compare to or save to')
+    parser.add_argument('--save', action='store_true', help='store the measurements as the new baselines')
+    parser.add_argument('--check', action='store_true', help='exit with an error if any benchmark regressed')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative slowdown or memory growth that is considered a regression')
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME, help='seconds per timing repeat')
+    args = parser.parse_args(argv)
+
+    measurements = [measure(name, func, min_time=args.min_time)
+                    for name, func in benchmarks() if args.keyword is None or args.keyword in name]
+
+    baselines = load_baselines(args.baselines)
+    report, regressions = compare(measurements, baselines, tolerance=args.tolerance)
+    print(report)
+
+    if args.save:
+        # Benchmarks that did not run keep their previous baselines
+        baselines.update({m.name: m for m in measurements})
+        save_baselines(args.baselines, baselines.values())
+        print(f'\nBaselines saved to {args.baselines}')
+    elif regressions:
+        print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: '
+              f'{", ".join(regressions)}')
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Records live Google pages into tests/fixtures, for the offline tests and benchmarks
+
+Usage:
+    python -m benchmarks.record_fixtures                 # Record all fixtures
+    python -m benchmarks.record_fixtures images_he       # Record specific fixtures
+
+Notes:
+    * Rerecording changes the baselines of benchmarks/parsers.py, save new ones right after
+"""
+import os
+import sys
+import urllib.parse
+
+from google_search import Searcher
+from google_search.const import GOOGLE_IMAGE_URL_SEARCH_URL, GOOGLE_SEARCH_URL
+
+from .parsers import FIXTURES_DIR
+
+QUERY = 'cat'
+IMAGE_URL = 'https://upload.wikimedia.org/wikipedia/commons/3/3a/Cat03.jpg'
+
+# Url of each fixture, with the UI language it is recorded in
+FIXTURES = {
+    'search_en': GOOGLE_SEARCH_URL.format(text=QUERY) + '&hl=en',
+    'search_he': GOOGLE_SEARCH_URL.format(text=QUERY) + '&hl=iw',
+    'search_last_page_en': GOOGLE_SEARCH_URL.format(text=QUERY) + '&hl=en&start=290',
+    'images_en': GOOGLE_SEARCH_URL.format(text=QUERY) + '&tbm=isch&hl=en',
+    'images_he': GOOGLE_SEARCH_URL.format(text=QUERY) + '&tbm=isch&hl=iw',
+    'searchbyimage_en': GOOGLE_IMAGE_URL_SEARCH_URL.format(image_url=urllib.parse.quote_plus(IMAGE_URL)) + '&hl=en',
+}
+
+
+def record(names):
+    with Searcher() as searcher:
+        for name in names:
+            searcher._get(FIXTURES[name])
+            with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'wb') as f:
+                f.write(searcher._content)
+            print(f'Recorded {name} ({len(searcher._content):,} bytes)')
+
+
+if __name__ == '__main__':
+    record(sys.argv[1:] or FIXTURES)
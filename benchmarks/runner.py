@@ -0,0 +1,123 @@
+"""
+Measurement and reporting utilities for the offline benchmarks
+"""
+import gc
+import json
+import platform
+import time
+import timeit
+import tracemalloc
+from collections import namedtuple
+
+DEFAULT_MIN_TIME = 0.2  # seconds spent on each timing repeat
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2  # relative slowdown (or memory growth) that is reported as a regression
+
+Measurement = namedtuple('Measurement', ('name', 'ops_per_sec', 'peak_kb'))
+
+
+def measure(name, func, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """
+    Measures throughput and peak memory of a benchmark
+
+    Notes:
+        * Throughput is the best of several repeats, as slower repeats are mostly noise from other processes
+        * Memory is traced by tracemalloc, so it only covers Python allocations. Memory that lxml allocates
+          for a document (through libxml2) is not included.
+
+    Args:
+        name (str): Name of the benchmark
+        func (callable): Runs a single operation, without arguments
+        min_time (float): Minimal duration of a repeat, in seconds
+        repeat (int): Number of timing repeats
+
+    Returns:
+        Measurement:
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(name, 1 / best, peak / 1024)
+
+
+def environment():
+    """
+    Returns:
+        dict: Description of the machine the benchmarks run on, as baselines are only comparable on the same one
+    """
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'system': platform.system()}
+
+
+def load_baselines(path):
+    """
+    Args:
+        path (str): Path of a baselines file, see save_baselines()
+
+    Returns:
+        dict: Measurements by benchmark name, empty if the file does not exist
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: Measurement(name, **values) for name, values in data['results'].items()}
+
+
+def save_baselines(path, measurements):
+    data = {'recorded_at': time.strftime('%Y-%m-%d'),
+            'environment': environment(),
+            'results': {m.name: {'ops_per_sec': round(m.ops_per_sec, 1), 'peak_kb': round(m.peak_kb, 1)}
+                        for m in measurements}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def compare(measurements, baselines, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares measurements to their baselines
+
+    Args:
+        measurements (list[Measurement]):
+        baselines (dict): Measurements by benchmark name, see load_baselines()
+        tolerance (float): Relative slowdown (or memory growth) that is considered a regression
+
+    Returns:
+        tuple[str, list[str]]: Report table, and names of the benchmarks that regressed
+    """
+    rows = [('benchmark', 'ops/s', 'baseline', 'speed', 'peak KiB', 'baseline', 'memory', '')]
+    regressions = []
+    for m in measurements:
+        base = baselines.get(m.name)
+        if base is None:
+            rows.append((m.name, f'{m.ops_per_sec:,.0f}', '-', '-', f'{m.peak_kb:,.1f}', '-', '-', 'new'))
+            continue
+
+        speed = m.ops_per_sec / base.ops_per_sec
+        memory = m.peak_kb / base.peak_kb if base.peak_kb else 1.0
+        regressed = speed < 1 - tolerance or memory > 1 + tolerance
+        if regressed:
+            regressions.append(m.name)
+        rows.append((m.name, f'{m.ops_per_sec:,.0f}', f'{base.ops_per_sec:,.0f}', f'{speed:.2f}x',
+                     f'{m.peak_kb:,.1f}', f'{base.peak_kb:,.1f}', f'{memory:.2f}x', 'REGRESSED' if regressed else ''))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ['  '.join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                       for i, (cell, width) in enumerate(zip(row, widths))).rstrip()
+             for row in rows]
+    lines.insert(1, '-' * len(lines[0]))
+    return '\n'.join(lines), regressions
@@ -1,3 +1,28 @@
-from google_search.const import WEBDRIVER_PATH
-from google_search.selenium_searcher import SeleniumSearcher
-from google_search.searcher import Searcher
\ No newline at end of file
+import importlib
+
+# Module of each export. Exports are imported on first access, so that using Searcher alone does not pay for
+# importing Selenium or aiohttp
+_EXPORTS = {
+    'WEBDRIVER_PATH': 'google_search.const',
+    'SeleniumSearcher': 'google_search.selenium_searcher',
+    'Searcher': 'google_search.searcher',
+    'AsyncSearcher': 'google_search.async_searcher',
+    'SeleniumSearcherPool': 'google_search.driver_pool',
+    'LEAN_PROFILE': 'google_search.browser_profile',
+    'PerformanceProfile': 'google_search.browser_profile',
+    'HybridSearcher': 'google_search.hybrid_searcher',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(importlib.import_module(module), name)
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
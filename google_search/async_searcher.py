@@ -0,0 +1,329 @@
+import asyncio
+import contextlib
+import itertools
+import urllib.parse
+
+import aiohttp
+from lxml import html
+
+from .basic_searcher import BasicSearcher, SearchNavigation
+from .const import NON_BOT_USER_AGENT, SEARCH_RESULTS_PER_PAGE, GoogleXpaths
+from .exceptions import Blocked, NoSuchElement
+from .metrics import Counter, Observation, Stage, increment, observe, timed
+from .navigation import NavigationPlanner, Route
+from .rate_limit import RateLimiter
+from .selector_registry import compiled_xpath
+from .throttle import THROTTLING_REASONS, detect_block
+from .utils import random_delay
+
+# Artificial delay to try to avoid being recognized as bots. Preferable use is before each GET request in the browser
+ARTIFICIAL_AVERAGE_DELAY = 1.5  # Seconds
+# Default maximal number of requests in flight, shared by all searchers forked from the same instance
+DEFAULT_CONCURRENCY = 100
+
+
+class AsyncSearcher(SearchNavigation, contextlib.AbstractAsyncContextManager):
+    """
+    AsyncSearcher is the asyncio counterpart of Searcher. Navigation actions are coroutines and scans are
+    async generators, so a single process can run many searches at once
+
+    Notes:
+        * Each instance holds the state of a single navigation (current page), use fork() to get another searcher
+          that shares the connection pool and the concurrency limit
+        * Navigation is decided as in BasicSearcher, see SearchNavigation
+
+    Examples:
+        async with AsyncSearcher(concurrency=50) as searcher:
+            async def identical_images(image_url):
+                s = searcher.fork()
+                await s.search_image(image_url)
+                await s.navigate_to_identical_images()
+                return [result async for result in s.scan_image_results(10)]
+
+            results = await asyncio.gather(*map(identical_images, image_urls))
+    """
+    _request_headers = {'user-agent': NON_BOT_USER_AGENT}
+
+    def __init__(self, session=None, concurrency=DEFAULT_CONCURRENCY, rate_limiter=None, identity=None, base_url=None,
+                 throttle=None):
+        """
+        Args:
+            session (aiohttp.ClientSession): Session to perform requests with. By default, a new session is created
+                                             and owned by the searcher
+            concurrency (Union[int, asyncio.Semaphore]): Maximal number of requests in flight, or a semaphore to share
+            rate_limiter (RateLimiter): Shared limiter to pace requests with, instead of an artificial random delay
+            identity (str): Egress identity of the requests, paced separately by the rate limiter and the throttle
+            base_url (str): Scheme and host to send searches to instead of Google's, f.e. of a local mock server
+            throttle (AdaptiveThrottle): Shared throttle to pace requests with according to Google's responses,
+                                         instead of an artificial random delay. Blocked requests are retried
+        """
+        self._html = None
+        self._host = None
+        self._url = None
+        self._rate_limiter = rate_limiter
+        self._identity = identity
+        self._throttle = throttle
+        if base_url is not None:
+            self._planner = NavigationPlanner(base_url)
+
+        self._owns_session = session is None
+        self._session = session
+        self._limiter = concurrency if isinstance(concurrency, asyncio.Semaphore) else asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+    def fork(self):
+        """
+        Creates a searcher with a fresh navigation state, sharing the session and concurrency limit of this one
+
+        Returns:
+            AsyncSearcher:
+        """
+        return AsyncSearcher(session=self._ensure_session(), concurrency=self._limiter,
+                             rate_limiter=self._rate_limiter, identity=self._identity, base_url=self._planner.base_url,
+                             throttle=self._throttle)
+
+    def _ensure_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers=self._request_headers)
+        return self._session
+
+    async def _get(self, url):
+        url = self._resolve_url(url)
+        await self._delay(url)
+        return await self._non_delayed_get(url)
+
+    async def _delay(self, url):
+        # Waiting does not hold a concurrency slot
+        with timed(Stage.WAIT):
+            if self._rate_limiter:
+                await self._rate_limiter.acquire_async(RateLimiter.key(url, self._identity))
+            elif not self._throttle:
+                await asyncio.sleep(random_delay(ARTIFICIAL_AVERAGE_DELAY))
+
+    def _resolve_url(self, url):
+        # If url starts with '/' we stay at current host and adjust the request accordingly
+        if self._host and url.startswith('/'):
+            url = self._host + url
+        return url
+
+    async def _non_delayed_get(self, url):
+        url = self._resolve_url(url)
+        url, text = await (self._throttled_fetch(url) if self._throttle else self._fetch(url))
+
+        # Updates attributes
+        parsed_uri = urllib.parse.urlparse(url)
+        self._host = '{uri.scheme}://{uri.netloc}'.format(uri=parsed_uri)
+        self._url = url
+        with timed(Stage.HTML_PARSE):
+            self._html = html.fromstring(text)
+        increment(Counter.PAGES)
+
+    async def _fetch(self, url, permit=None):
+        """
+        Performs the request, raises aiohttp.ClientResponseError if status code is not OK
+
+        Args:
+            url (str): Absolute url
+            permit (Permit): Permit of the throttle to report the response to. If Google refused to serve the page,
+                             Blocked is raised instead
+
+        Returns:
+            tuple[str, str]: Final url and text of the response
+        """
+        async with self._limiter:
+            with timed(Stage.NETWORK):
+                async with self._ensure_session().get(url) as response:
+                    content = await response.read()
+                    increment(Counter.REQUESTS)
+                    increment(Counter.BYTES_DOWNLOADED, len(content))
+                    observe(Observation.PAGE_BYTES, len(content))
+                    if permit:
+                        reason = detect_block(response.status, str(response.url), content)
+                        permit.report(reason)
+                        if reason:
+                            raise Blocked(reason, url)
+                    response.raise_for_status()
+                    text = await response.text()
+        return str(response.url), text
+
+    async def _throttled_fetch(self, url):
+        # Same as _fetch(), paced by the throttle. Blocked requests are retried, see Searcher._fetch()
+        for retries in itertools.count():
+            if retries:
+                increment(Counter.RETRIES)
+                await self._delay(url)
+            with timed(Stage.WAIT):
+                permit = await self._throttle.acquire_async(self._identity)
+            try:
+                with permit:
+                    return await self._fetch(url, permit)
+            except Blocked as e:
+                increment(Counter.BLOCKED)
+                # Retrying does not get past the consent interstitial
+                if e.reason not in THROTTLING_REASONS or retries >= self._throttle.max_retries:
+                    raise
+
+    def _current_url(self):
+        return self._url
+
+    def _find_element_by_xpath(self, xpath):
+        elements = self._find_elements_by_xpath(xpath)
+        if not elements:
+            raise NoSuchElement(f'Could not find element "{xpath}"')
+        return elements[0]
+
+    def _find_elements_by_xpath(self, xpath):
+        with timed(Stage.XPATH):
+            return compiled_xpath(xpath)(self._html)
+
+    @staticmethod
+    def _find_elements_by_relative_xpath(element, xpath):
+        return compiled_xpath(xpath)(element)
+
+    @staticmethod
+    def _get_element_attribute(element, attr):
+        return element.attrib[attr]
+
+    @staticmethod
+    def _get_element_text(element):
+        return element.text_content()
+
+    async def _click_link(self, element):
+        await self._get(element.attrib['href'])
+
+    async def search(self, text, section=None):
+        """
+        Performs a simple Google search. See BasicSearcher
+
+        Args:
+            text (str): Text to search
+            section (Union[str, tuple]): Section of the results to navigate to, see go_to_search_section()
+
+        Raises:
+            NoSuchElement: If the section was not found
+        """
+        increment(Counter.QUERIES)
+        url = self._planner.search_url(text, section)
+        await self._non_delayed_get(url or self._planner.search_url(text))
+        if url is None:
+            await self.go_to_search_section(section)
+        elif section is not None:
+            self.last_route = Route.DIRECT
+
+    async def search_image(self, image_url):
+        """
+        Performs an image search from url
+
+        Args:
+            image_url (str): Image url to search
+        """
+        increment(Counter.QUERIES)
+        await self._non_delayed_get(self._planner.search_by_image_url(image_url))
+
+    async def go_to_search_section(self, name):
+        """
+        Navigates to a section (Images, Videos, News...) of a search results page. See BasicSearcher
+
+        Args:
+            name (Union[str, tuple]): Name of the section, use tuple for multiple tries
+
+        Raises:
+            NoSuchElement: If the section was not found
+        """
+        await self._follow(*self._section_target(name))
+
+    async def navigate_to_identical_images(self):
+        """
+        Navigates to image search results page of identical images to the one that was searched. See BasicSearcher
+
+        Raises:
+            NoSuchElement: If the option was not available for current search
+        """
+        await self._follow(*self._identical_images_target())
+
+    async def navigate_to_similar_images(self):
+        """
+        Navigates to image search results page of visually similar images to the one that was searched.
+        See BasicSearcher
+
+        Raises:
+            NoSuchElement: If the option was not available for current search
+        """
+        await self._follow(*self._similar_images_target())
+
+    async def _follow(self, route, target):
+        if route == Route.DIRECT:
+            await self._get(target)
+        else:
+            await self._click_link(target)
+        self.last_route = route
+
+    async def find_identical_images(self, image_url, max_iterations: int = None, cache=None):
+        """
+        Searches an image and scans the results of identical images to it. See BasicSearcher
+
+        Args:
+            image_url (str): Image url to search
+            max_iterations (int): Limit for number of results, None for no artificial limit
+            cache (ResultCache): Cache to share results through, concurrent searches of the same image are done once
+
+        Returns:
+            list[ImageResult]:
+
+        Raises:
+            NoSuchElement: If the option was not available for the image
+        """
+        async def find():
+            await self.search_image(image_url)
+            await self.navigate_to_identical_images()
+            return tuple([result async for result in self.scan_image_results(max_iterations=max_iterations)])
+
+        if cache is None:
+            return list(await find())
+        return list(await cache.get_or_compute_async(self._identical_images_key(image_url, max_iterations), find))
+
+    async def scan_search_results(self, max_iterations: int = 10):
+        """
+        Parses standard search results. See BasicSearcher
+
+        Args:
+            max_iterations (int): Limit for number of results, None for no artificial limit
+
+        Yields:
+            SearchResult:
+        """
+        position = 1
+
+        for _ in itertools.islice(itertools.count(), 0, max_iterations, SEARCH_RESULTS_PER_PAGE):
+            for result in self._scan_current_page(max_iterations, position):
+                yield result
+                position += 1
+
+            next_page_link = self._next_page_link()
+            if next_page_link is None:
+                break
+            await self._click_link(next_page_link)
+
+    async def scan_image_results(self, max_iterations: int = None):
+        """
+        Parses image search results by analyzing webpage's script
+
+        Notes:
+            * Assumes searcher is in an image search results page
+
+        Args:
+            max_iterations (int): Limit for number of results, None for no artificial limit
+
+        Yields:
+            ImageResult:
+        """
+        script_text = self._find_element_by_xpath(GoogleXpaths.ImageSearch.RESULTS_JSON).text_content()
+        for result in BasicSearcher._parse_image_results(script_text, max_iterations=max_iterations):
+            yield result
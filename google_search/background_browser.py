@@ -1,32 +1,70 @@
-import requests
 import urllib.parse
 from lxml import html
 
 from .basic_browser import BasicBrowser
+from .const import GoogleXpaths
+from .metrics import Counter, Observation, Stage, increment, observe, timed
+from .page import Page
+from .payload import ScriptPayload, find_script_payload
+from .selector_registry import compiled_xpath
+from .session import create_session, wire_bytes
+from .streaming import StreamedResponse, read_streamed
+from .throttle import detect_block
 
+# Script elements that can be found by the prefix of their text, without building the page's tree
+SCRIPT_PREFIXES_BY_XPATH = {
+    GoogleXpaths.ImageSearch.RESULTS_JSON: GoogleXpaths.ImageSearch.RESULTS_JSON_SCRIPT_PREFIX,
+}
+
+
+class PageBrowser(BasicBrowser):
+    """
+    Browses pages that were downloaded elsewhere (see Page): looks up elements in their trees, but does not download
+    """
 
-class BackgroundBrowser(BasicBrowser):
     def __init__(self):
         super().__init__()
         self._html = None
+        self._content = None
+        self._encoding = None
         self._host = None
+        self._url = None
 
-    def _non_delayed_get(self, url):
-        # If url starts with '/' we stay at current host and adjust the request accordingly
-        if self._host and url.startswith('/'):
-            url = self._host + url
-
-        # Performs the request, raises requests.HTTPError if status code is not OK
-        response = requests.get(url)
-        response.raise_for_status()
-
+    def _load(self, page):
         # Updates attributes
-        parsed_uri = urllib.parse.urlparse(url)
+        parsed_uri = urllib.parse.urlparse(page.url)
         self._host = '{uri.scheme}://{uri.netloc}'.format(uri=parsed_uri)
-        self._html = html.fromstring(response.text)
+        self._url = page.url
+        # The tree is only built once an xpath lookup requires it
+        self._content = page.content
+        self._encoding = page.encoding
+        self._html = page.document
+        increment(Counter.PAGES)
+
+    def _current_url(self):
+        return self._url
+
+    def _document(self):
+        if self._html is None:
+            with timed(Stage.HTML_PARSE):
+                self._html = html.fromstring(self._content.decode(self._encoding, errors='replace'))
+        return self._html
 
     def _find_elements_by_xpath(self, xpath):
-        return self._html.xpath(xpath)
+        script_prefix = SCRIPT_PREFIXES_BY_XPATH.get(xpath)
+        if script_prefix and self._html is None:
+            with timed(Stage.XPATH):
+                script_text = find_script_payload(self._content, script_prefix, self._encoding)
+            if script_text is not None:
+                return [ScriptPayload(script_text)]
+
+        document = self._document()
+        with timed(Stage.XPATH):
+            return compiled_xpath(xpath)(document)
+
+    @staticmethod
+    def _find_elements_by_relative_xpath(element, xpath):
+        return compiled_xpath(xpath)(element)
 
     @staticmethod
     def _get_element_attribute(element, attr):
@@ -35,3 +73,115 @@ class BackgroundBrowser(BasicBrowser):
     @staticmethod
     def _get_element_text(element):
         return element.text_content()
+
+
+class BackgroundBrowser(PageBrowser):
+    # Headers sent with every request of the browser, in addition to the session's headers
+    _request_headers = {}
+
+    def __init__(self, session=None, cache=None, **session_options):
+        """
+        Args:
+            session (requests.Session): Session to perform requests with, may be shared with other browsers.
+                                        By default, a new session is created and owned by the browser
+            cache (ResponseCache): Cache to serve pages from and store fetched pages in
+            **session_options: Pool configuration for a new session, see session.create_session()
+        """
+        super().__init__()
+        self._cache = cache
+
+        self._owns_session = session is None
+        self._session = create_session(**session_options) if session is None else session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # A session that was given to us might still be used by other browsers
+        if self._owns_session:
+            self._session.close()
+
+    def _non_delayed_get(self, url):
+        self._load(self._retrieve(self._resolve_url(url)))
+
+    def _retrieve(self, url, delayed=False):
+        """
+        Retrieves a page from cache, or downloads it (and stores it in cache) if it is not cached
+
+        Notes:
+            * Does not change the browser's current page, so it may be used for several pages concurrently
+            * Pages whose download was cut short (see streaming) are not stored in cache, as other browsers may need
+              the rest of them
+            * Interstitials that Google serves instead of the page (f.e. consent or captcha) are not stored in cache,
+              so that they are not served again for the whole time to live
+
+        Args:
+            url (str): Absolute url of the page
+            delayed (bool): Whether to delay before downloading, see _delay()
+
+        Returns:
+            Page:
+        """
+        if self._cache:
+            cached_page = self._cache.get(url, self._cache_key_headers())
+            if cached_page is not None:
+                return cached_page
+
+        if delayed:
+            self._delay(url)
+        reader = self._page_reader(url)
+        response = self._fetch(url, reader)
+        page = Page(response.url, response.content, response.encoding or response.apparent_encoding,
+                    reader.document if reader else None)
+        if (self._cache and not (isinstance(response, StreamedResponse) and response.truncated) and
+                detect_block(response.status_code, page.url, page.content) is None):
+            self._cache.set(url, page, self._cache_key_headers())
+        return page
+
+    def _delay(self, url):
+        """
+        Waits before a request, to avoid being recognized as a bot. BackgroundBrowser does not wait
+
+        Args:
+            url (str): Absolute url of the request
+        """
+        pass
+
+    def _page_reader(self, url):
+        """
+        Chooses how to download a page. BackgroundBrowser downloads pages whole
+
+        Args:
+            url (str): Absolute url of the page
+
+        Returns:
+            PageReader: Reader to stream the page through (see streaming), None to download it whole
+        """
+        return None
+
+    def _cache_key_headers(self):
+        return {**self._session.headers, **self._request_headers}
+
+    def _resolve_url(self, url):
+        # If url starts with '/' we stay at current host and adjust the request accordingly
+        if self._host and url.startswith('/'):
+            url = self._host + url
+        return url
+
+    def _fetch(self, url, reader=None):
+        # Performs the request, raises requests.HTTPError if status code is not OK
+        response = self._request(url, reader)
+        response.raise_for_status()
+        return response
+
+    def _request(self, url, reader=None):
+        # Performs the request, whatever the status code of the response. With a reader, the body is streamed through
+        # it and may be cut short
+        with timed(Stage.NETWORK):
+            response = self._session.get(url, headers=self._request_headers, stream=reader is not None)
+            if reader is not None:
+                response = read_streamed(response, reader)
+                if response.truncated:
+                    increment(Counter.EARLY_CLOSES)
+        increment(Counter.REQUESTS)
+        increment(Counter.BYTES_DOWNLOADED, len(response.content))
+        increment(Counter.WIRE_BYTES, wire_bytes(response))
+        observe(Observation.PAGE_BYTES, len(response.content))
+        return response
@@ -16,6 +16,9 @@ class BasicBrowser(contextlib.AbstractContextManager):
     def _non_delayed_get(self, url):
         raise NotImplemented
 
+    def _current_url(self):
+        raise NotImplemented
+
     def _find_element_by_xpath(self, xpath):
         elements = self._find_elements_by_xpath(xpath)
         if not elements:
@@ -25,6 +28,10 @@ class BasicBrowser(contextlib.AbstractContextManager):
     def _find_elements_by_xpath(self, xpath):
         raise NotImplemented
 
+    @staticmethod
+    def _find_elements_by_relative_xpath(element, xpath):
+        raise NotImplemented
+
     @staticmethod
     def _get_element_attribute(element, attr):
         raise NotImplemented
@@ -1,29 +1,174 @@
 import itertools
-import json
-import re
 import urllib.parse
 
 from .basic_browser import BasicBrowser
-from .const import GOOGLE_SEARCH_URL, GOOGLE_IMAGE_URL_SEARCH_URL, GoogleRegex, GoogleXpaths
+from .const import SEARCH_RESULTS_PER_PAGE, GoogleRegex, GoogleXpaths
 from .exceptions import NoSuchElement
-from .result import ImageResult
+from .metrics import Counter, Observation, Stage, increment, observe, timed_calls, timed_iter
+from .navigation import NavigationPlanner, Route
+from .result import ImageResult, SearchResult
+from .utils import iter_json_array, parse_search_result_url
 
 
-class BasicSearcher(BasicBrowser):
+@timed_calls(Stage.RESULTS_PARSE)
+def parse_search_result(raw_result, position, browser):
+    """
+    Parses html element of a single standard search result
+
+    Args:
+        raw_result: Element that represents search result
+        position (int): Position of the result in the search, starting from 1
+        browser (BasicBrowser): Browser (or browser class) whose elements raw_result is of, read with its element
+                                accessors
+
+    Returns:
+        SearchResult:
+
+    Raises:
+        NoSuchElement: If element structure is not as expected
+    """
+    title_element = _first_element(browser, raw_result, GoogleXpaths.Search.Result.TITLE_RELATIVE)
+    link_element = _first_element(browser, raw_result, GoogleXpaths.Search.Result.LINK_RELATIVE)
+    if title_element is None or link_element is None:
+        raise NoSuchElement('Could not extract data from result due to change in Google\'s html structure')
+
+    link = parse_search_result_url(browser._get_element_attribute(link_element, 'href'))
+
+    # Displayed url looks like "site.com › path", but we prefer the host of the link if it's not displayed
+    site_element = _first_element(browser, raw_result, GoogleXpaths.Search.Result.SITE_RELATIVE)
+    site = browser._get_element_text(site_element).split('›')[0].strip() if site_element is not None else None
+    site = site or urllib.parse.urlparse(link or '').netloc or None
+
+    snippet_element = _first_element(browser, raw_result, GoogleXpaths.Search.Result.SNIPPET_RELATIVE)
+    snippet = browser._get_element_text(snippet_element).strip() if snippet_element is not None else None
+
+    result = SearchResult(title=browser._get_element_text(title_element).strip(),
+                          site=site,
+                          link=link,
+                          snippet=snippet,
+                          position=position)
+    increment(Counter.RESULTS)
+    return result
+
+
+def _first_element(browser, element, xpath):
+    elements = browser._find_elements_by_relative_xpath(element, xpath)
+    return elements[0] if elements else None
+
+
+class SearchNavigation(object):
+    """
+    Navigation of search pages, shared by synchronous and asynchronous searchers. It only decides where to go next,
+    and returns the route along with its target: the url to load for Route.DIRECT, or the link element to follow for
+    Route.LINK. Searchers then load the target in their own way
+
+    Notes:
+        * Relies on the page accessors of the searcher (_current_url(), _find_elements_by_xpath()...)
+    """
+    _planner = NavigationPlanner()
+    last_route = None  # Route taken by the last navigation, see navigation.Route
+
+    def _section_target(self, name):
+        url = self._planner.section_url(self._current_url(), name)
+        if url:
+            return Route.DIRECT, url
+
+        possible_section_names = (name,) if not isinstance(name, tuple) else name
+        sections = self._find_elements_by_xpath(GoogleXpaths.SECTIONS_LINKS)
+
+        for section in sections:
+            for section_name in possible_section_names:
+                if section_name.lower() in section.text.lower():
+                    return Route.LINK, section
+
+        raise NoSuchElement(f'Section {name} not found')
+
+    def _identical_images_target(self):
+        url = self._planner.identical_images_url(self._current_url())
+        if url:
+            return Route.DIRECT, url
+
+        try:
+            return Route.LINK, self._find_element_by_xpath(GoogleXpaths.Search.ALL_SIZES_LINK)
+        except NoSuchElement:
+            raise NoSuchElement('There\'s no option for other sizes of image')
+
+    def _similar_images_target(self):
+        try:
+            return Route.LINK, self._find_element_by_xpath(GoogleXpaths.Search.SIMILAR_IMAGES_LINK)
+        except NoSuchElement:
+            raise NoSuchElement('There\'s no option for visually similar images')
+
+    def _identical_images_key(self, image_url, max_iterations):
+        # Key of the results in a ResultCache. Results of different hosts (f.e. a mock server) are cached apart
+        return 'identical_images', self._planner.base_url, image_url, max_iterations
+
+    def _next_page_link(self):
+        """
+        Returns:
+            Link element to the next search results page, None if this is the last one
+        """
+        links = self._find_elements_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK)
+        return links[0] if links else None
+
+    def _last_linked_start(self):
+        """
+        Returns:
+            int: Result offset of the farthest search results page that the current one links to, -1 if none
+        """
+        starts = [-1]
+        for link in self._find_elements_by_xpath(GoogleXpaths.Search.PAGES_LINKS):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self._get_element_attribute(link, 'href')).query)
+            starts.extend(int(start) for start in query.get('start', ()) if start.isdigit())
+        return max(starts)
+
+    def _scan_current_page(self, max_iterations, position):
+        """
+        Parses the standard search results of the current page
+
+        Args:
+            max_iterations (int): Limit for number of results of the whole scan, None for no artificial limit
+            position (int): Position of the first result of the page in the search, starting from 1
+
+        Yields:
+            SearchResult:
+        """
+        current_page_results = self._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS)
+
+        # Collect all results in page unless max_iterations limits that
+        first_position = position
+        for raw_result in itertools.islice(current_page_results, 0, self._remaining(max_iterations, position)):
+            yield parse_search_result(raw_result, position, self)
+            position += 1
+        observe(Observation.RESULTS_PER_PAGE, position - first_position)
+
+    @staticmethod
+    def _remaining(max_iterations, position):
+        return None if max_iterations is None else max(0, max_iterations - position + 1)
+
+
+class BasicSearcher(BasicBrowser, SearchNavigation):
     """
     BasicSearcher is a prototype of an object with actions related to Google search
     """
 
-    def search(self, text):
+    def search(self, text, section=None):
         """
         Performs a simple Google search (without Selenium).
         Args:
             text (str): Text to search
+            section (Union[str, tuple]): Section of the results to navigate to, see go_to_search_section()
 
-        Returns:
-            lxml.html.HtmlElement:
+        Raises:
+            NoSuchElement: If the section was not found
         """
-        self._non_delayed_get(GOOGLE_SEARCH_URL.format(text=urllib.parse.quote_plus(text)))
+        increment(Counter.QUERIES)
+        url = self._planner.search_url(text, section)
+        self._non_delayed_get(url or self._planner.search_url(text))
+        if url is None:
+            self.go_to_search_section(section)
+        elif section is not None:
+            self.last_route = Route.DIRECT
 
     def search_image(self, image_url):
         """
@@ -32,7 +177,8 @@ class BasicSearcher(BasicBrowser):
         Args:
             image_url (str): Image url to search
         """
-        self._non_delayed_get(GOOGLE_IMAGE_URL_SEARCH_URL.format(image_url=urllib.parse.quote_plus(image_url)))
+        increment(Counter.QUERIES)
+        self._non_delayed_get(self._planner.search_by_image_url(image_url))
 
     def go_to_search_section(self, name):
         """
@@ -42,6 +188,7 @@ class BasicSearcher(BasicBrowser):
             * Assumes driver is in search results page
             * Also supports navigating to sections under 'More', Although we cannot extract results from them
             * Use of built-in constants for name is preferable
+            * Known sections are navigated to directly by url, others by following their link
 
         Args:
             name (Union[str, tuple]): Name of the section, use tuple for multiple tries
@@ -49,16 +196,7 @@ class BasicSearcher(BasicBrowser):
         Raises:
             NoSuchElement: If the section was not found
         """
-        possible_section_names = (name,) if not isinstance(name, tuple) else name
-        sections = self._find_elements_by_xpath(GoogleXpaths.SECTIONS_LINKS)
-
-        for section in sections:
-            for section_name in possible_section_names:
-                if section_name.lower() in section.text.lower():
-                    self._click_link(section)
-                    return
-
-        raise NoSuchElement(f'Section {name} not found')
+        self._follow(*self._section_target(name))
 
     def navigate_to_identical_images(self):
         """
@@ -67,14 +205,13 @@ class BasicSearcher(BasicBrowser):
         Notes:
             * Assumes driver is in a search results page for image url
             * Google might offer separation to size categories, we choose all sizes
+            * The page is navigated to directly by the searched image's token when the current url holds it,
+              otherwise by following its link
 
         Raises:
             NoSuchElement: If the option was not available for current search
         """
-        try:
-            self._click_link(self._find_element_by_xpath(GoogleXpaths.Search.ALL_SIZES_LINK))
-        except NoSuchElement:
-            raise NoSuchElement('There\'s no option for other sizes of image')
+        self._follow(*self._identical_images_target())
 
     def navigate_to_similar_images(self):
         """
@@ -86,10 +223,41 @@ class BasicSearcher(BasicBrowser):
         Raises:
             NoSuchElement: If the option was not available for current search
         """
-        try:
-            self._click_link(self._find_element_by_xpath(GoogleXpaths.Search.SIMILAR_IMAGES_LINK))
-        except NoSuchElement:
-            raise NoSuchElement('There\'s no option for visually similar images')
+        self._follow(*self._similar_images_target())
+
+    def _follow(self, route, target):
+        if route == Route.DIRECT:
+            self._get(target)
+        else:
+            self._click_link(target)
+        self.last_route = route
+
+    def find_identical_images(self, image_url, max_iterations: int = None, cache=None):
+        """
+        Searches an image and scans the results of identical images to it
+
+        Notes:
+            * Leaves driver in the image search results page, unless results were taken from cache
+
+        Args:
+            image_url (str): Image url to search
+            max_iterations (int): Limit for number of results, None for no artificial limit
+            cache (ResultCache): Cache to share results through, concurrent searches of the same image are done once
+
+        Returns:
+            list[ImageResult]:
+
+        Raises:
+            NoSuchElement: If the option was not available for the image
+        """
+        def find():
+            self.search_image(image_url)
+            self.navigate_to_identical_images()
+            return tuple(self.scan_image_results(max_iterations=max_iterations))
+
+        if cache is None:
+            return list(find())
+        return list(cache.get_or_compute(self._identical_images_key(image_url, max_iterations), find))
 
     def scan_search_results(self, max_iterations: int = 10):
         """
@@ -103,30 +271,21 @@ class BasicSearcher(BasicBrowser):
             max_iterations (int): Limit for number of results, None for no artificial limit
 
         Yields:
-            Selenium WebElements
+            SearchResult:
         """
-        counter = 0
+        position = 1
 
         # Loop on pages, iterates ceil(max_iterations/10) times, or infinite if specified so
-        for _ in itertools.islice(itertools.count(), 0, max_iterations, 10):
-            current_page_results = self._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS)
-
-            # Collect all results in page unless max_iterations limits that
-            num_of_results_from_page = min(10, max_iterations - counter)
-            for raw_result in current_page_results[:num_of_results_from_page]:
-                yield self._parse_search_result(raw_result)
-            counter += num_of_results_from_page
+        for _ in itertools.islice(itertools.count(), 0, max_iterations, SEARCH_RESULTS_PER_PAGE):
+            for result in self._scan_current_page(max_iterations, position):
+                yield result
+                position += 1
 
             # Navigating to the next page, or stopping if there isn't any
-            try:
-                self._click_link(self._find_element_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK))
-            except NoSuchElement:
+            next_page_link = self._next_page_link()
+            if next_page_link is None:
                 break
-
-    @staticmethod
-    def _parse_search_result(raw_result):
-        # Not implemented
-        return raw_result
+            self._click_link(next_page_link)
 
     def scan_image_results(self, max_iterations: int = None):
         """
@@ -146,13 +305,22 @@ class BasicSearcher(BasicBrowser):
 
     @staticmethod
     def _parse_image_results(script_text, max_iterations: int = None):
-        results_array_string = re.search(GoogleRegex.EXTRACT_IMAGE_RESULTS_FROM_JSON, script_text).group(0)
-        raw_results = json.loads(results_array_string)
-        if max_iterations is not None and len(raw_results) > max_iterations:
-            raw_results = raw_results[:max_iterations]
-
-        for raw_result in raw_results:
-            yield BasicSearcher._parse_image_result_metadata(raw_result)
+        # Results are decoded one by one, so that we only pay for the ones that are requested
+        prefix_index = script_text.find(GoogleRegex.IMAGE_RESULTS_JSON_PREFIX)
+        if prefix_index == -1:
+            raise NoSuchElement('Could not find image results in page\'s script')
+        raw_results = iter_json_array(script_text, prefix_index + len(GoogleRegex.IMAGE_RESULTS_JSON_PREFIX))
+        results = (BasicSearcher._parse_image_result_metadata(raw_result)
+                   for raw_result in itertools.islice(raw_results, 0, max_iterations))
+
+        num_of_results = 0
+        try:
+            for result in timed_iter(Stage.RESULTS_PARSE, results):
+                num_of_results += 1
+                yield result
+        finally:
+            increment(Counter.RESULTS, num_of_results)
+            observe(Observation.RESULTS_PER_PAGE, num_of_results)
 
     @staticmethod
     def _parse_image_result_metadata(result):
@@ -0,0 +1,122 @@
+import urllib.parse
+
+from selenium import webdriver
+
+# Google's logging endpoints, which are not needed for anything we scrape
+DEFAULT_BLOCKED_URL_PATTERNS = ('*/gen_204*', '*/client_204*', '*://*.doubleclick.net/*')
+DEFAULT_WINDOW_SIZE = (1280, 800)
+# Requests matching a blocked pattern are routed to a proxy address that refuses connections
+_BLACKHOLE_PROXY = 'PROXY 127.0.0.1:9'
+# Proxy auto-config keyword of each proxy scheme
+_PAC_PROXY_TYPES = {'http': 'PROXY', 'https': 'HTTPS', 'socks': 'SOCKS', 'socks4': 'SOCKS4', 'socks5': 'SOCKS5'}
+
+
+class PerformanceProfile(object):
+    """
+    Browser configuration that trades rendering fidelity for page-load time and memory
+
+    Notes:
+        * Scans of SeleniumSearcher do not rely on images being loaded, so they work with images blocked
+        * Url patterns are shell expressions (as in shExpMatch of proxy auto-config), f.e. '*://*.example.com/*'
+        * Urls are blocked by a proxy auto-config, which replaces the browser's proxy settings. A proxy that the
+          browser should send requests through (f.e. of its egress identity) must be given to the profile, rather
+          than set in the browser's options
+    """
+
+    def __init__(self, headless=True, block_images=True, block_fonts=True, block_media=True,
+                 blocked_url_patterns=DEFAULT_BLOCKED_URL_PATTERNS, disk_cache=False, window_size=DEFAULT_WINDOW_SIZE,
+                 proxy=None):
+        """
+        Args:
+            headless (bool): Whether to run the browser without a window
+            block_images (bool): Whether to avoid loading images
+            block_fonts (bool): Whether to avoid downloading web fonts
+            block_media (bool): Whether to avoid preloading and autoplaying audio and video
+            blocked_url_patterns (Iterable[str]): Requests to block by url
+            disk_cache (bool): Whether to keep the browser's disk cache enabled
+            window_size (tuple): Width and height of the viewport, None to maximize the window
+            proxy (str): Proxy to send requests that are not blocked through, as 'host:port' or
+                         'scheme://host:port' (http, https, socks, socks4 or socks5). None to send them directly
+        """
+        self.headless = headless
+        self.block_images = block_images
+        self.block_fonts = block_fonts
+        self.block_media = block_media
+        self.blocked_url_patterns = tuple(blocked_url_patterns)
+        self.disk_cache = disk_cache
+        self.window_size = window_size
+        self.proxy = proxy
+
+    def preferences(self):
+        """
+        Returns:
+            dict: Firefox preferences implementing the profile
+        """
+        preferences = {}
+        if self.block_images:
+            preferences['permissions.default.image'] = 2
+        if self.block_fonts:
+            preferences['gfx.downloadable_fonts.enabled'] = False
+            preferences['browser.display.use_document_fonts'] = 0
+        if self.block_media:
+            preferences['media.autoplay.default'] = 5  # Blocks both audible and inaudible autoplay
+            preferences['media.preload.default'] = 0
+            preferences['media.preload.auto'] = 0
+        if not self.disk_cache:
+            preferences['browser.cache.disk.enable'] = False
+        if self.blocked_url_patterns or self.proxy:
+            preferences['network.proxy.type'] = 2
+            preferences['network.proxy.autoconfig_url'] = 'data:text/javascript,' + urllib.parse.quote(
+                self.proxy_auto_config())
+            preferences['network.proxy.autoconfig_url.include_path'] = True  # Otherwise https paths are hidden
+        return preferences
+
+    def proxy_auto_config(self):
+        """
+        Returns:
+            str: Proxy auto-config script that blocks the profile's url patterns, and sends other requests through
+                 the profile's proxy
+        """
+        conditions = ' || '.join(f'shExpMatch(url, {pattern!r})' for pattern in self.blocked_url_patterns) or 'false'
+        return (f'function FindProxyForURL(url, host) {{ '
+                f'return ({conditions}) ? {_BLACKHOLE_PROXY!r} : {self._allowed_route()!r}; }}')
+
+    def _allowed_route(self):
+        # Proxy auto-config result for requests that are not blocked
+        if not self.proxy:
+            return 'DIRECT'
+        scheme, _, address = self.proxy.rpartition('://')
+        proxy_type = _PAC_PROXY_TYPES.get(scheme or 'http')
+        if proxy_type is None:
+            raise ValueError(f'Unsupported proxy scheme "{scheme}"')
+        return f'{proxy_type} {address.rstrip("/")}'
+
+    def firefox_options(self, options=None):
+        """
+        Applies the profile to Firefox options
+
+        Args:
+            options (selenium.webdriver.FirefoxOptions): Options to extend, by default new options are created
+
+        Returns:
+            selenium.webdriver.FirefoxOptions:
+
+        Raises:
+            ValueError: If the options set a proxy, which blocking urls would override. Give it to the profile instead
+        """
+        options = options or webdriver.FirefoxOptions()
+        preferences = self.preferences()
+        if 'network.proxy.type' in preferences and getattr(options, 'proxy', None) is not None:
+            raise ValueError('Urls are blocked through proxy auto-config, pass the proxy to the profile instead')
+        if self.headless:
+            options.add_argument('-headless')
+        if self.window_size:
+            width, height = self.window_size
+            options.add_argument(f'--width={width}')
+            options.add_argument(f'--height={height}')
+        for name, value in preferences.items():
+            options.set_preference(name, value)
+        return options
+
+
+LEAN_PROFILE = PerformanceProfile()
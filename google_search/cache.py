@@ -0,0 +1,152 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+
+from .page import Page
+
+DEFAULT_TTL = 24 * 60 * 60  # Seconds
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024  # Bytes, of compressed bodies
+# Headers that change the page Google returns, and therefore take part in the cache key
+KEY_HEADERS = ('user-agent', 'accept-language')
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of fetched pages, with per-entry TTL and LRU eviction by total size
+
+    Notes:
+        * Bodies are stored zlib-compressed in an SQLite database, which may be shared by several processes
+        * Keys are built from the normalized url and the headers in KEY_HEADERS, cookies are ignored
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        """
+        Args:
+            path (str): Path of the database file, created if needed
+            ttl (float): Default time to live of an entry, in seconds
+            max_size (int): Limit of the total size of stored bodies, in bytes
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._local = threading.local()  # SQLite connections can not be shared between threads
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                               'key TEXT PRIMARY KEY, url TEXT, body BLOB, encoding TEXT, size INTEGER, '
+                               'expires REAL, last_access REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection = self._local.connection = _Transaction(connection)
+        return connection
+
+    @staticmethod
+    def key(url, headers=None):
+        """
+        Builds the cache key of a request
+
+        Args:
+            url (str): Absolute url of the request
+            headers (dict): Headers of the request
+
+        Returns:
+            str:
+        """
+        parsed_url = urllib.parse.urlsplit(url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed_url.query, keep_blank_values=True)))
+        normalized_url = urllib.parse.urlunsplit((parsed_url.scheme.lower(), parsed_url.netloc.lower(),
+                                                  parsed_url.path or '/', query, ''))
+
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        key_headers = '\n'.join(f'{name}:{headers.get(name, "")}' for name in KEY_HEADERS)
+        return hashlib.sha256(f'{normalized_url}\n{key_headers}'.encode()).hexdigest()
+
+    def get(self, url, headers=None):
+        """
+        Args:
+            url (str): Absolute url of the request
+            headers (dict): Headers of the request
+
+        Returns:
+            Page: Cached page, None if it is not cached or expired
+        """
+        key = self.key(url, headers)
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute('SELECT url, body, encoding FROM responses WHERE key = ? AND expires > ?',
+                                     (key, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+
+        url, body, encoding = row
+        return Page(url, zlib.decompress(body), encoding)
+
+    def set(self, url, page, headers=None, ttl=None):
+        """
+        Stores a page, evicting least recently used pages if the cache exceeds its size
+
+        Args:
+            url (str): Absolute url of the request
+            page (Page): Retrieved page, its url may differ from the request's url due to redirects
+            headers (dict): Headers of the request
+            ttl (float): Time to live of the entry in seconds, by default the cache's ttl
+        """
+        body = zlib.compress(page.content)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (self.key(url, headers), page.url, body, page.encoding, len(body), expires, now))
+            connection.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+            self._evict(connection)
+
+    def _evict(self, connection):
+        total_size, = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if total_size <= self.max_size:
+            return
+
+        excess = total_size - self.max_size
+        for key, size in connection.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall():
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM responses')
+
+
+class _Transaction(object):
+    """
+    Wraps an SQLite connection in autocommit mode, so that using it as a context manager runs an immediate
+    (write-locked) transaction. This keeps read-modify-write sequences atomic across processes
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._depth = 0
+
+    def __enter__(self):
+        if not self._depth:
+            self._connection.execute('BEGIN IMMEDIATE')
+        self._depth += 1
+        return self._connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._depth -= 1
+        if not self._depth:
+            self._connection.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,303 @@
+"""
+Command line interface for running bulk searches
+
+Reads one query (or image url) per line, runs them across concurrent workers and streams the results as JSON lines
+
+Examples:
+    google-search image_urls.txt --workers 8 --rate 5 --output results.jsonl --checkpoint done.txt
+    cat queries.txt | google-search --mode search --max-results 30 > results.jsonl
+    google-search image_urls.txt --backend selenium --executable-path /usr/bin/geckodriver --headless
+"""
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+
+from .const import IMAGES_SECTION, WEBDRIVER_PATH
+from .metrics import Metrics, set_default_tracer
+from .rate_limit import RateLimiter
+from .session import create_session
+from .throttle import AdaptiveThrottle
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 1000  # Queries read ahead, and results waiting to be written, at most
+DEFAULT_MAX_RESULTS = 100  # Per query
+
+_DONE = object()  # Marks that all results of a query were queued
+_FAILED = object()  # Marks that a query failed, its results (if any were queued) are incomplete
+_STOP = object()  # Marks the end of the input for a worker
+
+
+def identical_images(searcher, image_url, max_results):
+    searcher.search_image(image_url)
+    searcher.navigate_to_identical_images()
+    return searcher.scan_image_results(max_results)
+
+
+def search(searcher, text, max_results):
+    searcher.search(text)
+    return searcher.scan_search_results(max_results)
+
+
+def images(searcher, text, max_results):
+    searcher.search(text, section=IMAGES_SECTION)
+    return searcher.scan_image_results(max_results)
+
+
+# Job of each mode, given a searcher, a line of input and a limit of results. Returns an iterable of results
+MODES = {
+    'identical-images': identical_images,
+    'search': search,
+    'images': images,
+}
+
+
+class Checkpoint(object):
+    """
+    File of completed inputs, one per line. A query is only recorded once all of its results were written, so that a
+    job that stopped can be resumed by skipping the recorded ones
+
+    Notes:
+        * Results of queries that were running when a job stopped are written again when it is resumed
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the file, None to keep no checkpoint
+        """
+        self._file = None
+        self.completed = set()
+        if path is None:
+            return
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.completed = {line.rstrip('\n') for line in f if line.endswith('\n')}
+        except FileNotFoundError:
+            pass
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, line):
+        return line in self.completed
+
+    def record(self, line):
+        if self._file:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class Job(object):
+    """
+    Runs queries across worker threads, each with its own searcher
+
+    Notes:
+        * Input is read as it is consumed and results are written as they arrive, both through bounded queues, so
+          memory does not grow with the size of the input
+        * Results of different queries are interleaved in the output, each line names its query
+    """
+
+    def __init__(self, searcher_factory, mode, workers=DEFAULT_WORKERS, max_results=DEFAULT_MAX_RESULTS,
+                 queue_size=DEFAULT_QUEUE_SIZE, checkpoint=None):
+        """
+        Args:
+            searcher_factory (Callable): Creates a searcher for a worker, without arguments
+            mode (str): Kind of search to run for each line of input, see MODES
+            workers (int): Number of queries to run concurrently
+            max_results (int): Limit for number of results of each query, None for no artificial limit
+            queue_size (int): Maximal number of queries read ahead and of results waiting to be written
+            checkpoint (Checkpoint): Completed queries, which are skipped, and where newly completed ones are recorded
+        """
+        self._searcher_factory = searcher_factory
+        self._job = MODES[mode]
+        self._workers = workers
+        self._max_results = max_results
+        self._checkpoint = checkpoint or Checkpoint(None)
+        self._inputs = queue.Queue(maxsize=queue_size)
+        self._outputs = queue.Queue(maxsize=queue_size)
+
+        self._read_error = None
+
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.results = 0
+
+    def run(self, lines, output):
+        """
+        Args:
+            lines (Iterable[str]): Queries, blank lines and lines completed according to the checkpoint are skipped
+            output (TextIO): Where JSON lines of results are written
+
+        Raises:
+            Exception: Error of reading the input, once the queries read before it were run
+        """
+        threads = [threading.Thread(target=self._read, args=(lines,), daemon=True)]
+        threads += [threading.Thread(target=self._work, daemon=True) for _ in range(self._workers)]
+        for thread in threads:
+            thread.start()
+
+        self._write(output)
+        for thread in threads:
+            thread.join()
+        if self._read_error is not None:
+            raise self._read_error
+
+    def _read(self, lines):
+        # Workers are stopped even if the input fails (f.e. a line that cannot be decoded), so that the job ends
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                if line in self._checkpoint:
+                    self.skipped += 1
+                    continue
+                self._inputs.put(line)
+        except Exception as e:
+            self._read_error = e
+        finally:
+            for _ in range(self._workers):
+                self._inputs.put(_STOP)
+
+    def _work(self):
+        try:
+            try:
+                searcher = self._searcher_factory()
+            except Exception:
+                logging.exception('Could not start a searcher')
+                self._run_queries(None)
+                return
+
+            with searcher:
+                self._run_queries(searcher)
+        finally:
+            self._outputs.put((None, _STOP))
+
+    def _run_queries(self, searcher):
+        # Until the input ends. Without a searcher, every query fails
+        while True:
+            line = self._inputs.get()
+            if line is _STOP:
+                break
+            if searcher is None:
+                self._outputs.put((line, _FAILED))
+                continue
+
+            try:
+                for result in self._job(searcher, line, self._max_results):
+                    self._outputs.put((line, result))
+            except Exception as e:
+                logging.warning(f'Query "{line}" failed: {e!r}')
+                self._outputs.put((line, _FAILED))
+            else:
+                self._outputs.put((line, _DONE))
+
+    def _write(self, output):
+        running_workers = self._workers
+        while running_workers:
+            line, item = self._outputs.get()
+            if item is _STOP:
+                running_workers -= 1
+            elif item is _DONE:
+                # Results must be written before the query is recorded as completed
+                output.flush()
+                self._checkpoint.record(line)
+                self.completed += 1
+            elif item is _FAILED:
+                self.failed += 1
+            else:
+                output.write(json.dumps({'query': line, 'type': type(item).__name__, **item.as_dict()},
+                                        ensure_ascii=False) + '\n')
+                self.results += 1
+
+
+def searcher_factory(args):
+    """
+    Returns:
+        Callable: Creates a searcher for a worker, according to the command line arguments
+    """
+    rate_limiter = RateLimiter(rate=args.rate, burst=args.workers) if args.rate else None
+    throttle = AdaptiveThrottle(max_concurrency=args.workers) if args.adaptive else None
+
+    if args.backend == 'selenium':
+        # Selenium is only needed (and imported) for this backend
+        from .browser_profile import LEAN_PROFILE
+        from .selenium_searcher import SeleniumSearcher
+
+        return lambda: SeleniumSearcher(rate_limiter=rate_limiter, executable_path=args.executable_path,
+                                        profile=LEAN_PROFILE if args.headless else None)
+
+    from .searcher import Searcher
+    session = create_session(pool_maxsize=args.workers, http2=args.http2)
+    return lambda: Searcher(rate_limiter=rate_limiter, throttle=throttle, session=session, base_url=args.base_url,
+                            streaming=args.streaming)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='google-search', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', nargs='?', default='-', help='file of queries, one per line ("-" for stdin)')
+    parser.add_argument('--mode', choices=sorted(MODES), default='identical-images',
+                        help='identical images of image urls, standard results or image results of text queries')
+    parser.add_argument('--output', '-o', default='-', help='file to append JSON lines of results to ("-" for stdout)')
+    parser.add_argument('--checkpoint', help='file of completed queries, to resume a job that stopped')
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS, help='queries to run concurrently')
+    parser.add_argument('--max-results', type=int, default=DEFAULT_MAX_RESULTS,
+                        help='limit of results per query, 0 for no limit')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='queries read ahead, and results waiting to be written, at most')
+    parser.add_argument('--rate', type=float,
+                        help='requests per second, shared by all workers. By default each worker waits randomly')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='pace requests according to how Google responds, backing off when blocked (http backend)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='parse pages while downloading and stop once their results were read (http backend)')
+    parser.add_argument('--http2', action='store_true',
+                        help='multiplex requests over HTTP/2, requires httpx[http2] (http backend)')
+    parser.add_argument('--backend', choices=('http', 'selenium'), default='http')
+    parser.add_argument('--base-url', help='server to search in instead of Google (http backend)')
+    parser.add_argument('--executable-path', default=WEBDRIVER_PATH, help='webdriver (selenium backend)')
+    parser.add_argument('--headless', action='store_true', help='run lean headless browsers (selenium backend)')
+    parser.add_argument('--metrics', help='file to write metrics of the job to, as JSON')
+    parser.add_argument('--verbose', '-v', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    metrics = Metrics() if args.metrics else None
+    set_default_tracer(metrics)  # Workers run in threads of their own, so they are traced through the default
+    checkpoint = Checkpoint(args.checkpoint)
+    job = Job(searcher_factory(args), args.mode, workers=args.workers, max_results=args.max_results or None,
+              queue_size=args.queue_size, checkpoint=checkpoint)
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    try:
+        job.run(input_file, output_file)
+    finally:
+        checkpoint.close()
+        for f in (input_file, output_file):
+            if f not in (sys.stdin, sys.stdout):
+                f.close()
+        set_default_tracer(None)
+
+    if metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(metrics.to_json(indent=2))
+    logging.info(f'{job.completed} queries completed, {job.failed} failed, {job.skipped} skipped (checkpoint), '
+                 f'{job.results} results')
+    return 1 if job.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
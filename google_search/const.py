@@ -6,6 +6,8 @@ WEBDRIVER_PATH = r'C:\OtherPrograms\geckodriver.exe'  # Be sure to install Gecko
 GOOGLE_URL = 'https://www.google.com'
 GOOGLE_SEARCH_URL = f'{GOOGLE_URL}/search?q={{text}}'
 GOOGLE_IMAGE_URL_SEARCH_URL = f'{GOOGLE_URL}/searchbyimage?image_url={{image_url}}'
+SEARCH_RESULTS_PER_PAGE = 10
+CONSENT_HOST = 'consent.google.com'
 NON_BOT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36'
 
 IMAGES_SECTION = ('Images', 'תמונות')
@@ -30,14 +32,22 @@ class GoogleXpaths:
         RESULTS_DIVS = '//*[@id="rso"]/div[contains(@class, "g")]'  # Does not cover Google News results
         NEWS_RESULTS_DIVS = '//*[@id="rso"]//g-card'
         NEXT_PAGE_LINK = '//*[@id="pnnext"]'
+        PAGES_LINKS = f'{NEXT_PAGE_LINK} | //*[@id="foot"]//a[contains(@href, "start=")]'  # Following pages included
+        FOOTER_ID = 'foot'  # Follows the results and the link to the next page, the rest of the page is not needed
 
         class Result:
-            pass  # add Xpaths for parsing standard search results
+            TITLE_RELATIVE = './/h3'
+            LINK_RELATIVE = './/a[.//h3]'
+            SITE_RELATIVE = './/cite'
+            SNIPPET_RELATIVE = './/div[contains(@class, "VwiC3b")]'  # Weak xpath, depends on class name
 
     class ImageSearch:
         RESULTS_DIVS = '//*[@id="islrg"]/div[1]/div'
         OPENED_RESULT_DIV = '//*[@id="islsp"]'  # Only relevant if result was opened
-        RESULTS_JSON = '''//*[@id="yDmH0d"]/script[starts-with(text(), "AF_initDataCallback({key: 'ds:1'")]'''
+        SHOW_MORE_BUTTON = '//input[@type="button" and contains(@class, "mye4qd")]'  # Weak xpath, depends on class
+        END_OF_RESULTS = '//div[contains(@class, "Yu2Dnd")]'  # Displayed once all results were loaded, weak xpath
+        RESULTS_JSON_SCRIPT_PREFIX = "AF_initDataCallback({key: 'ds:1'"
+        RESULTS_JSON = f'//*[@id="yDmH0d"]/script[starts-with(text(), "{RESULTS_JSON_SCRIPT_PREFIX}")]'
 
         class Result:
             IMAGE_LINK_RELATIVE = './/a[1]'
@@ -56,9 +66,13 @@ class GoogleXpaths:
             SITE_RELATIVE = f'{_DISPLAYED_PANEL_RELATIVE}//div[contains(@class, "S4aXnb")]'
             TITLE_RELATIVE = f'{_DISPLAYED_PANEL_RELATIVE}//div[contains(@class, "eYbsle")]'
 
+    class Consent:
+        ACCEPT_BUTTON = '//form[contains(@action, "consent")]//button'  # The last one accepts all cookies
+
 
 class GoogleRegex:
     EXTRACT_URL_VALUE = r'(?<=[?&]{key}=)[^&]*(?=&)'  # Invalid as regex by itself
     URL_VALUE_FROM_URL = EXTRACT_URL_VALUE.format(key='url')
     IMGURL_VALUE_FROM_URL = EXTRACT_URL_VALUE.format(key='imgurl')
     EXTRACT_IMAGE_RESULTS_FROM_JSON = r'(?<=\["GRID_STATE0",null,)\[.*\](?=,"","","",)'
+    IMAGE_RESULTS_JSON_PREFIX = '["GRID_STATE0",null,'  # Not a regex, precedes the array of image results
@@ -0,0 +1,239 @@
+import contextlib
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from .selenium_searcher import SeleniumSearcher
+
+DEFAULT_MAX_SIZE = 4
+DEFAULT_MAX_USES = 100  # Checkouts before a browser is replaced, to bound memory growth of long running browsers
+DEFAULT_IDLE_TIMEOUT = 5 * 60  # Seconds
+
+
+class SeleniumSearcherPool(contextlib.AbstractContextManager):
+    """
+    Pool of started and warmed-up SeleniumSearchers, to avoid launching a browser per job
+
+    Notes:
+        * Borrowed searchers must be returned to the pool rather than closed, preferably through borrow()
+        * A searcher is replaced after max_uses checkouts, when it fails a health check on checkout, or when the job
+          that borrowed it failed with a WebDriverException
+        * Idle searchers are quit after idle_timeout, down to min_size, by a timer while the pool is not used
+
+    Examples:
+        with SeleniumSearcherPool(max_size=2, executable_path=WEBDRIVER_PATH) as pool:
+            with pool.borrow() as s:
+                s.search('google')
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, min_size=0, max_uses=DEFAULT_MAX_USES,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, searcher_factory=SeleniumSearcher, **searcher_options):
+        """
+        Args:
+            max_size (int): Maximal number of searchers, checked out ones included
+            min_size (int): Number of searchers started in advance and kept even when idle
+            max_uses (int): Number of checkouts after which a searcher is replaced, None for no limit
+            idle_timeout (float): Seconds after which an idle searcher is quit, None for no limit
+            searcher_factory (Callable): Creates a started searcher, given searcher_options
+            **searcher_options: Options for new searchers, see SeleniumSearcher
+        """
+        self.max_size = max_size
+        self.min_size = min_size
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self._searcher_factory = searcher_factory
+        self._searcher_options = searcher_options
+
+        self._condition = threading.Condition()
+        self._idle = []  # Searchers available for checkout, most recently returned last
+        self._uses = {}  # id(searcher) -> number of checkouts
+        self._last_returned = {}  # id(searcher) -> time.monotonic() of last checkin
+        self._size = 0
+        self._closed = False
+        self._eviction_timer = None  # Pending while there are idle searchers that may be evicted
+
+        for _ in range(min_size):
+            searcher = self._create()
+            self._idle.append(searcher)
+            self._last_returned[id(searcher)] = time.monotonic()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def checkout(self, timeout=None):
+        """
+        Takes a searcher from the pool, starting one if none is idle and the pool is not full
+
+        Args:
+            timeout (float): Seconds to wait for a searcher if the pool is full, None to wait as long as needed
+
+        Returns:
+            SeleniumSearcher:
+
+        Raises:
+            TimeoutError: If no searcher became available in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError('Pool is closed')
+                self._evict_idle()
+
+                searcher = self._idle.pop() if self._idle else None
+                if searcher is None:
+                    if self._size >= self.max_size:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError('No searcher became available in time')
+                        self._condition.wait(remaining)
+                        continue
+                    self._size += 1  # Reserves a place for the searcher we are about to start
+
+            if searcher is None:
+                try:
+                    searcher = self._start_searcher()
+                except BaseException:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(searcher):
+                self._discard(searcher)
+                continue
+
+            with self._condition:
+                self._uses[id(searcher)] = self._uses.get(id(searcher), 0) + 1
+            return searcher
+
+    def checkin(self, searcher, discard=False):
+        """
+        Returns a searcher to the pool
+
+        Args:
+            searcher (SeleniumSearcher): Searcher that was checked out of this pool
+            discard (bool): Whether to quit the searcher instead of reusing it, f.e. after it crashed
+        """
+        with self._condition:
+            worn_out = self.max_uses is not None and self._uses.get(id(searcher), 0) >= self.max_uses
+            if not (discard or worn_out or self._closed):
+                self._idle.append(searcher)
+                self._last_returned[id(searcher)] = time.monotonic()
+                self._condition.notify()
+                self._evict_idle()
+                self._schedule_eviction()
+                return
+
+        self._discard(searcher)
+
+    @contextlib.contextmanager
+    def borrow(self, timeout=None):
+        """
+        Checks out a searcher for the duration of the context. It is discarded if the context fails on a WebDriver error
+
+        Args:
+            timeout (float): See checkout()
+
+        Yields:
+            SeleniumSearcher:
+        """
+        searcher = self.checkout(timeout)
+        try:
+            yield searcher
+        except WebDriverException:
+            self.checkin(searcher, discard=True)
+            raise
+        except BaseException:
+            self.checkin(searcher)
+            raise
+        else:
+            self.checkin(searcher)
+
+    def close(self):
+        """
+        Quits idle searchers. Searchers that are checked out are quit when they are returned
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            if self._eviction_timer is not None:
+                self._eviction_timer.cancel()
+                self._eviction_timer = None
+            self._condition.notify_all()
+
+        for searcher in idle:
+            self._discard(searcher)
+
+    def _create(self):
+        with self._condition:
+            self._size += 1
+        try:
+            return self._start_searcher()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+            raise
+
+    def _start_searcher(self):
+        # SeleniumSearcher loads Google's homepage when started, so the searcher is already warm
+        return self._searcher_factory(**self._searcher_options)
+
+    @staticmethod
+    def _is_healthy(searcher):
+        try:
+            return searcher._is_alive()
+        except Exception:
+            return False
+
+    def _evict_idle(self):
+        # Must be called with the condition acquired
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        while len(self._idle) > 0 and self._size > self.min_size:
+            oldest = self._idle[0]
+            if now - self._last_returned[id(oldest)] < self.idle_timeout:
+                break
+            self._idle.pop(0)
+            self._size -= 1
+            self._forget(oldest)
+            threading.Thread(target=self._quit, args=(oldest,), daemon=True).start()  # Quitting takes a while
+
+    def _schedule_eviction(self):
+        # Must be called with the condition acquired. Evicts idle searchers once the oldest of them times out, so
+        # that they are quit even if no one checks out
+        if self.idle_timeout is None or self._eviction_timer is not None:
+            return
+        if len(self._idle) == 0 or self._size <= self.min_size:
+            return
+        delay = self._last_returned[id(self._idle[0])] + self.idle_timeout - time.monotonic()
+        self._eviction_timer = threading.Timer(max(0.0, delay), self._evict_on_timer)
+        self._eviction_timer.daemon = True
+        self._eviction_timer.start()
+
+    def _evict_on_timer(self):
+        with self._condition:
+            self._eviction_timer = None
+            if self._closed:
+                return
+            self._evict_idle()
+            self._schedule_eviction()
+
+    def _discard(self, searcher):
+        self._quit(searcher)
+        with self._condition:
+            self._size -= 1
+            self._forget(searcher)
+            self._condition.notify()
+
+    def _forget(self, searcher):
+        self._uses.pop(id(searcher), None)
+        self._last_returned.pop(id(searcher), None)
+
+    @staticmethod
+    def _quit(searcher):
+        try:
+            searcher._quit()
+        except Exception:
+            pass  # Crashed browsers might fail to quit
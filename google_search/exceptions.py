@@ -1,2 +1,20 @@
 class NoSuchElement(RuntimeError):
     pass
+
+
+class Blocked(RuntimeError):
+    def __init__(self, reason, url=None):
+        super().__init__(f'Google refused to serve {url or "page"}: {reason}')
+        self.reason = reason
+        self.url = url
+
+
+class CircuitOpen(Blocked):
+    # Requests of an egress identity are suspended after repeated blocks, see throttle.AdaptiveThrottle
+    def __init__(self, identity, reason, retry_after):
+        RuntimeError.__init__(self, f'Requests through {identity or "the default identity"} are suspended for '
+                                    f'{retry_after:.0f} more seconds after repeated blocks ({reason})')
+        self.reason = reason
+        self.url = None
+        self.identity = identity
+        self.retry_after = retry_after
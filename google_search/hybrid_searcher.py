@@ -0,0 +1,77 @@
+import itertools
+
+from requests.cookies import create_cookie
+
+from .exceptions import Blocked
+from .searcher import Searcher
+from .throttle import BlockReason, detect_block
+
+MAX_SESSION_REFRESHES = 1  # Per request
+
+
+class HybridSearcher(Searcher):
+    """
+    HybridSearcher fetches pages over plain HTTP like Searcher, using a session established by a real browser.
+    When Google refuses to serve a page, the session is refreshed through the browser and the request is retried
+
+    Notes:
+        * The browser is borrowed from a SeleniumSearcherPool only while establishing the session
+        * Browsers can clear cookie consent, but not a captcha. Refreshing a session after a captcha only helps if
+          the browser is trusted more than our session (f.e. it holds older cookies)
+        * With a throttle, the session is only refreshed once the throttle gave up on retrying a request
+    """
+
+    def __init__(self, pool, max_refreshes=MAX_SESSION_REFRESHES, **options):
+        """
+        Args:
+            pool (SeleniumSearcherPool): Pool to borrow a browser from to establish sessions
+            max_refreshes (int): Number of times to refresh the session and retry a blocked request
+            **options: See Searcher
+        """
+        super().__init__(**options)
+        self._pool = pool
+        self._max_refreshes = max_refreshes
+        self._request_headers = dict(self._request_headers)  # Overridden by the browser's headers
+
+        self.refresh_session()
+
+    def refresh_session(self, url=None):
+        """
+        Establishes a session in a browser and adopts its cookies and headers
+
+        Args:
+            url (str): Page to establish the session with, Google's homepage (at the searcher's base url) by default
+
+        Raises:
+            Blocked: If the browser was not served either
+        """
+        url = url or self._planner.base_url
+        with self._pool.borrow() as browser:
+            browser._non_delayed_get(url)
+            browser.accept_consent()
+
+            reason = detect_block(200, browser._current_url(), b'')
+            if reason:
+                raise Blocked(reason, url)
+
+            for cookie in browser._get_cookies():
+                self._session.cookies.set_cookie(create_cookie(name=cookie['name'],
+                                                               value=cookie['value'],
+                                                               domain=cookie.get('domain', ''),
+                                                               path=cookie.get('path', '/'),
+                                                               secure=cookie.get('secure', False),
+                                                               expires=cookie.get('expiry')))
+            self._request_headers['user-agent'] = browser._get_user_agent()
+
+    def _fetch(self, url, reader=None):
+        # Each attempt is paced (and retried while throttled) by the throttle, if there is one
+        for refreshes in itertools.count():
+            response, reason = self._throttled_request(url, reader)
+            if reason is None:
+                response.raise_for_status()
+                return response
+
+            # A browser can not help when we simply send too many requests
+            if refreshes >= self._max_refreshes or reason == BlockReason.RATE_LIMITED:
+                raise Blocked(reason, url)
+            self.refresh_session(url)
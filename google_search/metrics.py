@@ -0,0 +1,353 @@
+"""
+Instrumentation of the stages of a search: waiting, downloading, building the tree, xpath lookups and parsing results
+
+Examples:
+    metrics = Metrics()
+    with tracing(metrics):
+        with Searcher() as searcher:
+            searcher.search('cats')
+            results = list(searcher.scan_search_results())
+    print(metrics.to_prometheus())
+
+Notes:
+    * Instrumentation only records anything while a tracer is active, either for the current context (tracing())
+      or for the whole process (set_default_tracer()). Otherwise it costs a context variable lookup per stage
+    * A context is inherited by asyncio tasks, but not by threads. Searcher passes it on to its prefetching threads,
+      other threads should be run with contextvars.copy_context().run(), or use a default tracer
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import json
+import math
+import threading
+import time
+
+
+class Stage(object):
+    WAIT = 'wait'  # Artificial delay or rate limiter, before a request
+    NETWORK = 'network'  # Request, until the response is downloaded (and parsed along, when streamed)
+    HTML_PARSE = 'html_parse'  # Building the tree of a page (html.fromstring)
+    XPATH = 'xpath'  # Xpath lookups in a page
+    RESULTS_PARSE = 'results_parse'  # Extracting results from elements and scripts
+
+
+class Counter(object):
+    QUERIES = 'queries'  # Searches started
+    PAGES = 'pages'  # Pages navigated to
+    REQUESTS = 'requests'  # Pages downloaded, rather than served from cache
+    BYTES_DOWNLOADED = 'bytes_downloaded'  # Size of the downloaded bodies, decompressed
+    WIRE_BYTES = 'wire_bytes'  # Size of the downloaded bodies as received over the network, f.e. compressed
+    RESULTS = 'results'  # Results parsed
+    BLOCKED = 'blocked'  # Responses in which Google refused to serve a page, see throttle
+    RETRIES = 'retries'  # Requests sent again after a block
+    EARLY_CLOSES = 'early_closes'  # Downloads stopped once the needed part of the page was read, see streaming
+
+
+class Observation(object):
+    RESULTS_PER_PAGE = 'results_per_page'  # Results scanned from a page, once the scan of the page ends
+    PAGE_BYTES = 'page_bytes'  # Size of each downloaded body
+
+
+# Upper bounds of the buckets of stage durations, in seconds
+DURATION_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10)
+PROMETHEUS_PREFIX = 'google_search'
+
+_context_tracer = contextvars.ContextVar('google_search_tracer', default=None)
+_default_tracer = None
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Tracer(object):
+    """
+    Receives the events of instrumentation. Subclass it and override the methods to hook into the events, f.e. to
+    forward them to another metrics system. See Metrics for a tracer that aggregates them
+
+    Notes:
+        * Methods may be called from several threads at once
+    """
+
+    def stage(self, name, seconds):
+        """
+        Args:
+            name (str): Stage that ended, see Stage
+            seconds (float): Duration of the stage
+        """
+        pass
+
+    def increment(self, name, amount=1):
+        """
+        Args:
+            name (str): Counter, see Counter
+            amount (int):
+        """
+        pass
+
+    def observe(self, name, value):
+        """
+        Args:
+            name (str): Observed quantity, see Observation
+            value (float):
+        """
+        pass
+
+
+class _Summary(object):
+    __slots__ = ('count', 'sum', 'min', 'max', 'buckets')
+
+    def __init__(self, buckets=None):
+        self.count = 0
+        self.sum = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = [0] * len(buckets) if buckets is not None else None
+
+    def add(self, value, bounds=None):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.buckets is not None:
+            index = bisect.bisect_left(bounds, value)
+            if index < len(self.buckets):
+                self.buckets[index] += 1
+
+    def snapshot(self, bounds=None):
+        snapshot = {'count': self.count, 'sum': self.sum,
+                    'min': self.min if self.count else None, 'max': self.max if self.count else None}
+        if self.buckets is not None:
+            # Cumulative, as in Prometheus histograms
+            snapshot['buckets'] = {str(bound): count for bound, count in zip(bounds, _accumulate(self.buckets))}
+        return snapshot
+
+
+def _accumulate(values):
+    total = 0
+    for value in values:
+        total += value
+        yield total
+
+
+class Metrics(Tracer):
+    """
+    Tracer that aggregates events: durations of stages into histograms, counters into totals and observations into
+    summaries. Aggregates can be exported as JSON or in Prometheus text format
+    """
+
+    def __init__(self, duration_buckets=DURATION_BUCKETS):
+        """
+        Args:
+            duration_buckets (tuple[float]): Upper bounds of the buckets of stage durations, in seconds
+        """
+        self._duration_buckets = tuple(duration_buckets)
+        self._stages = {}
+        self._counters = {}
+        self._observations = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, seconds):
+        with self._lock:
+            summary = self._stages.get(name)
+            if summary is None:
+                summary = self._stages[name] = _Summary(self._duration_buckets)
+            summary.add(seconds, self._duration_buckets)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        with self._lock:
+            summary = self._observations.get(name)
+            if summary is None:
+                summary = self._observations[name] = _Summary()
+            summary.add(value)
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._observations.clear()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Stages (count, sum, min and max of durations, cumulative buckets), counters and observations
+                  (count, sum, min, max), with pages_per_query derived from the counters
+        """
+        with self._lock:
+            snapshot = {'stages': {name: summary.snapshot(self._duration_buckets)
+                                   for name, summary in self._stages.items()},
+                        'counters': dict(self._counters),
+                        'observations': {name: summary.snapshot() for name, summary in self._observations.items()}}
+
+        queries = snapshot['counters'].get(Counter.QUERIES)
+        if queries:
+            snapshot['pages_per_query'] = snapshot['counters'].get(Counter.PAGES, 0) / queries
+        return snapshot
+
+    def to_json(self, **json_options):
+        return json.dumps(self.snapshot(), **json_options)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        Args:
+            prefix (str): Prefix of the names of the metrics
+
+        Returns:
+            str: Metrics in Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        if snapshot['stages']:
+            name = f'{prefix}_stage_duration_seconds'
+            lines += [f'# HELP {name} Duration of search stages', f'# TYPE {name} histogram']
+            for stage, summary in sorted(snapshot['stages'].items()):
+                for bound, count in summary['buckets'].items():
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {summary["count"]}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {summary["sum"]}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {summary["count"]}')
+
+        for counter, value in sorted(snapshot['counters'].items()):
+            name = f'{prefix}_{counter}_total'
+            lines += [f'# TYPE {name} counter', f'{name} {value}']
+
+        for observation, summary in sorted(snapshot['observations'].items()):
+            name = f'{prefix}_{observation}'
+            lines += [f'# TYPE {name} summary', f'{name}_sum {summary["sum"]}', f'{name}_count {summary["count"]}']
+
+        return '\n'.join(lines) + '\n'
+
+
+class _StageTimer(object):
+    __slots__ = ('_tracer', '_name', '_start')
+
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._tracer.stage(self._name, time.perf_counter() - self._start)
+
+
+@contextlib.contextmanager
+def tracing(tracer):
+    """
+    Activates a tracer for the current context (thread or asyncio task) and the tasks it starts
+
+    Args:
+        tracer (Tracer):
+    """
+    token = _context_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _context_tracer.reset(token)
+
+
+def set_default_tracer(tracer):
+    """
+    Activates a tracer for every context that has none of its own, in all threads
+
+    Args:
+        tracer (Tracer): None to deactivate the default tracer
+    """
+    global _default_tracer
+    _default_tracer = tracer
+
+
+def current_tracer():
+    """
+    Returns:
+        Tracer: Tracer of the current context, or the default one. None if instrumentation is disabled
+    """
+    tracer = _context_tracer.get()
+    return _default_tracer if tracer is None else tracer
+
+
+def timed(name):
+    """
+    Times a stage, when a tracer is active
+
+    Examples:
+        with timed(Stage.NETWORK):
+            response = session.get(url)
+
+    Args:
+        name (str): Stage, see Stage
+    """
+    tracer = current_tracer()
+    if tracer is None:
+        return _NULL_TIMER
+    return _StageTimer(tracer, name)
+
+
+def timed_calls(name):
+    """
+    Decorator that times each call of a function as a stage, when a tracer is active
+
+    Examples:
+        @timed_calls(Stage.RESULTS_PARSE)
+        def parse(raw_result):
+            ...
+
+    Args:
+        name (str): Stage, see Stage
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def inner(*args, **kwargs):
+            with timed(name):
+                return function(*args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+def timed_iter(name, iterable):
+    """
+    Times the production of each item of an iterable as a stage, when a tracer is active. The time the consumer
+    spends between items is not included
+
+    Args:
+        name (str): Stage, see Stage
+        iterable:
+
+    Returns:
+        iterator:
+    """
+    tracer = current_tracer()
+    if tracer is None:
+        return iter(iterable)
+    return _timed_iter(tracer, name, iter(iterable))
+
+
+def _timed_iter(tracer, name, iterator):
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        tracer.stage(name, time.perf_counter() - start)
+        yield item
+
+
+def increment(name, amount=1):
+    tracer = current_tracer()
+    if tracer is not None:
+        tracer.increment(name, amount)
+
+
+def observe(name, value):
+    tracer = current_tracer()
+    if tracer is not None:
+        tracer.observe(name, value)
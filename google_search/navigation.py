@@ -0,0 +1,114 @@
+import urllib.parse
+
+from .const import GOOGLE_URL, IMAGES_SECTION, NEWS_SECTION, VIDEOS_SECTION
+
+# Value of the "tbm" url parameter of each search section
+SECTION_PARAMETERS = {
+    IMAGES_SECTION: 'isch',
+    NEWS_SECTION: 'nws',
+    VIDEOS_SECTION: 'vid',
+}
+# Prefix of the "tbs" parameter of search by image results, whose token identifies the searched image
+SEARCH_BY_IMAGE_TOKEN_PREFIX = 'sbi:'
+
+
+class Route(object):
+    DIRECT = 'direct'  # Target url was built from known parameters
+    LINK = 'link'  # Target url was taken from a link in the page
+
+
+class NavigationPlanner(object):
+    """
+    Builds urls of search pages from known parameters, so that they can be loaded without loading (and parsing) an
+    intermediate page to find the link to them
+
+    Notes:
+        * Each method returns None when the url can not be built, in which case links should be followed instead
+    """
+
+    def __init__(self, base_url=GOOGLE_URL):
+        """
+        Args:
+            base_url (str): Scheme and host to build urls with, f.e. of a local server that stands in for Google
+        """
+        self.base_url = base_url.rstrip('/')
+
+    def search_url(self, text, section=None):
+        """
+        Args:
+            text (str): Text to search
+            section (Union[str, tuple]): Section of the results (see go_to_search_section()), None for all results
+
+        Returns:
+            str:
+        """
+        parameters = {'q': text}
+        if section is not None:
+            section_parameter = self.section_parameter(section)
+            if section_parameter is None:
+                return None
+            parameters['tbm'] = section_parameter
+        return f'{self.base_url}/search?{urllib.parse.urlencode(parameters)}'
+
+    def search_by_image_url(self, image_url):
+        """
+        Args:
+            image_url (str): Url of the image to search
+
+        Returns:
+            str:
+        """
+        return f'{self.base_url}/searchbyimage?{urllib.parse.urlencode({"image_url": image_url})}'
+
+    def section_url(self, current_url, section):
+        """
+        Args:
+            current_url (str): Url of a search results page
+            section (Union[str, tuple]): Section to navigate to
+
+        Returns:
+            str: Url of the section's results for the same search, on the same host and with the same parameters
+                 (language, filters...) apart from the section and the page
+        """
+        parsed_url = urllib.parse.urlsplit(current_url or '')
+        query = urllib.parse.parse_qsl(parsed_url.query, keep_blank_values=True)
+        section_parameter = self.section_parameter(section)
+        if section_parameter is None or not dict(query).get('q'):
+            return None
+
+        query = [(name, value) for name, value in query if name not in ('tbm', 'start')] + [('tbm', section_parameter)]
+        return urllib.parse.urlunsplit(parsed_url._replace(query=urllib.parse.urlencode(query), fragment=''))
+
+    def identical_images_url(self, current_url):
+        """
+        Args:
+            current_url (str): Url of search by image results (after the redirect of the search by image endpoint)
+
+        Returns:
+            str: Url of image results of all sizes of the searched image
+        """
+        token = self._query_parameters(current_url).get('tbs', '')
+        if not token.startswith(SEARCH_BY_IMAGE_TOKEN_PREFIX):
+            return None
+        return f'{self.base_url}/search?{urllib.parse.urlencode({"tbs": token, "tbm": "isch"})}'
+
+    @staticmethod
+    def section_parameter(section):
+        """
+        Args:
+            section (Union[str, tuple]): Name of a section in any supported language, or a tuple of names
+
+        Returns:
+            str: Value of "tbm" parameter for the section, None if it is unknown
+        """
+        names = {name.lower() for name in ((section,) if not isinstance(section, tuple) else section)}
+        for section_names, parameter in SECTION_PARAMETERS.items():
+            if names & {name.lower() for name in section_names}:
+                return parameter
+        return None
+
+    @staticmethod
+    def _query_parameters(url):
+        if not url:
+            return {}
+        return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
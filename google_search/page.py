@@ -0,0 +1,5 @@
+import collections
+
+# A retrieved page: final url (after redirects), raw body and its encoding, and its tree if it was already built
+# (f.e. while it was downloaded, see streaming)
+Page = collections.namedtuple('Page', ('url', 'content', 'encoding', 'document'), defaults=(None,))
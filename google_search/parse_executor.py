@@ -0,0 +1,210 @@
+"""
+Parsing of downloaded pages in a pool of processes, so that parsing many pages at once is not bound by a single core
+
+Examples:
+    with ParseExecutor() as parse_executor:
+        with Searcher(parse_executor=parse_executor, rate_limiter=RateLimiter(rate=50)) as searcher:
+            searcher.search('cats')
+            results = list(searcher.scan_search_results(max_iterations=100))
+"""
+import concurrent.futures
+import os
+import threading
+
+from .background_browser import PageBrowser
+from .basic_searcher import BasicSearcher, parse_search_result
+from .const import GoogleXpaths
+from .page import Page
+
+DEFAULT_BATCH_SIZE = 8  # Pages sent to a worker at once, at most
+DEFAULT_BATCH_BYTES = 1024 * 1024  # Total size of the pages sent to a worker at once, at most
+
+
+class _PageParser(PageBrowser, BasicSearcher):
+    # Parses pages that were downloaded elsewhere. Workers build trees only, without a session to download with
+    pass
+
+
+_page_parser = None  # Of the worker process
+
+
+def _parser_of(content, encoding):
+    global _page_parser
+    if _page_parser is None:
+        _page_parser = _PageParser()
+    _page_parser._load(Page('', content, encoding))
+    return _page_parser
+
+
+def parse_search_results_page(content, encoding):
+    """
+    Args:
+        content (bytes): Body of a standard search results page
+        encoding (str): Encoding of the body
+
+    Returns:
+        tuple[tuple[tuple], bool, int]: Title, site, link and snippet of each result, whether there is a next page,
+                                        and the result offset of the farthest page linked to (see
+                                        SearchNavigation._last_linked_start())
+    """
+    parser = _parser_of(content, encoding)
+    results = tuple((result.title, result.site, result.link, result.snippet)
+                    for result in (parse_search_result(raw_result, None, parser)
+                                   for raw_result in parser._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS)))
+    return results, parser._next_page_link() is not None, parser._last_linked_start()
+
+
+def parse_image_results_page(content, encoding, max_iterations=None):
+    """
+    Args:
+        content (bytes): Body of an image search results page
+        encoding (str): Encoding of the body
+        max_iterations (int): Limit for number of results, None for no artificial limit
+
+    Returns:
+        tuple[tuple]: Title, site, link and image url of each result
+    """
+    return tuple((result.title, result.site, result.link, result.image_url)
+                 for result in _parser_of(content, encoding).scan_image_results(max_iterations))
+
+
+def _parse_batch(tasks):
+    # Runs in a worker. Failures are returned per task, so that a single bad page does not fail the whole batch
+    outcomes = []
+    for function, args in tasks:
+        try:
+            outcomes.append((True, function(*args)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+class ParseExecutor(object):
+    """
+    Parses pages in a pool of processes. Pages are sent to workers as bytes and results come back as tuples,
+    rather than as trees, which are expensive to transfer
+
+    Notes:
+        * A page is sent right away while a worker is idle. While all workers are busy, pages wait and are sent
+          together once a worker is done, so that the cost of transferring them is shared by the batch
+        * A page whose future is cancelled before it is sent is not parsed. Once sent, its future can no longer be
+          cancelled
+        * May be shared by several searchers and threads
+    """
+
+    def __init__(self, max_workers=None, batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES,
+                 mp_context=None):
+        """
+        Args:
+            max_workers (int): Number of worker processes, the number of processors by default
+            batch_size (int): Maximal number of pages sent to a worker at once
+            batch_bytes (int): Maximal total size of pages sent to a worker at once (a larger page is sent alone)
+            mp_context (multiprocessing.context.BaseContext): Context to start the workers with
+        """
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._batch_size = batch_size
+        self._batch_bytes = batch_bytes
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self._max_workers, mp_context=mp_context)
+
+        self._lock = threading.Lock()
+        self._pending = []  # Function, arguments and future of each page waiting to be sent
+        self._pending_bytes = 0
+        self._batches_in_flight = 0
+        self._batches_sent = 0
+        self._pages_sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def parse_search_results(self, content, encoding):
+        """
+        Returns:
+            concurrent.futures.Future: Of the outcome of parse_search_results_page()
+        """
+        return self._submit(parse_search_results_page, content, encoding)
+
+    def parse_image_results(self, content, encoding, max_iterations=None):
+        """
+        Returns:
+            concurrent.futures.Future: Of the outcome of parse_image_results_page()
+        """
+        return self._submit(parse_image_results_page, content, encoding, max_iterations)
+
+    @property
+    def batches_sent(self):
+        """
+        Returns:
+            int: Number of batches sent to workers so far
+        """
+        return self._batches_sent
+
+    @property
+    def pages_sent(self):
+        """
+        Returns:
+            int: Number of pages sent to workers so far, cancelled pages not included
+        """
+        return self._pages_sent
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            batch = self._take_batch()
+        self._send(batch)
+        self._pool.shutdown(wait=wait)
+
+    def _submit(self, function, content, *args):
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append((function, (content,) + args, future))
+            self._pending_bytes += len(content)
+
+            batch = None
+            if (self._batches_in_flight < self._max_workers or len(self._pending) >= self._batch_size or
+                    self._pending_bytes >= self._batch_bytes):
+                batch = self._take_batch()
+        self._send(batch)
+        return future
+
+    def _take_batch(self):
+        # Must be called with the lock held. Pages that were cancelled while they waited are dropped
+        batch = [task for task in self._pending if task[2].set_running_or_notify_cancel()]
+        self._pending, self._pending_bytes = [], 0
+        if not batch:
+            return None
+        self._batches_in_flight += 1
+        self._batches_sent += 1
+        self._pages_sent += len(batch)
+        return batch
+
+    def _send(self, batch):
+        if not batch:
+            return
+        try:
+            pool_future = self._pool.submit(_parse_batch, [(function, args) for function, args, _ in batch])
+        except Exception as e:
+            self._batch_done(batch, None, e)
+            return
+        pool_future.add_done_callback(lambda f: self._batch_done(batch, f, None))
+
+    def _batch_done(self, batch, pool_future, error):
+        try:
+            outcomes = pool_future.result() if error is None else None
+        except Exception as e:
+            error = e
+
+        for index, (_, _, future) in enumerate(batch):
+            if error is not None:
+                future.set_exception(error)
+            elif outcomes[index][0]:
+                future.set_result(outcomes[index][1])
+            else:
+                future.set_exception(outcomes[index][1])
+
+        # Pages that waited while all workers were busy are sent now
+        with self._lock:
+            self._batches_in_flight -= 1
+            next_batch = self._take_batch()
+        self._send(next_batch)
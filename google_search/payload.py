@@ -0,0 +1,50 @@
+_SCRIPT_TAG_START = b'<script'
+_SCRIPT_TAG_END = b'</script'
+
+
+class ScriptPayload(object):
+    """
+    Lightweight stand-in for a script element that was found without building the page's tree
+    """
+    attrib = {}
+
+    def __init__(self, text):
+        self.text = text
+
+    def text_content(self):
+        return self.text
+
+
+def find_script_payload(content, prefix, encoding='utf-8'):
+    """
+    Finds the text of the first script element whose text starts with the given prefix, by scanning the raw page
+
+    Notes:
+        * Only meant for ASCII-compatible encodings. Otherwise, the prefix is not found and None is returned
+
+    Args:
+        content (bytes): Raw page
+        prefix (str): Prefix of the script's text
+        encoding (str): Encoding of the page
+
+    Returns:
+        str: Text of the script, None if there is no such script
+    """
+    try:
+        raw_prefix = prefix.encode(encoding)
+    except (LookupError, UnicodeError):
+        return None
+
+    index = content.find(raw_prefix)
+    while index != -1:
+        # The prefix has to be the beginning of a script's text, right after its opening tag
+        tag_start = content.rfind(_SCRIPT_TAG_START, 0, index)
+        if tag_start != -1 and content.find(b'>', tag_start, index) == index - 1:
+            end = content.find(_SCRIPT_TAG_END, index)
+            if end == -1:
+                return None  # Truncated page
+            return content[index:end].decode(encoding, errors='replace')
+
+        index = content.find(raw_prefix, index + 1)
+
+    return None
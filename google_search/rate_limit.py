@@ -0,0 +1,178 @@
+import contextlib
+import json
+import random
+import threading
+import time
+import urllib.parse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Reservation(object):
+    """
+    A slot reserved in a RateLimiter. The request may be sent once the slot's time has come
+    """
+
+    def __init__(self, start_time):
+        self.start_time = start_time  # In time.time() terms
+
+    def delay(self):
+        """
+        Returns:
+            float: Seconds left until the slot, 0 if it has already come
+        """
+        return max(0.0, self.start_time - time.time())
+
+    def wait(self):
+        time.sleep(self.delay())
+
+    async def wait_async(self):
+        import asyncio  # Slow to import, and only coroutines need it
+        await asyncio.sleep(self.delay())
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter, keyed by host and egress identity (f.e. a proxy or source address).
+    Meant to be shared by all the browsers of a process, or by several processes through a state file
+
+    Notes:
+        * Implemented as GCRA (virtual scheduling), which is equivalent to a token bucket that is refilled at `rate`
+          tokens per second and holds up to `burst` tokens
+        * Slots are handed out in order, so the overall request rate of a key never exceeds its budget.
+          Jitter only postpones sending within a slot, it does not consume budget
+        * reserve() does not block, so a worker can keep parsing until its slot comes
+    """
+
+    def __init__(self, rate, burst=1, jitter=0.0, state_path=None):
+        """
+        Args:
+            rate (float): Requests per second allowed for each key
+            burst (int): Number of requests that may be sent at once after an idle period
+            jitter (float): Maximal random delay in seconds added on top of each slot
+            state_path (str): Path of a file to coordinate through with limiters of other processes.
+                              By default, state is kept in memory
+        """
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._state_path = state_path
+
+        self._lock = threading.Lock()
+        self._theoretical_arrival_times = {}
+
+    @staticmethod
+    def key(url, identity=None):
+        """
+        Builds the bucket key of a request
+
+        Args:
+            url (str): Absolute url of the request
+            identity (str): Egress identity the request is sent through
+
+        Returns:
+            str:
+        """
+        return f'{identity or ""}@{urllib.parse.urlparse(url).netloc}'
+
+    def reserve(self, key=''):
+        """
+        Reserves the next free slot of a key, without waiting for it
+
+        Args:
+            key (str): Bucket key, see RateLimiter.key()
+
+        Returns:
+            Reservation:
+        """
+        with self._lock, self._locked_state() as state:
+            now = time.time()
+            interval = 1 / self.rate
+            tolerance = (self.burst - 1) * interval
+
+            theoretical_arrival_time = max(state.get(key, now), now)
+            start_time = max(now, theoretical_arrival_time - tolerance)
+            state[key] = theoretical_arrival_time + interval
+
+        if self.jitter:
+            start_time += random.uniform(0, self.jitter)
+        return Reservation(start_time)
+
+    def acquire(self, key=''):
+        """
+        Blocks until a slot of the key is available
+
+        Args:
+            key (str): Bucket key, see RateLimiter.key()
+
+        Returns:
+            float: Seconds waited
+        """
+        reservation = self.reserve(key)
+        delay = reservation.delay()
+        reservation.wait()
+        return delay
+
+    async def acquire_async(self, key=''):
+        """
+        Asyncio version of acquire(). With a state file, the slot is reserved in the loop's default executor, as
+        the file may be locked by another process for a while
+
+        Args:
+            key (str): Bucket key, see RateLimiter.key()
+
+        Returns:
+            float: Seconds waited
+        """
+        if self._state_path:
+            import asyncio
+            reservation = await asyncio.get_running_loop().run_in_executor(None, self.reserve, key)
+        else:
+            reservation = self.reserve(key)
+        delay = reservation.delay()
+        await reservation.wait_async()
+        return delay
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        if not self._state_path:
+            yield self._theoretical_arrival_times
+            return
+
+        with open(self._state_path, 'a+') as f:
+            _lock_file(f)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else {}
+                yield state
+
+                # Drops keys that are idle long enough to have a full bucket, to keep the file small
+                now = time.time()
+                state = {key: value for key, value in state.items() if value > now}
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                _unlock_file(f)
+
+
+def _lock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -1,8 +1,49 @@
+from .utils import normalize_url
+
+
 class ResultBase(object):
+    """
+    Immutable search result. Results are equal, and hash equally, if their normalized identity keys are equal
+    """
+    __slots__ = ('title', 'site', 'link', '_key')
+    _fields = ('title', 'site', 'link')
+
     def __init__(self, title, site, link):
-        self.title = title
-        self.site = site
-        self.link = link
+        object.__setattr__(self, 'title', title)
+        object.__setattr__(self, 'site', site)
+        object.__setattr__(self, 'link', link)
+        object.__setattr__(self, '_key', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        return type(self), tuple(getattr(self, field) for field in self._fields)
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: Fields of the result by name
+        """
+        return {field: getattr(self, field) for field in self._fields}
+
+    @property
+    def key(self):
+        """
+        Identity of the result, which ignores differences in url notation (f.e. letter case of the host)
+
+        Returns:
+            tuple:
+        """
+        if self._key is None:
+            object.__setattr__(self, '_key', self._make_key())
+        return self._key
+
+    def _make_key(self):
+        return normalize_url(self.link),
 
     def __str__(self):
         return '\n '.join((f'Result',
@@ -12,13 +53,39 @@ class ResultBase(object):
                            ))
 
     def __eq__(self, other):
-        return hasattr(other, 'link') and self.link == other.link
+        return isinstance(other, ResultBase) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class SearchResult(ResultBase):
+    __slots__ = ('snippet', 'position')
+    _fields = ResultBase._fields + ('snippet', 'position')
+
+    def __init__(self, title, site, link, snippet, position):
+        super().__init__(title, site, link)
+        object.__setattr__(self, 'snippet', snippet)
+        object.__setattr__(self, 'position', position)
+
+    def __str__(self):
+        return '\n '.join((f'Search result #{self.position}',
+                           f'title: {self.title}',
+                           f'site name: {self.site}',
+                           f'link: {self.link}',
+                           f'snippet: {self.snippet}'))
 
 
 class ImageResult(ResultBase):
+    __slots__ = ('image_url',)
+    _fields = ResultBase._fields + ('image_url',)
+
     def __init__(self, title, site, link, image_url):
         super().__init__(title, site, link)
-        self.image_url = image_url
+        object.__setattr__(self, 'image_url', image_url)
+
+    def _make_key(self):
+        return normalize_url(self.link), normalize_url(self.image_url)
 
     def __str__(self):
         return '\n '.join((f'Image result',
@@ -26,6 +93,3 @@ class ImageResult(ResultBase):
                            f'site name: {self.site}',
                            f'taken from: {self.link}',
                            f'url: {self.image_url}'))
-
-    def __eq__(self, other):
-        return super().__eq__(other) and hasattr(other, 'image_url') and self.image_url == other.image_url
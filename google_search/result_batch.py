@@ -0,0 +1,175 @@
+import array
+import hashlib
+import sys
+
+from .result import ImageResult
+
+
+class StringColumn(object):
+    """
+    Compact column of optional strings, kept as a single UTF-8 buffer with end offsets instead of str objects
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array.array('q')
+        self._missing = bytearray()  # 1 for None values
+
+    def append(self, value):
+        if value is not None:
+            self._data += value.encode('utf-8', errors='surrogatepass')
+        self._ends.append(len(self._data))
+        self._missing.append(value is None)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        index = range(len(self))[index]  # Normalizes negative indices and raises IndexError
+        if self._missing[index]:
+            return None
+        start = self._ends[index - 1] if index else 0
+        return self._data[start:self._ends[index]].decode('utf-8', errors='surrogatepass')
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+class InternedColumn(object):
+    """
+    Column of values that repeat often (f.e. site names), kept as indices into a table of distinct values
+    """
+
+    def __init__(self):
+        self._values = []
+        self._indices_by_value = {}
+        self._indices = array.array('l')
+
+    def append(self, value):
+        index = self._indices_by_value.get(value)
+        if index is None:
+            index = self._indices_by_value[value] = len(self._values)
+            self._values.append(sys.intern(value) if isinstance(value, str) else value)
+        self._indices.append(index)
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        return self._values[self._indices[index]]
+
+    def __iter__(self):
+        return (self._values[index] for index in self._indices)
+
+    def distinct(self):
+        return list(self._values)
+
+
+class IntegerColumn(object):
+    """
+    Column of optional integers (f.e. positions), kept as a typed array
+    """
+
+    def __init__(self):
+        self._values = array.array('q')
+        self._missing = bytearray()  # 1 for None values
+
+    def append(self, value):
+        self._values.append(0 if value is None else value)
+        self._missing.append(value is None)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        index = range(len(self))[index]  # Normalizes negative indices and raises IndexError
+        return None if self._missing[index] else self._values[index]
+
+    def __iter__(self):
+        return (None if missing else value for value, missing in zip(self._values, self._missing))
+
+
+# Column type of fields that are not plain strings
+COLUMN_TYPES = {
+    'site': InternedColumn,
+    'position': IntegerColumn,
+}
+
+
+class ResultBatch(object):
+    """
+    Column-wise container of many results of the same type, which takes a fraction of the memory of result objects.
+    Results are deduplicated on insertion by their identity key
+
+    Notes:
+        * Deduplication keeps a 64-bit digest of each key rather than the key itself
+        * Results are rebuilt on access, so iterating a batch creates new objects
+    """
+
+    def __init__(self, result_type=ImageResult, results=()):
+        """
+        Args:
+            result_type (type): Type of the stored results, a subclass of ResultBase
+            results (Iterable[ResultBase]): Results to add
+        """
+        self.result_type = result_type
+        self._columns = {field: COLUMN_TYPES.get(field, StringColumn)() for field in result_type._fields}
+        self._key_digests = set()
+        self.extend(results)
+
+    @staticmethod
+    def _digest(result):
+        return int.from_bytes(hashlib.blake2b(repr(result.key).encode(), digest_size=8).digest(), 'big')
+
+    def append(self, result):
+        """
+        Adds a result unless an equal result is already in the batch
+
+        Args:
+            result (ResultBase):
+
+        Returns:
+            bool: Whether the result was added
+        """
+        digest = self._digest(result)
+        if digest in self._key_digests:
+            return False
+
+        self._key_digests.add(digest)
+        for field, column in self._columns.items():
+            column.append(getattr(result, field))
+        return True
+
+    def extend(self, results):
+        """
+        Args:
+            results (Iterable[ResultBase]):
+
+        Returns:
+            int: Number of results that were added
+        """
+        return sum(self.append(result) for result in results)
+
+    def column(self, field):
+        """
+        Args:
+            field (str): Name of a field of the results, f.e. 'site'
+
+        Returns:
+            Sequence: Values of the field, by order of insertion
+        """
+        return self._columns[field]
+
+    def __len__(self):
+        return len(self._key_digests)
+
+    def __contains__(self, result):
+        return self._digest(result) in self._key_digests
+
+    def __getitem__(self, index):
+        return self.result_type(**{field: column[index] for field, column in self._columns.items()})
+
+    def __iter__(self):
+        columns = [iter(column) for column in self._columns.values()]
+        for values in zip(*columns):
+            yield self.result_type(*values)
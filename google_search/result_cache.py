@@ -0,0 +1,149 @@
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class ResultCache(object):
+    """
+    In-memory cache of parsed search results, with in-flight request coalescing ("singleflight")
+
+    Notes:
+        * Concurrent callers that ask for a key which is being computed wait for that computation instead of
+          starting their own. Failures are passed to all of them and are not cached. If the computing task is
+          cancelled, one of the waiting callers computes the value instead
+        * Shared between threads through get_or_compute(), and between tasks through get_or_compute_async(). A key is
+          computed once even if threads and tasks ask for it at once
+        * Least recently used entries are evicted beyond max_entries
+    """
+
+    def __init__(self, ttl=None, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            ttl (float): Time to live of an entry in seconds, None for no expiration
+            max_entries (int): Maximal number of entries kept
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # Key -> (expiration time, value)
+        self._in_flight = {}  # Key -> concurrent.futures.Future, of threads and tasks alike
+
+    def get_or_compute(self, key, compute):
+        """
+        Args:
+            key (Hashable): Cache key
+            compute (Callable[[], Any]): Computes the value if it is neither cached nor being computed
+
+        Returns:
+            Cached or computed value
+        """
+        while True:
+            found, value, future, is_leader = self._join(key)
+            if found:
+                return value
+            if not is_leader:
+                try:
+                    return future.result()
+                except concurrent.futures.CancelledError:
+                    continue  # The leader was cancelled, one of the followers takes over
+
+            try:
+                value = compute()
+            except BaseException as e:
+                self._fail(key, future, e)
+                raise
+            self._succeed(key, future, value)
+            return value
+
+    async def get_or_compute_async(self, key, compute):
+        """
+        Asyncio version of get_or_compute()
+
+        Args:
+            key (Hashable): Cache key
+            compute (Callable[[], Awaitable]): Computes the value if it is neither cached nor being computed
+
+        Returns:
+            Cached or computed value
+        """
+        while True:
+            found, value, future, is_leader = self._join(key)
+            if found:
+                return value
+            if not is_leader:
+                try:
+                    # Cancelling a follower does not cancel the computation it waits for
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    continue  # The leader was cancelled, one of the followers takes over
+
+            try:
+                value = await compute()
+            except asyncio.CancelledError:
+                self._fail(key, future, None)
+                raise
+            except BaseException as e:
+                self._fail(key, future, e)
+                raise
+            self._succeed(key, future, value)
+            return value
+
+    def _join(self, key):
+        # Returns the cached value if found, otherwise the future of the computation and whether the caller leads it
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return True, value, None, False
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                return False, None, future, False
+            future = self._in_flight[key] = concurrent.futures.Future()
+            return False, None, future, True
+
+    def _succeed(self, key, future, value):
+        self._store(key, value)
+        with self._lock:
+            del self._in_flight[key]
+        future.set_result(value)
+
+    def _fail(self, key, future, error):
+        # Without an error the leader was cancelled, and its followers retry rather than fail
+        with self._lock:
+            del self._in_flight[key]
+        if error is None:
+            future.cancel()
+        else:
+            future.set_exception(error)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expiration_time, value = entry
+        if expiration_time is not None and expiration_time <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        expiration_time = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expiration_time, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
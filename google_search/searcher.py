@@ -1,31 +1,273 @@
-import requests
+import collections
+import concurrent.futures
+import contextvars
+import itertools
+import math
 import urllib.parse
-from lxml import html
 
 from .background_browser import BackgroundBrowser
 from .basic_searcher import BasicSearcher
-from .const import NON_BOT_USER_AGENT
+from .const import NON_BOT_USER_AGENT, SEARCH_RESULTS_PER_PAGE, GoogleXpaths
+from .exceptions import Blocked
+from .metrics import Counter, Observation, Stage, increment, observe, timed
+from .navigation import NavigationPlanner
+from .rate_limit import RateLimiter
+from .result import ImageResult, SearchResult
+from .streaming import TreeReader, page_reader
+from .throttle import THROTTLING_REASONS, detect_block
 from .utils import random_wait
 
 # Artificial delay to try to avoid being recognized as bots. Preferable use is before each GET request in the browser
 ARTIFICIAL_AVERAGE_DELAY = 1.5  # Seconds
+# Number of search results pages fetched ahead of the one being scanned
+PREFETCH_PAGES = 2
 
 
 class Searcher(BackgroundBrowser, BasicSearcher):
+    _request_headers = {'user-agent': NON_BOT_USER_AGENT}
+
+    def __init__(self, rate_limiter=None, identity=None, base_url=None, parse_executor=None, throttle=None,
+                 streaming=False, **options):
+        """
+        Args:
+            rate_limiter (RateLimiter): Shared limiter to pace requests with, instead of an artificial random delay
+            identity (str): Egress identity of the requests, paced separately by the rate limiter and the throttle
+            base_url (str): Scheme and host to send searches to instead of Google's, f.e. of a local mock server
+            parse_executor (ParseExecutor): Pool of processes to parse results pages in, instead of this thread.
+                                            It is not shut down by the searcher
+            throttle (AdaptiveThrottle): Shared throttle to pace requests with according to Google's responses,
+                                         instead of an artificial random delay. Blocked requests are retried
+            streaming (bool): Whether to parse results pages while they are downloaded, and stop downloading them
+                              once their results were read (see streaming). Pages cut short are not cached
+            **options: See BackgroundBrowser
+        """
+        super().__init__(**options)
+        self._rate_limiter = rate_limiter
+        self._identity = identity
+        self._parse_executor = parse_executor
+        self._throttle = throttle
+        self._streaming = streaming
+        if base_url is not None:
+            self._planner = NavigationPlanner(base_url)
+
     def _get(self, url):
-        random_wait(ARTIFICIAL_AVERAGE_DELAY)
-        return self._non_delayed_get(url)
-
-    def _non_delayed_get(self, url):
-        # If url starts with '/' we stay at current host and adjust the request accordingly
-        if self._host and url.startswith('/'):
-            url = self._host + url
-
-        # Performs the request
-        response = requests.get(url, headers={'user-agent': NON_BOT_USER_AGENT})
-        response.raise_for_status()  # If status code not ok, raises requests.exceptions.HTTPError
-
-        # Updates attributes
-        parsed_uri = urllib.parse.urlparse(url)
-        self._host = '{uri.scheme}://{uri.netloc}'.format(uri=parsed_uri)
-        self._html = html.fromstring(response.text)
+        # Pages served from cache do not reach Google, so they are not delayed
+        self._load(self._retrieve(self._resolve_url(url), delayed=True))
+
+    def _delay(self, url):
+        with timed(Stage.WAIT):
+            if self._rate_limiter:
+                self._rate_limiter.acquire(RateLimiter.key(url, self._identity))
+            elif not self._throttle:
+                random_wait(ARTIFICIAL_AVERAGE_DELAY)
+
+    def _page_reader(self, url):
+        if not self._streaming:
+            return None
+        reader = page_reader(url, (GoogleXpaths.Search.FOOTER_ID,), GoogleXpaths.ImageSearch.RESULTS_JSON_SCRIPT_PREFIX)
+        # With a parse executor, trees are built in its processes rather than while downloading
+        if self._parse_executor and isinstance(reader, TreeReader):
+            return None
+        return reader
+
+    def _fetch(self, url, reader=None):
+        if not self._throttle:
+            return super()._fetch(url, reader)
+
+        response, reason = self._throttled_request(url, reader)
+        if reason is not None:
+            raise Blocked(reason, url)
+        response.raise_for_status()
+        return response
+
+    def _throttled_request(self, url, reader=None):
+        """
+        Performs the request, whatever the status code of the response. With a throttle, the request is paced by it
+        and retried while it is blocked for sending too many requests
+
+        Returns:
+            tuple[requests.Response, str]: The response, and the reason it was blocked for (see BlockReason), None if
+                                           it was served
+        """
+        if not self._throttle:
+            response = self._request(url, reader)
+            reason = detect_block(response.status_code, response.url, response.content)
+            if reason is not None:
+                increment(Counter.BLOCKED)
+            return response, reason
+
+        for retries in itertools.count():
+            if retries:
+                increment(Counter.RETRIES)
+                self._delay(url)
+            with timed(Stage.WAIT):
+                permit = self._throttle.acquire(self._identity)
+            with permit:
+                response = self._request(url, reader)
+                reason = detect_block(response.status_code, response.url, response.content)
+                permit.report(reason)
+
+            if reason is None:
+                return response, None
+            increment(Counter.BLOCKED)
+            # Retrying does not get past the consent interstitial
+            if reason not in THROTTLING_REASONS or retries >= self._throttle.max_retries:
+                return response, reason
+
+    def scan_search_results(self, max_iterations: int = 10, prefetch: int = PREFETCH_PAGES):
+        """
+        Parses standard search results, fetching the following pages ahead while results are consumed
+
+        Notes:
+            * Assumes searcher is in search results page
+            * Pages are addressed directly by result offset, rather than by following the link to the next page
+            * With a rate limiter, up to `prefetch` pages are fetched concurrently. Otherwise pages are fetched one
+              at a time, each after the artificial delay
+            * Only pages that are linked from a page that was loaded (f.e. by the page numbers at its bottom) are
+              fetched ahead, so that no page beyond the last one is requested
+            * Pages that were fetched ahead are dropped if the scan is stopped early
+
+        Args:
+            max_iterations (int): Limit for number of results, None for no artificial limit
+            prefetch (int): Number of pages to fetch ahead, 0 to fetch each page only once it is needed
+
+        Yields:
+            SearchResult:
+        """
+        if self._parse_executor:
+            yield from self._scan_offloaded_search_results(max_iterations, prefetch)
+            return
+        if not prefetch:
+            yield from super().scan_search_results(max_iterations)
+            return
+
+        pages_needed = None if max_iterations is None else math.ceil(max_iterations / SEARCH_RESULTS_PER_PAGE)
+        following_pages = itertools.islice(self._following_pages(), 0,
+                                           None if pages_needed is None else max(0, pages_needed - 1))
+        next_page = next(following_pages, None)  # Result offset and url of the page to fetch ahead next
+        last_linked_start = -1  # Result offset of the farthest page known to exist
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch if self._rate_limiter else 1)
+        pending_pages = collections.deque()  # Url and future of each page fetched ahead, in order
+
+        try:
+            position = 1
+            while True:
+                has_next_page = self._next_page_link() is not None
+                last_linked_start = max(last_linked_start, self._last_linked_start())
+                while has_next_page and len(pending_pages) < prefetch:
+                    if next_page is None or next_page[0] > last_linked_start:
+                        break
+                    _, url = next_page
+                    next_page = next(following_pages, None)
+                    # Pages fetched ahead are traced like the rest of the scan, see metrics
+                    context = contextvars.copy_context()
+                    pending_pages.append((url, executor.submit(context.run, self._retrieve, url, delayed=True)))
+
+                first_position = position
+                for result in self._scan_current_page(max_iterations, position):
+                    yield result
+                    position += 1
+
+                if position == first_position or not has_next_page or not pending_pages:
+                    break
+                _, page = pending_pages.popleft()
+                self._load(page.result())
+        finally:
+            for _, page in pending_pages:
+                page.cancel()
+            executor.shutdown(wait=False)
+
+    def _scan_offloaded_search_results(self, max_iterations, prefetch):
+        """
+        Same as scan_search_results(), with pages parsed by the parse executor. A page fetched ahead is sent to be
+        parsed as soon as it is downloaded
+        """
+        pages_needed = None if max_iterations is None else math.ceil(max_iterations / SEARCH_RESULTS_PER_PAGE)
+        following_pages = itertools.islice(self._following_pages(), 0,
+                                           None if pages_needed is None else max(0, pages_needed - 1))
+        next_page = next(following_pages, None)  # Result offset and url of the page to fetch ahead next
+        last_linked_start = -1  # Result offset of the farthest page known to exist
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, prefetch) if self._rate_limiter else 1)
+        pending_pages = collections.deque()  # Future of each page fetched ahead, with the future of its parsing
+
+        def fetch_ahead(num_of_pages):
+            nonlocal next_page
+            while len(pending_pages) < num_of_pages:
+                if next_page is None or next_page[0] > last_linked_start:
+                    break
+                _, url = next_page
+                next_page = next(following_pages, None)
+                context = contextvars.copy_context()
+                pending_pages.append(executor.submit(context.run, self._retrieve_and_parse, url))
+
+        parsed_page = self._parse_executor.parse_search_results(self._content, self._encoding)
+        try:
+            position = 1
+            while True:
+                with timed(Stage.RESULTS_PARSE):
+                    results, has_next_page, linked_start = parsed_page.result()
+                last_linked_start = max(last_linked_start, linked_start)
+                if has_next_page:
+                    fetch_ahead(prefetch)
+
+                first_position = position
+                remaining = self._remaining(max_iterations, position)
+                for title, site, link, snippet in itertools.islice(results, 0, remaining):
+                    increment(Counter.RESULTS)
+                    yield SearchResult(title, site, link, snippet, position)
+                    position += 1
+                observe(Observation.RESULTS_PER_PAGE, position - first_position)
+
+                if has_next_page:
+                    fetch_ahead(1)
+                if not results or not has_next_page or not pending_pages:
+                    break
+                page, parsed_page = pending_pages.popleft().result()
+                self._load(page)
+        finally:
+            # Pages no longer needed are neither downloaded nor parsed, if it is not too late
+            for page in pending_pages:
+                page.cancel()
+                page.add_done_callback(_cancel_parsing)
+            executor.shutdown(wait=False)
+
+    def _retrieve_and_parse(self, url):
+        page = self._retrieve(url, delayed=True)
+        return page, self._parse_executor.parse_search_results(page.content, page.encoding)
+
+    def scan_image_results(self, max_iterations: int = None):
+        """
+        Parses image search results by analyzing webpage's script. See BasicSearcher
+
+        Yields:
+            ImageResult:
+        """
+        if not self._parse_executor:
+            return super().scan_image_results(max_iterations)
+
+        with timed(Stage.RESULTS_PARSE):
+            results = self._parse_executor.parse_image_results(self._content, self._encoding, max_iterations).result()
+        increment(Counter.RESULTS, len(results))
+        observe(Observation.RESULTS_PER_PAGE, len(results))
+        return (ImageResult(title, site, link, image_url) for title, site, link, image_url in results)
+
+    def _following_pages(self):
+        """
+        Yields:
+            tuple[int, str]: Result offset and url of each search results page following the current one
+        """
+        parsed_url = urllib.parse.urlsplit(self._url)
+        query = dict(urllib.parse.parse_qsl(parsed_url.query, keep_blank_values=True))
+        start = int(query.get('start', 0))
+        results_per_page = int(query.get('num', SEARCH_RESULTS_PER_PAGE))
+
+        for page in itertools.count(1):
+            query['start'] = str(start + page * results_per_page)
+            yield int(query['start']), urllib.parse.urlunsplit(parsed_url._replace(query=urllib.parse.urlencode(query)))
+
+
+def _cancel_parsing(page):
+    # Callback of a page fetched ahead, with the future of its parsing
+    if not page.cancelled() and page.exception() is None:
+        _, parsed_page = page.result()
+        parsed_page.cancel()
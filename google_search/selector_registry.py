@@ -0,0 +1,84 @@
+import functools
+import re
+import threading
+
+from lxml import etree
+
+_local = threading.local()  # Compiled xpaths are kept per thread, as lxml serializes evaluations of a shared one
+
+
+def compiled_xpath(expression):
+    """
+    Returns a compiled version of an xpath expression, compiling it only the first time it is requested
+
+    Args:
+        expression (str):
+
+    Returns:
+        lxml.etree.XPath:
+    """
+    xpaths = getattr(_local, 'xpaths', None)
+    if xpaths is None:
+        xpaths = _local.xpaths = {}
+
+    xpath = xpaths.get(expression)
+    if xpath is None:
+        xpath = xpaths[expression] = etree.XPath(expression)
+    return xpath
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_regex(pattern, flags=0):
+    """
+    Returns a compiled version of a regex pattern, compiling it only the first time it is requested
+
+    Args:
+        pattern (str):
+        flags (int):
+
+    Returns:
+        re.Pattern:
+    """
+    return re.compile(pattern, flags)
+
+
+class FallbackSelectors(object):
+    """
+    Ordered alternatives of a selector (f.e. for different UI languages), that learns which alternative matches
+    and tries it first next time
+
+    Notes:
+        * Learning is done per context, which can be anything hashable that identifies the layout (f.e. locale)
+    """
+
+    def __init__(self, options):
+        """
+        Args:
+            options (Sequence): Alternatives, by default tried in the given order
+        """
+        self.options = tuple(options)
+        self._preferred_indices = {}  # Context -> index of the last matching option
+
+    def ordered(self, context=None):
+        """
+        Args:
+            context (Hashable): Layout the selectors are used for
+
+        Yields:
+            tuple: Index and option, the last matching option of the context first
+        """
+        preferred_index = self._preferred_indices.get(context, 0)
+        yield preferred_index, self.options[preferred_index]
+        for index, option in enumerate(self.options):
+            if index != preferred_index:
+                yield index, option
+
+    def matched(self, index, context=None):
+        """
+        Records that an option matched
+
+        Args:
+            index (int): Index of the option, as given by ordered()
+            context (Hashable): Layout the selectors were used for
+        """
+        self._preferred_indices[context] = index
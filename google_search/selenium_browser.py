@@ -1,5 +1,5 @@
 from selenium import webdriver
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
@@ -12,8 +12,14 @@ MAX_DELAY = 7  # Seconds
 
 class SeleniumBrowser(BasicBrowser):
 
-    def __init__(self, **options):
+    def __init__(self, profile=None, **options):
+        """
+        Args:
+            profile (PerformanceProfile): Performance configuration of the browser, by default a full windowed browser
+            **options: WebDriver options
+        """
         super().__init__()
+        self._profile = profile
         self._start(**options)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -23,15 +29,47 @@ class SeleniumBrowser(BasicBrowser):
         """
         Opens a new WebDriver instance
         """
+        if self._profile:
+            options['options'] = self._profile.firefox_options(options.get('options'))
         self._driver = webdriver.Firefox(**options)
-        self._driver.maximize_window()
+
+        if self._profile and self._profile.window_size:
+            self._driver.set_window_size(*self._profile.window_size)
+        else:
+            self._driver.maximize_window()
 
     def _quit(self):
         self._driver.quit()
 
+    def _is_alive(self):
+        """
+        Checks whether the WebDriver still responds
+
+        Returns:
+            bool:
+        """
+        try:
+            self._driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
     def _non_delayed_get(self, url):
         self._driver.get(url)
 
+    def _current_url(self):
+        return self._driver.current_url
+
+    def _get_cookies(self):
+        """
+        Returns:
+            list[dict]: Cookies of the current page's domain, in WebDriver's format
+        """
+        return self._driver.get_cookies()
+
+    def _get_user_agent(self):
+        return self._driver.execute_script('return navigator.userAgent')
+
     def _find_element_by_xpath(self, xpath):
         try:
             return self._driver.find_element_by_xpath(xpath)
@@ -41,6 +79,10 @@ class SeleniumBrowser(BasicBrowser):
     def _find_elements_by_xpath(self, xpath):
         return self._driver.find_elements_by_xpath(xpath)
 
+    @staticmethod
+    def _find_elements_by_relative_xpath(element, xpath):
+        return element.find_elements_by_xpath(xpath)
+
     @staticmethod
     def _get_element_attribute(element, attr):
         return element.get_attribute(attr)
@@ -0,0 +1,165 @@
+# JavaScript snippets injected by SeleniumSearcher, to save WebDriver round trips
+
+# Asynchronous script (for execute_async_script) that optionally opens the next image result, waits for the opened
+# result to be ready and extracts it, all in a single call.
+# Arguments:
+#   xpaths - {panel, title, site, link, image, next, results, thumbnailLink}, panel and results are absolute,
+#            thumbnailLink is relative to a result tile and the others are relative to the panel
+#   options - {clickNext, previousLink, waitForImage, timeout, index}. A result is ready once its link differs from
+#             previousLink and, if waitForImage, its image src is no longer a data url. On timeout, the result is
+#             extracted as is. index is the position of the result in the grid
+# Returns:
+#   {title, site, link, src, thumbnailHref, nextDisabled}, or null if there is no opened result. thumbnailHref is
+#   the link of the result's tile, which holds the image url once the result was opened (f.e. when images are
+#   blocked and src is never set)
+EXTRACT_OPENED_IMAGE_RESULT = '''
+var callback = arguments[arguments.length - 1];
+var xpaths = arguments[0];
+var options = arguments[1];
+
+function first(xpath, context) {
+    if (!context) {
+        return null;
+    }
+    return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+
+function extract() {
+    var panel = first(xpaths.panel, document);
+    if (!panel) {
+        return null;
+    }
+    var title = first(xpaths.title, panel);
+    var site = first(xpaths.site, panel);
+    var link = first(xpaths.link, panel);
+    var image = first(xpaths.image, panel);
+    var next = first(xpaths.next, panel);
+    var tile = first('(' + xpaths.results + ')[' + (options.index + 1) + ']', document);
+    var thumbnailLink = first(xpaths.thumbnailLink, tile);
+    return {
+        title: title && title.innerText,
+        site: site && site.innerText,
+        link: link && link.href,
+        src: image && image.src,
+        thumbnailHref: thumbnailLink && thumbnailLink.href,
+        nextDisabled: !next || next.hasAttribute('disabled')
+    };
+}
+
+function isReady(result) {
+    if (!result || (options.previousLink && result.link === options.previousLink)) {
+        return false;
+    }
+    return !options.waitForImage || !result.src || result.src.indexOf('data:') !== 0;
+}
+
+var done = false;
+var observer = null;
+var timer = null;
+
+function finish() {
+    if (done) {
+        return;
+    }
+    done = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearTimeout(timer);
+    callback(extract());
+}
+
+function check() {
+    if (isReady(extract())) {
+        finish();
+    }
+}
+
+if (options.clickNext) {
+    var next = first(xpaths.next, first(xpaths.panel, document));
+    if (next) {
+        next.click();
+    }
+}
+
+check();
+if (!done) {
+    observer = new MutationObserver(check);
+    observer.observe(document.body, {subtree: true, childList: true, characterData: true, attributes: true,
+                                     attributeFilter: ['src', 'href', 'disabled']});
+    timer = setTimeout(finish, options.timeout);
+}
+'''
+
+# Asynchronous script (for execute_async_script) that returns image result tiles which were not returned before,
+# marking them as returned. If there are none, it scrolls to the bottom of the page, clicks "show more" if it is
+# displayed, and waits for new tiles to be attached. It does not wait once the end of results marker is displayed.
+# Arguments:
+#   xpaths - {results, showMore, end}, all absolute
+#   timeout - Milliseconds to wait for new tiles
+# Returns:
+#   List of new tile elements, empty if none were attached in time or the end of results was reached
+NEXT_IMAGE_RESULT_TILES = '''
+var callback = arguments[arguments.length - 1];
+var xpaths = arguments[0];
+var timeout = arguments[1];
+var MARK = 'data-scanned';  // Keep in sync with CLEAR_SCANNED_MARKS
+
+function takeNewTiles() {
+    var snapshot = document.evaluate(xpaths.results + '[not(@' + MARK + ')]', document, null,
+                                     XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var tiles = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) {
+        var tile = snapshot.snapshotItem(i);
+        tile.setAttribute(MARK, '');
+        tiles.push(tile);
+    }
+    return tiles;
+}
+
+function displayed(xpath) {
+    var element = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE,
+                                    null).singleNodeValue;
+    return element && element.offsetParent !== null ? element : null;
+}
+
+var tiles = takeNewTiles();
+if (tiles.length) {
+    callback(tiles);
+} else {
+    var done = false;
+    var timer = null;
+    var observer = new MutationObserver(function () {
+        var tiles = takeNewTiles();
+        if (tiles.length || displayed(xpaths.end)) {
+            finish(tiles);
+        }
+    });
+
+    function finish(tiles) {
+        if (done) {
+            return;
+        }
+        done = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        callback(tiles);
+    }
+
+    observer.observe(document.body, {subtree: true, childList: true});
+    timer = setTimeout(function () { finish(takeNewTiles()); }, timeout);
+
+    window.scrollTo(0, document.body.scrollHeight);
+    var showMore = displayed(xpaths.showMore);
+    if (showMore) {
+        showMore.click();
+    } else if (displayed(xpaths.end)) {
+        finish([]);
+    }
+}
+'''
+
+# Removes the marks of NEXT_IMAGE_RESULT_TILES, so that a new scan of the page returns all tiles
+CLEAR_SCANNED_MARKS = '''
+document.querySelectorAll('[data-scanned]').forEach(function (tile) { tile.removeAttribute('data-scanned'); });
+'''
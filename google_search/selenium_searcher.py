@@ -1,14 +1,16 @@
 import itertools
 import time
-
-from selenium.common.exceptions import NoSuchElementException
+import urllib.parse
 
 from .basic_searcher import BasicSearcher
 from .selenium_browser import SeleniumBrowser
-from .const import GOOGLE_URL, GoogleXpaths
+from .const import CONSENT_HOST, GOOGLE_URL, GoogleXpaths
 from .exceptions import NoSuchElement
+from .rate_limit import RateLimiter
 from .utils import parse_image_result_site_url, parse_image_result_image_url, random_wait
 from .result import ImageResult
+from .selector_registry import FallbackSelectors
+from .selenium_scripts import CLEAR_SCANNED_MARKS, EXTRACT_OPENED_IMAGE_RESULT, NEXT_IMAGE_RESULT_TILES
 
 # Artificial delay to try to avoid being recognized as bots. Preferable use is before each GET request in the browser
 ARTIFICIAL_AVERAGE_DELAY = 0.5  # Seconds.
@@ -16,24 +18,53 @@ ARTIFICIAL_AVERAGE_DELAY = 0.5  # Seconds.
 MAX_DELAY = 7  # Seconds
 MAX_ATTEMPTS = 10
 
+TITLE_AND_SITE_SELECTORS = FallbackSelectors(GoogleXpaths.ImageSearch.Result.TITLE_AND_SITE_RELATIVE_OPTIONS)
+
 
 class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
     """
     SeleniumSearcher can perform miscellaneous web scraping actions in Google search, using Selenium webdriver
     """
 
-    def __init__(self, **options):
+    def __init__(self, rate_limiter=None, identity=None, **options):
+        """
+        Args:
+            rate_limiter (RateLimiter): Shared limiter to pace requests with, instead of an artificial random delay
+            identity (str): Egress identity of the browser, paced separately by the rate limiter
+            **options: See SeleniumBrowser
+        """
         SeleniumBrowser.__init__(self, **options)
         BasicSearcher.__init__(self)
+        self._rate_limiter = rate_limiter
+        self._identity = identity
 
     def _start(self, **options):
         super(SeleniumSearcher, self)._start(**options)
         self._driver.get(GOOGLE_URL)
 
     def _get(self, url):
-        random_wait(ARTIFICIAL_AVERAGE_DELAY)
+        if self._rate_limiter:
+            self._rate_limiter.acquire(RateLimiter.key(url, self._identity))
+        else:
+            random_wait(ARTIFICIAL_AVERAGE_DELAY)
         return self._non_delayed_get(url)
 
+    def accept_consent(self):
+        """
+        Accepts Google's cookie consent, if driver is in the consent page
+
+        Returns:
+            bool: Whether consent was given
+        """
+        if urllib.parse.urlparse(self._current_url()).netloc != CONSENT_HOST:
+            return False
+
+        buttons = self._wait_for_elements(GoogleXpaths.Consent.ACCEPT_BUTTON)
+        if not buttons:
+            raise NoSuchElement('Could not find the button to accept cookies')
+        buttons[-1].click()
+        return True
+
     def shallow_scan_image_results(self, max_iterations: int = None):
         """
         Parses image search results without opening them. Not recommended (details in the notes)
@@ -42,26 +73,62 @@ class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
             * Assumes driver is in an image search results page
             * Due to Google's UI implementation, image results are assigned with the original
               image-src value only when clicking on them
-            * Google only renders ~50 results before scrolling further down. This issue is not currently tackled
+            * Google only renders ~50 results at first. Results are yielded as they are attached to the page, while
+              scrolling down and clicking "show more" whenever all rendered results were yielded, until the end of
+              results is displayed
+            * Tiles of the grid that are not results (f.e. related searches) are skipped
 
         Args:
             max_iterations (int): Limit for number of results, None for no artificial limit
 
         Yields:
             ImageResult:
+
+        Raises:
+            NoSuchElement: If none of the tiles could be parsed due to change in Google's html structure
         """
-        raw_results = self._wait_for_elements(GoogleXpaths.ImageSearch.RESULTS_DIVS)
+        if not self._wait_for_elements(GoogleXpaths.ImageSearch.RESULTS_DIVS):
+            return  # No results found
+
+        self._driver.set_script_timeout(MAX_DELAY + 1)
+        self._driver.execute_script(CLEAR_SCANNED_MARKS)
+        locale = self._driver.execute_script('return document.documentElement.lang')
+        xpaths = {'results': GoogleXpaths.ImageSearch.RESULTS_DIVS,
+                  'showMore': GoogleXpaths.ImageSearch.SHOW_MORE_BUTTON,
+                  'end': GoogleXpaths.ImageSearch.END_OF_RESULTS}
 
-        for raw_result in itertools.islice(raw_results, 0, max_iterations):
-            yield self._parse_image_result(raw_result)
+        yield from itertools.islice(self._stream_image_results(xpaths, locale), 0, max_iterations)
+
+    def _stream_image_results(self, xpaths, locale):
+        """
+        Yields:
+            ImageResult: Results of tiles attached to the page, as long as new tiles are attached
+        """
+        yielded_any = False
+        while True:
+            raw_results = self._driver.execute_async_script(NEXT_IMAGE_RESULT_TILES, xpaths, MAX_DELAY * 1000)
+            if not raw_results:
+                return  # No more results are loaded
+
+            for raw_result in raw_results:
+                try:
+                    result = self._parse_image_result(raw_result, locale)
+                except NoSuchElement:
+                    # Some tiles are not results, but if none of the first ones is, the page's structure has changed
+                    if not yielded_any and raw_result is raw_results[-1]:
+                        raise
+                    continue
+                yielded_any = True
+                yield result
 
     @staticmethod
-    def _parse_image_result(raw_result):
+    def _parse_image_result(raw_result, locale=None):
         """
         Parses html element of a single image result
 
         Args:
             raw_result: Selenium web element that represents image result
+            locale (str): Language of the page, used to try first the xpaths that matched it before
 
         Returns:
             ImageResult: parsed result
@@ -72,13 +139,14 @@ class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
         title = None
         site = None
 
-        for title_xpath, site_xpath in GoogleXpaths.ImageSearch.Result.TITLE_AND_SITE_RELATIVE_OPTIONS:
-            try:
-                title = raw_result.find_element_by_xpath(title_xpath).text
-                site = raw_result.find_element_by_xpath(site_xpath).text
+        for index, (title_xpath, site_xpath) in TITLE_AND_SITE_SELECTORS.ordered(locale):
+            titles = raw_result.find_elements_by_xpath(title_xpath)
+            sites = raw_result.find_elements_by_xpath(site_xpath) if titles else []
+            if titles and sites:
+                TITLE_AND_SITE_SELECTORS.matched(index, locale)
+                title = titles[0].text
+                site = sites[0].text
                 break
-            except NoSuchElementException:
-                continue
 
         if not title or not site:
             raise NoSuchElement(
@@ -98,15 +166,18 @@ class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
                            link=link,
                            image_url=image_url)
 
-    def scan_image_results_by_opening(self, max_iterations: int = None):
+    def scan_image_results_by_opening(self, max_iterations: int = None, scripted: bool = True):
         """
         Parses image search results by opening them
 
         Notes:
             * Assumes driver is in an image search results page
+            * Scripted extraction opens, waits for and parses each result in a single WebDriver call, waiting on
+              page events rather than polling
 
         Args:
             max_iterations (int): Limit for number of results, None for no artificial limit
+            scripted (bool): Whether to extract results with an injected script, instead of element by element
 
         Yields:
             ImageResult:
@@ -117,18 +188,30 @@ class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
         except NoSuchElement:
             return  # No results found
 
+        if scripted:
+            yield from self._scan_opened_image_results_by_script(max_iterations)
+            return
+
         previous_result = None
         for i in itertools.islice(itertools.count(), 0, max_iterations):
             result_div = self._find_element_by_xpath(GoogleXpaths.ImageSearch.OPENED_RESULT_DIV)
-            self._wait_until_image_fully_loaded()
+            if self._images_enabled():
+                self._wait_until_image_fully_loaded()
             result = self._parse_opened_image_result(result_div)
 
+            # Full-size image is never loaded when images are blocked, but the result's thumbnail links to it
+            if result.image_url is None:
+                result = ImageResult(title=result.title,
+                                     site=result.site,
+                                     link=result.link,
+                                     image_url=self._get_result_image_url(i))
+
             # We need to make sure that we don't parse the last image result multiple times. It might happen because
             # it takes some time for the 'next' button to be disabled in the UI
             if result == previous_result:
                 break
 
-            yield self._parse_opened_image_result(result_div)
+            yield result
 
             next_button = result_div.find_element_by_xpath(GoogleXpaths.ImageSearch.OpenedResult.NEXT_BUTTON_RELATIVE)
             # Check if reached to the end
@@ -139,6 +222,75 @@ class SeleniumSearcher(SeleniumBrowser, BasicSearcher):
                 next_button.click()
             previous_result = result
 
+    def _scan_opened_image_results_by_script(self, max_iterations: int = None):
+        """
+        Parses opened image results with EXTRACT_OPENED_IMAGE_RESULT, see scan_image_results_by_opening()
+
+        Yields:
+            ImageResult:
+        """
+        self._driver.set_script_timeout(MAX_DELAY + 1)
+        xpaths = {'panel': GoogleXpaths.ImageSearch.OPENED_RESULT_DIV,
+                  'title': GoogleXpaths.ImageSearch.OpenedResult.TITLE_RELATIVE,
+                  'site': GoogleXpaths.ImageSearch.OpenedResult.SITE_RELATIVE,
+                  'link': GoogleXpaths.ImageSearch.OpenedResult.LINK_RELATIVE,
+                  'image': GoogleXpaths.ImageSearch.OpenedResult.IMAGE_RELATIVE,
+                  'next': GoogleXpaths.ImageSearch.OpenedResult.NEXT_BUTTON_RELATIVE,
+                  'results': GoogleXpaths.ImageSearch.RESULTS_DIVS,
+                  'thumbnailLink': GoogleXpaths.ImageSearch.Result.IMAGE_LINK_RELATIVE}
+        options = {'clickNext': False,
+                   'previousLink': None,
+                   'waitForImage': self._images_enabled(),
+                   'timeout': MAX_DELAY * 1000,
+                   'index': 0}
+
+        previous_result = None
+        for i in itertools.islice(itertools.count(), 0, max_iterations):
+            raw_result = self._driver.execute_async_script(EXTRACT_OPENED_IMAGE_RESULT, xpaths, options)
+            if not raw_result:
+                break
+
+            # Full-size image is never loaded when images are blocked, but the result's thumbnail links to it
+            image_url = parse_image_result_image_url(raw_result['src']) if raw_result['src'] else None
+            if image_url is None and raw_result['thumbnailHref']:
+                image_url = parse_image_result_image_url(raw_result['thumbnailHref'])
+            result = ImageResult(title=raw_result['title'],
+                                 site=raw_result['site'],
+                                 link=parse_image_result_site_url(raw_result['link']) if raw_result['link'] else None,
+                                 image_url=image_url)
+
+            # The script gives up waiting for the next result after a while, so it might return the last one again
+            if result == previous_result:
+                break
+
+            yield result
+
+            if raw_result['nextDisabled']:
+                break
+            options = {**options, 'clickNext': True, 'previousLink': raw_result['link'], 'index': i + 1}
+            previous_result = result
+
+    def _images_enabled(self):
+        return not (self._profile and self._profile.block_images)
+
+    def _get_result_image_url(self, index):
+        """
+        Extracts image url of a result from its thumbnail's link, which is set once the result was opened
+
+        Args:
+            index (int): Position of the result in the page
+
+        Returns:
+            str: Image url, None if it is not available
+        """
+        raw_results = self._find_elements_by_xpath(GoogleXpaths.ImageSearch.RESULTS_DIVS)
+        if index >= len(raw_results):
+            return None
+
+        image_links = raw_results[index].find_elements_by_xpath(GoogleXpaths.ImageSearch.Result.IMAGE_LINK_RELATIVE)
+        raw_image_url = image_links and self._get_element_attribute(image_links[0], 'href')
+        return parse_image_result_image_url(raw_image_url) if raw_image_url else None
+
     def _wait_until_image_fully_loaded(self):
         """
         Waits for opened image result's image src to be loaded
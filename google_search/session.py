@@ -0,0 +1,75 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool defaults, applied per session. Sessions may be shared between several browser instances
+POOL_CONNECTIONS = 4  # Number of distinct hosts to keep a connection pool for
+POOL_MAXSIZE = 10  # Maximal number of connections kept alive per host
+MAX_RETRIES = 0  # Retries of failed connections (int or urllib3.util.Retry)
+
+
+def create_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=MAX_RETRIES,
+                   pool_block=False, keep_alive=True, headers=None, http2=False):
+    """
+    Creates a requests session backed by a keep-alive connection pool
+
+    Notes:
+        * Cookies received in one response are sent with the following requests of the session
+        * A session can be passed to several BackgroundBrowser instances (also across threads) to share its pool
+        * Over HTTP/2 the concurrent requests of all the browsers sharing the session are multiplexed over a single
+          connection to each host, see transport
+
+    Args:
+        pool_connections (int): Number of hosts to cache connection pools for
+        pool_maxsize (int): Maximal number of connections saved in the pool of each host
+        max_retries (Union[int, urllib3.util.Retry]): Retry configuration for failed requests, only an int over
+                                                      HTTP/2
+        pool_block (bool): Whether to block when all connections to a host are in use, which turns pool_maxsize
+                           into a hard per-host limit rather than a limit of kept-alive connections
+        keep_alive (bool): Whether to reuse connections between requests
+        headers (dict): Headers to send with every request of the session
+        http2 (bool): Whether to send requests over HTTP/2, which requires httpx[http2]. Plain http urls are sent
+                      over HTTP/2 with prior knowledge (f.e. to a local mock server), rather than over HTTP/1.1.
+                      pool_connections is then unused, and pool_block limits the connections of all hosts together
+
+    Returns:
+        requests.Session:
+    """
+    session = requests.Session()
+    if http2:
+        # httpx is only imported by sessions that use it
+        from .transport import HTTP2Adapter
+
+        max_connections = pool_maxsize if pool_block else None
+        session.mount('https://', HTTP2Adapter(max_connections=max_connections, max_keepalive_connections=pool_maxsize,
+                                               max_retries=max_retries))
+        session.mount('http://', HTTP2Adapter(max_connections=max_connections, max_keepalive_connections=pool_maxsize,
+                                              max_retries=max_retries, prior_knowledge=True))
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              max_retries=max_retries,
+                              pool_block=pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    if not keep_alive:
+        session.headers['connection'] = 'close'
+    if headers:
+        session.headers.update(headers)
+
+    return session
+
+
+def wire_bytes(response):
+    """
+    Args:
+        response (requests.Response): Response whose body was read, whole or in part
+
+    Returns:
+        int: Size of the body that was received, as sent over the network (f.e. compressed)
+    """
+    # Both urllib3's responses and those of the HTTP/2 transport count the bytes they received
+    tell = getattr(response.raw, 'tell', None)
+    if tell is None:
+        return len(response.content)
+    return tell()
@@ -0,0 +1,210 @@
+"""
+Streaming downloads: pages are fed to a reader chunk by chunk while they are downloaded, and the download is stopped
+once the reader has seen the part of the page that is needed
+
+Notes:
+    * Google's results pages end with large scripts that are not needed to scan the results, so a page can usually
+      be cut short after its results
+    * A connection whose download was stopped can not be reused, so the next request opens a new one
+"""
+import codecs
+import urllib.parse
+
+import requests
+from lxml import etree, html
+
+from .payload import find_script_payload
+
+CHUNK_SIZE = 16 * 1024  # Bytes read at once from the connection
+
+
+class PageReader(object):
+    """
+    Consumes the body of a page while it is downloaded, and tells when enough of it was read
+    """
+
+    def start(self, encoding):
+        """
+        Prepares for a new body, a reader may be reused for several downloads (f.e. retries)
+
+        Args:
+            encoding (str): Encoding of the body, None if unknown
+        """
+        pass
+
+    def feed(self, chunk, content):
+        """
+        Args:
+            chunk (bytes): Newly downloaded part of the body
+            content (bytearray): Whole body downloaded so far, including the chunk
+
+        Returns:
+            bool: Whether the rest of the body is not needed
+        """
+        return False
+
+    def close(self):
+        """
+        Called once the download ended, whether the whole body was read or not
+        """
+        pass
+
+    @property
+    def document(self):
+        """
+        Returns:
+            lxml.html.HtmlElement: Tree of the downloaded body, if the reader built it. None otherwise
+        """
+        return None
+
+
+class PayloadReader(PageReader):
+    """
+    Scans the raw body for a script whose text starts with a known prefix (see payload), and is done once the
+    script ended. The tree is not built
+    """
+
+    def __init__(self, prefix):
+        """
+        Args:
+            prefix (str): Prefix of the script's text
+        """
+        self._prefix = prefix
+        self._raw_prefix = None
+        self._encoding = None
+        self._scanned = 0
+
+    def start(self, encoding):
+        self._encoding = encoding or 'utf-8'
+        try:
+            self._raw_prefix = self._prefix.encode(self._encoding)
+        except (LookupError, UnicodeError):
+            self._raw_prefix = None  # The whole body is read
+        self._scanned = 0
+
+    def feed(self, chunk, content):
+        if self._raw_prefix is None:
+            return False
+
+        # Each byte is scanned once, apart from the overlap with the previous chunk
+        if content.find(self._raw_prefix, max(0, self._scanned - len(self._raw_prefix))) == -1:
+            self._scanned = len(content)
+            return False
+        return find_script_payload(content, self._prefix, self._encoding) is not None
+
+
+class TreeReader(PageReader):
+    """
+    Builds the tree of the body incrementally while it is downloaded, and is done once an element with one of the
+    given ids ended
+    """
+
+    def __init__(self, element_ids):
+        """
+        Args:
+            element_ids (Iterable[str]): Ids of elements after which the rest of the page is not needed
+        """
+        self._element_ids = frozenset(element_ids)
+        self._parser = None
+        self._decoder = None
+        self._document = None
+
+    def start(self, encoding):
+        self._parser = etree.HTMLPullParser(events=('end',))
+        self._parser.set_element_class_lookup(html.HtmlElementClassLookup())
+        # Decoded as BackgroundBrowser does, rather than letting lxml guess the encoding
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self._document = None
+
+    def feed(self, chunk, content):
+        self._parser.feed(self._decoder.decode(chunk))
+        done = False
+        for _, element in self._parser.read_events():
+            if element.get('id') in self._element_ids:
+                done = True
+        return done
+
+    def close(self):
+        self._parser.feed(self._decoder.decode(b'', final=True))
+        try:
+            self._document = self._parser.close()
+        except etree.XMLSyntaxError:  # Empty body
+            self._document = None
+        self._parser = None
+
+    @property
+    def document(self):
+        return self._document
+
+
+class StreamedResponse(object):
+    """
+    Response whose body was downloaded through a reader, see read_streamed(). Reads as the response it wraps, with
+    the body that was read (possibly cut short) as its content
+    """
+
+    def __init__(self, response, content, truncated):
+        """
+        Args:
+            response (requests.Response): Response of a request sent with stream=True, closed
+            content (bytes): Body that was read
+            truncated (bool): Whether the download was stopped before the end of the body
+        """
+        self._response = response
+        self.content = content
+        self.truncated = truncated
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def apparent_encoding(self):
+        # Guessed as requests does, from the body that was read
+        return requests.compat.chardet.detect(self.content)['encoding']
+
+
+def read_streamed(response, reader, chunk_size=CHUNK_SIZE):
+    """
+    Downloads the body of a streamed response through a reader, stopping as soon as the reader is done
+
+    Args:
+        response (requests.Response): Response of a request sent with stream=True
+        reader (PageReader):
+        chunk_size (int): Bytes read at once
+
+    Returns:
+        StreamedResponse: The response, with the body that was read
+    """
+    reader.start(response.encoding)
+    content = bytearray()
+    stopped = False
+    try:
+        for chunk in response.iter_content(chunk_size):
+            content += chunk
+            if reader.feed(chunk, content):
+                stopped = True
+                break
+    finally:
+        reader.close()
+        response.close()
+    return StreamedResponse(response, bytes(content), stopped)
+
+
+def page_reader(url, element_ids, payload_prefix):
+    """
+    Chooses a reader for a Google page by its url
+
+    Args:
+        url (str): Absolute url of the page
+        element_ids (Iterable[str]): Ids of elements that end the part of standard search pages that is needed
+        payload_prefix (str): Prefix of the script of image results pages that is needed
+
+    Returns:
+        PageReader: None for pages that are read whole
+    """
+    parsed_url = urllib.parse.urlsplit(url)
+    if parsed_url.path != '/search':
+        return None
+    if 'isch' in urllib.parse.parse_qs(parsed_url.query).get('tbm', ()):
+        return PayloadReader(payload_prefix)
+    return TreeReader(element_ids)
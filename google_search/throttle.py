@@ -0,0 +1,287 @@
+import random
+import threading
+import time
+import urllib.parse
+
+from .const import CONSENT_HOST
+from .exceptions import CircuitOpen
+
+# Markers of Google's interstitial pages, searched for in the beginning of the page
+BLOCK_PAGE_MARKERS = (b'unusual traffic from your computer network', b'id="captcha-form"', b'g-recaptcha')
+_MARKERS_SEARCH_LIMIT = 64 * 1024  # Bytes
+
+
+class BlockReason(object):
+    RATE_LIMITED = 'rate limited'  # HTTP 429
+    UNAVAILABLE = 'service unavailable'  # HTTP 503, which Google also uses for its "sorry" page
+    UNUSUAL_TRAFFIC = 'unusual traffic'  # Captcha or "sorry" interstitial
+    CONSENT = 'consent'  # Cookie consent interstitial
+
+
+# Blocks that mean we send too many requests, as opposed to the consent interstitial
+THROTTLING_REASONS = (BlockReason.RATE_LIMITED, BlockReason.UNAVAILABLE, BlockReason.UNUSUAL_TRAFFIC)
+
+# Defaults of AdaptiveThrottle
+INITIAL_DELAY = 1.0  # Seconds between requests of an identity
+MIN_DELAY = 0.0
+MAX_DELAY = 30.0
+DELAY_DECREASE = 0.05  # Seconds, subtracted from the delay for each served request
+DELAY_INCREASE_FACTOR = 2.0  # Multiplies the delay for each block
+INITIAL_CONCURRENCY = 1  # Requests of an identity in flight at once
+MAX_CONCURRENCY = 8
+CONCURRENCY_DECREASE_FACTOR = 0.5  # Multiplies the concurrency for each block
+BACKOFF_BASE = 1.0  # Seconds, maximal backoff after the first block in a row, doubled for each following one
+BACKOFF_CAP = 120.0  # Seconds
+FAILURE_THRESHOLD = 5  # Blocks in a row that open the circuit of an identity
+OPEN_TIME = 300.0  # Seconds a circuit stays open until a trial request is let through
+MAX_RETRIES = 3  # Of a blocked request
+_POLL_INTERVAL = 0.05  # Seconds, between checks of a coroutine waiting for a free slot
+
+
+def detect_block(status_code, url, content):
+    """
+    Detects whether Google refused to serve a page, and why
+
+    Args:
+        status_code (int): HTTP status of the response
+        url (str): Final url of the response, after redirects
+        content (bytes): Body of the response
+
+    Returns:
+        str: Reason of the block (see BlockReason), None if the page was served
+    """
+    parsed_url = urllib.parse.urlparse(url)
+    if parsed_url.path.startswith('/sorry/'):
+        return BlockReason.UNUSUAL_TRAFFIC
+    if parsed_url.netloc == CONSENT_HOST:
+        return BlockReason.CONSENT
+    if status_code == 429:
+        return BlockReason.RATE_LIMITED
+
+    head = content[:_MARKERS_SEARCH_LIMIT]
+    if any(marker in head for marker in BLOCK_PAGE_MARKERS):
+        return BlockReason.UNUSUAL_TRAFFIC
+    if status_code == 503:
+        return BlockReason.UNAVAILABLE
+    return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """
+    Draws an exponential backoff delay with full jitter, so that clients that were blocked together do not retry
+    together
+
+    Args:
+        attempt (int): Number of blocks in a row, starting from 1
+        base (float): Maximal delay of the first attempt, in seconds
+        cap (float): Maximal delay of any attempt, in seconds
+
+    Returns:
+        float: Seconds
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class _IdentityState(object):
+    __slots__ = ('delay', 'concurrency', 'in_flight', 'next_time', 'blocks_in_a_row', 'open_until', 'last_reason',
+                 'trial_in_flight')
+
+    def __init__(self, delay, concurrency):
+        self.delay = delay
+        self.concurrency = concurrency  # Fractional, the number of requests allowed in flight is its floor
+        self.in_flight = 0
+        self.next_time = 0.0  # In time.monotonic() terms, when the next request may be sent
+        self.blocks_in_a_row = 0
+        self.open_until = None  # When the circuit may let a trial request through, None while it is closed
+        self.last_reason = None
+        self.trial_in_flight = False
+
+
+class Permit(object):
+    """
+    Allowance to send a single request, see AdaptiveThrottle.acquire(). Report how Google responded before it is
+    released, a permit that is released without a report (f.e. after a connection error) does not adjust the pacing
+    """
+
+    def __init__(self, throttle, identity, trial=False):
+        self._throttle = throttle
+        self._identity = identity
+        self._trial = trial  # Whether the request tests an open circuit
+        self._reported = False
+        self._reason = None
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def report(self, reason):
+        """
+        Args:
+            reason (str): Reason Google refused to serve the page (see BlockReason), None if it was served
+        """
+        self._reported = True
+        self._reason = reason
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._throttle._release(self._identity, self._trial, self._reported, self._reason)
+
+
+class AdaptiveThrottle(object):
+    """
+    Paces the requests of each egress identity according to how Google responds, to reach the highest rate that is
+    still served without tuning delays by hand. Meant to be shared by all the searchers of a process
+
+    Notes:
+        * AIMD: every served request shortens the delay between requests (additively) and raises the number of
+          requests allowed in flight (by about one per round of requests). Every throttling block multiplies the
+          delay and divides the concurrency
+        * After a block, the identity also backs off exponentially (with jitter) before its next request
+        * Circuit breaker: after `failure_threshold` blocks in a row the identity's circuit opens, and requests fail
+          fast with CircuitOpen instead of deepening the ban. Once `open_time` passes, a single trial request is let
+          through, which closes the circuit if served and opens it again if blocked
+        * Pacing is in addition to a RateLimiter, which may still be used to cap the rate
+    """
+
+    def __init__(self, initial_delay=INITIAL_DELAY, min_delay=MIN_DELAY, max_delay=MAX_DELAY,
+                 delay_decrease=DELAY_DECREASE, delay_increase_factor=DELAY_INCREASE_FACTOR,
+                 initial_concurrency=INITIAL_CONCURRENCY, max_concurrency=MAX_CONCURRENCY,
+                 concurrency_decrease_factor=CONCURRENCY_DECREASE_FACTOR, backoff_base=BACKOFF_BASE,
+                 backoff_cap=BACKOFF_CAP, failure_threshold=FAILURE_THRESHOLD, open_time=OPEN_TIME,
+                 max_retries=MAX_RETRIES):
+        """
+        Args:
+            initial_delay (float): Seconds between requests of an identity, before any response
+            min_delay (float): Lowest delay the pacing may reach
+            max_delay (float): Highest delay the pacing may reach
+            delay_decrease (float): Seconds subtracted from the delay for each served request
+            delay_increase_factor (float): Multiplier of the delay for each block
+            initial_concurrency (int): Requests of an identity in flight at once, before any response
+            max_concurrency (int): Highest concurrency the pacing may reach
+            concurrency_decrease_factor (float): Multiplier of the concurrency for each block
+            backoff_base (float): Maximal backoff in seconds after a first block, doubled for each following one
+            backoff_cap (float): Maximal backoff in seconds
+            failure_threshold (int): Blocks in a row that open the circuit of an identity
+            open_time (float): Seconds a circuit stays open until a trial request is let through
+            max_retries (int): Times searchers retry a blocked request before raising Blocked
+        """
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay_decrease = delay_decrease
+        self.delay_increase_factor = delay_increase_factor
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_decrease_factor = concurrency_decrease_factor
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.open_time = open_time
+        self.max_retries = max_retries
+
+        self._condition = threading.Condition()
+        self._states = {}
+
+    def acquire(self, identity=None):
+        """
+        Blocks until the identity may send a request
+
+        Args:
+            identity (str): Egress identity the request is sent through
+
+        Returns:
+            Permit: To report the response with, and release
+
+        Raises:
+            CircuitOpen: If the identity's circuit is open
+        """
+        with self._condition:
+            while True:
+                permit = self._try_acquire(identity)
+                if isinstance(permit, Permit):
+                    return permit
+                self._condition.wait(permit)
+
+    async def acquire_async(self, identity=None):
+        """
+        Asyncio version of acquire(). The throttle may be shared with threads, so a coroutine that has to wait for
+        a request in flight to be released checks again periodically
+        """
+        import asyncio  # Lazily, as in Reservation.wait_async()
+
+        while True:
+            with self._condition:
+                permit = self._try_acquire(identity)
+            if isinstance(permit, Permit):
+                return permit
+            await asyncio.sleep(permit)
+
+    def state(self, identity=None):
+        """
+        Returns:
+            dict: Current delay, concurrency, requests in flight, blocks in a row, and whether the circuit is open
+        """
+        with self._condition:
+            state = self._state(identity)
+            return {'delay': state.delay, 'concurrency': int(state.concurrency), 'in_flight': state.in_flight,
+                    'blocks_in_a_row': state.blocks_in_a_row, 'circuit_open': state.open_until is not None}
+
+    def _state(self, identity):
+        # Must be called with the lock held
+        state = self._states.get(identity)
+        if state is None:
+            state = self._states[identity] = _IdentityState(self.initial_delay, self.initial_concurrency)
+        return state
+
+    def _try_acquire(self, identity):
+        """
+        Must be called with the lock held
+
+        Returns:
+            Union[Permit, float]: Permit if a request is allowed, otherwise seconds to wait before trying again
+        """
+        state = self._state(identity)
+        now = time.monotonic()
+
+        trial = state.open_until is not None
+        if trial:
+            if now < state.open_until or state.trial_in_flight:
+                raise CircuitOpen(identity, state.last_reason, max(0.0, state.open_until - now))
+            state.trial_in_flight = True
+        elif state.in_flight >= max(1, int(state.concurrency)):
+            return _POLL_INTERVAL
+        elif now < state.next_time:
+            return state.next_time - now
+
+        state.in_flight += 1
+        state.next_time = max(now, state.next_time) + state.delay
+        return Permit(self, identity, trial)
+
+    def _release(self, identity, trial, reported, reason):
+        with self._condition:
+            state = self._state(identity)
+            state.in_flight -= 1
+            if trial:
+                state.trial_in_flight = False
+
+            if reported and reason is None:
+                state.blocks_in_a_row = 0
+                state.open_until = None
+                state.delay = max(self.min_delay, state.delay - self.delay_decrease)
+                state.concurrency = min(self.max_concurrency, state.concurrency + 1 / max(1.0, state.concurrency))
+            elif reported and reason in THROTTLING_REASONS:
+                now = time.monotonic()
+                state.blocks_in_a_row += 1
+                state.last_reason = reason
+                state.delay = min(self.max_delay, max(state.delay, self.delay_decrease) * self.delay_increase_factor)
+                state.concurrency = max(1.0, state.concurrency * self.concurrency_decrease_factor)
+                state.next_time = max(state.next_time,
+                                      now + backoff_delay(state.blocks_in_a_row, self.backoff_base, self.backoff_cap))
+                if trial or state.blocks_in_a_row >= self.failure_threshold:
+                    state.open_until = now + self.open_time
+
+            self._condition.notify_all()
@@ -0,0 +1,254 @@
+"""
+HTTP/2 transport for requests sessions, backed by httpx (pip install httpx[http2])
+
+All of the requests of a session go to a single host, so over HTTP/2 they are multiplexed as concurrent streams of
+a few connections, rather than taking a connection each. The transport is a requests adapter, so cookies, headers,
+redirects and streaming (see streaming) work as with the default adapter, and browsers do not tell them apart
+
+Notes:
+    * Requests are sent by httpx's asynchronous transport, on an event loop thread of the adapter, since its
+      synchronous HTTP/2 connections are not safe to share between threads. Browsers in any number of threads
+      then share the connection
+    * A stream whose download was stopped early is reset, while its connection stays open for the following requests
+    * Bodies are decompressed incrementally as they are read. Brotli is advertised and decoded if the brotli package
+      is installed, by requests' default accept-encoding header and by httpx
+    * TLS verification, client certificates and proxies are those that requests resolves for each request (f.e.
+      from the session, or from the environment). Requests that differ in them are sent through separate connections
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import http.client
+import os
+import ssl
+import threading
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+# Connection-specific headers are not allowed over HTTP/2
+HOP_BY_HOP_HEADERS = frozenset(('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'))
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Sends the requests of a session over HTTP/2, falling back to HTTP/1.1 for servers that do not negotiate it
+
+    Examples:
+        session = requests.Session()
+        session.mount('https://', HTTP2Adapter())
+    """
+
+    def __init__(self, max_connections=None, max_keepalive_connections=None, max_retries=0, prior_knowledge=False):
+        """
+        Args:
+            max_connections (int): Maximal number of connections open at once, None for no limit. Requests beyond
+                                   the limit wait for a connection. Applies to each proxy separately
+            max_keepalive_connections (int): Maximal number of idle connections kept alive, None for no limit
+            max_retries (int): Retries of failed connections
+            prior_knowledge (bool): Whether to send HTTP/2 without negotiating it first, which plain http urls
+                                    require (f.e. for a local mock server)
+        """
+        super().__init__()
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_keepalive_connections)
+        self._max_retries = max_retries
+        self._prior_knowledge = prior_knowledge
+        self._loop = None
+        self._loop_thread = None
+        self._transports = {}  # Of the loop, by proxy, TLS verification and client certificate
+        self._loop_lock = threading.Lock()  # Guards starting and stopping the loop, and its transports
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        headers = [(name, value) for name, value in request.headers.items()
+                   if name.lower() not in HOP_BY_HOP_HEADERS]
+        httpx_request = httpx.Request(request.method, request.url, headers=headers, content=request.body,
+                                      extensions={'timeout': _timeout(timeout).as_dict()})
+        with _translated_errors(request):
+            loop, transport = self._current_transport(select_proxy(request.url, proxies), verify, cert)
+            httpx_response = self._run(self._receive(transport, httpx_request, read=not stream), loop)
+        return self._build_response(request, httpx_response, loop)
+
+    async def _receive(self, transport, httpx_request, read):
+        # Bodies that are not streamed are read along with the response, rather than handed over frame by frame
+        httpx_response = await transport.handle_async_request(httpx_request)
+        if read:
+            try:
+                await httpx_response.aread()
+            finally:
+                await httpx_response.aclose()
+        return httpx_response
+
+    def close(self):
+        with self._loop_lock:
+            loop, thread, transports = self._loop, self._loop_thread, self._transports
+            self._loop = self._loop_thread = None
+            self._transports = {}
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_transports(transports.values()), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    async def _close_transports(self, transports):
+        # Requests still in flight (f.e. pages fetched ahead that are no longer needed) fail, rather than wait for a
+        # loop that is stopped
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        for transport in transports:
+            await transport.aclose()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _current_transport(self, proxy, verify, cert):
+        """
+        The loop is started once the adapter is first used, or used again after it was closed. Transports of the
+        loop are created once a request needs them
+
+        Args:
+            proxy (str): Url of the proxy to send the request through, None to send it directly
+            verify (Union[bool, str]): Whether to verify TLS certificates, or path of CA bundle to verify them with
+            cert (Union[str, tuple]): Client certificate, as requests takes it
+
+        Returns:
+            tuple[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]:
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name='http2-transport',
+                                                     daemon=True)
+                self._loop_thread.start()
+
+            key = (proxy, verify, cert)
+            transport = self._transports.get(key)
+            if transport is None:
+                # Settings from the environment were already resolved by requests
+                transport = self._transports[key] = httpx.AsyncHTTPTransport(
+                    verify=_ssl_context(verify, cert), trust_env=False, proxy=proxy, http1=not self._prior_knowledge,
+                    http2=True, retries=self._max_retries, limits=self._limits)
+            return self._loop, transport
+
+    def _run(self, coroutine, loop):
+        # Runs a coroutine on a loop of the adapter, and waits for its result. Coroutines of a closed loop fail
+        with self._loop_lock:
+            if loop is not self._loop:
+                coroutine.close()
+                raise requests.ConnectionError('The adapter was closed')
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError as e:
+            raise requests.ConnectionError('The adapter was closed') from e
+
+    def _build_response(self, request, httpx_response, loop):
+        # Same as HTTPAdapter.build_response() does with urllib3 responses
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _RawResponse(self, loop, request, httpx_response)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        requests.cookies.extract_cookies_to_jar(response.cookies, request, response.raw)
+        return response
+
+
+class _RawResponse(object):
+    # Stands in for the urllib3 response that requests reads bodies from
+
+    def __init__(self, adapter, loop, request, httpx_response):
+        self._adapter = adapter
+        self._loop = loop  # Of the connection the response is read from
+        self._request = request
+        self._response = httpx_response
+        # Read by requests to extract cookies, which need every set-cookie header rather than their joined values
+        self._original_response = _OriginalResponse(httpx_response.headers)
+
+    @property
+    def version(self):
+        return self._response.http_version
+
+    def stream(self, amt=None, decode_content=True):
+        if self._response.is_stream_consumed:
+            yield self._response.content
+            return
+
+        # Chunks are yielded as they were received (up to a frame each), rather than gathered to a size
+        chunks = self._response.aiter_bytes()
+        with _translated_errors(self._request):
+            while True:
+                chunk = self._adapter._run(_next_chunk(chunks), self._loop)
+                if chunk is None:
+                    break
+                yield chunk
+
+    def read(self, amt=None, decode_content=True):
+        return b''.join(self.stream(amt))
+
+    def tell(self):
+        # Bytes received so far, before decompression
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        if self._response.is_closed:
+            return
+        try:
+            self._adapter._run(self._response.aclose(), self._loop)
+        except requests.ConnectionError:
+            pass  # The adapter was closed, along with its connections
+
+    def release_conn(self):
+        self.close()
+
+
+class _OriginalResponse(object):
+    def __init__(self, headers):
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers.multi_items():
+            self.msg[name] = value
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+@contextlib.contextmanager
+def _translated_errors(request):
+    # Raises errors of httpx as the errors of requests that callers expect
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(e, request=request) from e
+    except httpx.TransportError as e:
+        raise requests.ConnectionError(e, request=request) from e
+
+
+def _timeout(timeout):
+    # requests' timeouts are either a number or a (connect, read) tuple
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _ssl_context(verify, cert):
+    # Same as requests' adapter interprets them: verify is a flag or a path of CA certificates, and cert is a path of
+    # a certificate (including its key), or a (certificate, key) tuple of paths
+    if isinstance(verify, str):
+        context = ssl.create_default_context(**{'capath' if os.path.isdir(verify) else 'cafile': verify})
+    else:
+        context = httpx.create_ssl_context(verify=bool(verify), trust_env=False)
+    if cert:
+        context.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+    return context
@@ -1,14 +1,19 @@
+import json
 import logging
-import numpy.random
+import random
 import re
 import time
 import urllib.parse
 
 from .const import GoogleRegex
+from .selector_registry import compiled_regex
 
 NORMAL_MIN_COEFFICIENT = 0.2  # determines minimal value proportionally to value
 NORMAL_SCALE_COEFFICIENT = 0.3  # determines scale proportionally to value
 
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'\s*')
+
 
 def non_bot_delay_exec(seconds, scale=None, min_value=None):
     """
@@ -41,22 +46,38 @@ def random_wait(seconds, scale=None, min_value=None):
         min_value (float): Minimal value of delay. This is to prevent negative or very small values.
                            By default, scales proportionally to the given value.
     """
+    seconds_to_wait = random_delay(seconds, scale, min_value)
+    time.sleep(seconds_to_wait)
+
+    return seconds_to_wait
+
+
+def random_delay(seconds, scale=None, min_value=None):
+    """
+    Draws a random delay based on normal distribution, without sleeping. For more details on arguments see random_wait()
+
+    Args:
+        seconds (float): Value around which the random delay will be determined
+        scale (float):
+        min_value (float):
+
+    Returns:
+        float: Delay in seconds
+    """
     if not scale:
         scale = NORMAL_SCALE_COEFFICIENT * seconds
     if not min_value:
         min_value = NORMAL_MIN_COEFFICIENT * seconds
 
-    seconds_to_wait = numpy.random.normal(seconds, scale)
+    seconds_to_wait = random.gauss(seconds, scale)
     if seconds_to_wait < min_value:
         seconds_to_wait = abs(min_value - seconds_to_wait) + min_value
 
-    time.sleep(seconds_to_wait)
-
     return seconds_to_wait
 
 
 def extract_value_from_url(key, url):
-    value = re.search(GoogleRegex.EXTRACT_URL_VALUE.format(key=key), url)
+    value = compiled_regex(GoogleRegex.EXTRACT_URL_VALUE.format(key=key)).search(url)
     if value:
         # If regex yielded result, take it
         return urllib.parse.unquote(value.group(0))
@@ -71,6 +92,16 @@ def parse_image_result_site_url(raw_link):
     return link
 
 
+def parse_search_result_url(raw_link):
+    link = raw_link
+    # Pages served without JavaScript wrap results' links with a redirect
+    if raw_link.startswith('/url?') or raw_link.startswith('https://www.google.com/url?'):
+        url = raw_link + '&'  # Values are only extracted when followed by '&'
+        link = extract_value_from_url(key='q', url=url) or extract_value_from_url(key='url', url=url)
+
+    return link
+
+
 def parse_image_result_image_url(raw_link):
     if not raw_link.startswith('data:'):
         image_url = raw_link
@@ -79,3 +110,61 @@ def parse_image_result_image_url(raw_link):
             # This means we prefer None value over Google's url ref
 
         return image_url
+
+
+def iter_json_array(text, start=0):
+    """
+    Lazily decodes the elements of a JSON array, one at a time. Text after the array is never read
+
+    Args:
+        text (str): Text containing the array
+        start (int): Index of the opening bracket of the array
+
+    Yields:
+        Decoded elements
+
+    Raises:
+        ValueError: If the text at the given index is not a valid JSON array
+    """
+    if text[start:start + 1] != '[':
+        raise ValueError(f'Expected JSON array at index {start}')
+
+    index = _WHITESPACE.match(text, start + 1).end()
+    if text[index:index + 1] == ']':
+        return
+
+    while True:
+        element, index = _JSON_DECODER.raw_decode(text, index)
+        yield element
+
+        index = _WHITESPACE.match(text, index).end()
+        delimiter = text[index:index + 1]
+        if delimiter == ']':
+            return
+        if delimiter != ',':
+            raise ValueError(f'Expected "," or "]" at index {index}')
+        index = _WHITESPACE.match(text, index + 1).end()
+
+
+def normalize_url(url):
+    """
+    Normalizes notation of a url, so that urls of the same resource can be compared
+
+    Notes:
+        * Scheme and host are lower-cased, fragment is dropped, empty path becomes '/' and trailing '/' is removed
+
+    Args:
+        url (str):
+
+    Returns:
+        str: Normalized url, None if url is None
+    """
+    if url is None:
+        return None
+
+    parsed_url = urllib.parse.urlsplit(url)
+    path = parsed_url.path
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+    return urllib.parse.urlunsplit((parsed_url.scheme.lower(), parsed_url.netloc.lower(), path or '/',
+                                    parsed_url.query, ''))
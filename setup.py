@@ -22,5 +22,11 @@ setup(
     ],
     packages=["google_search"],
     include_package_data=True,
-    install_requires=required
+    install_requires=required,
+    extras_require={
+        "http2": ["httpx[http2]", "brotli"],
+    },
+    entry_points={
+        "console_scripts": ["google-search=google_search.cli:main"],
+    },
 )
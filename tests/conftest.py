@@ -0,0 +1,29 @@
+import http.server
+import threading
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def serve():
+    """
+    Serves a request handler class on a local port, for tests that run without network access. Servers are shut down
+    along with the test module
+
+    Examples:
+        @pytest.fixture(scope='module')
+        def server_url(serve):
+            return serve(CookieHandler)
+    """
+    servers = []
+
+    def serve(handler):
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{server.server_address[1]}'
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
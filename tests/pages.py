@@ -0,0 +1,134 @@
+"""
+Builders of minimal Google-like pages, for tests that run without network access
+"""
+import http.server
+import json
+
+
+def image_result_entry(index):
+    metadata = {'2003': [None, f'id{index}', f'https://site{index}.com/page', f'Title {index}'],
+                '2008': [None, f'Title {index}'],
+                '183836587': [f'site{index}.com']}
+    return [1, [0, f'id{index}', [f'https://encrypted-tbn0.gstatic.com/images?q=tbn:{index}', 200, 150],
+                [f'https://site{index}.com/image.jpg', 600, 400], None, None, None, None, None, metadata]]
+
+
+def image_results_page(num_of_results):
+    grid_state = json.dumps([image_result_entry(i) for i in range(num_of_results)])
+    data = f'[null,[["GRID_STATE0",null,{grid_state},"","","",null]]]'
+    return ('<html><head><title>Google Images</title></head>'
+            '<body id="yDmH0d">'
+            '<div id="islrg"><div></div></div>'
+            f"<script nonce=\"x\">AF_initDataCallback({{key: 'ds:1', hash: '2', data:{data}, sideChannel: {{}}}});"
+            '</script>'
+            '</body></html>')
+
+
+def search_results_page(num_of_results, next_page=None, first_position=0, page_links=()):
+    results = ''.join(f'<div class="g"><a href="https://site{i}.com/"><h3>Title {i}</h3></a>'
+                      f'<cite>site{i}.com › page</cite><div class="VwiC3b">Snippet {i}</div></div>'
+                      for i in range(first_position, first_position + num_of_results))
+    links = ''.join(f'<a href="{page_link}">{index}</a>' for index, page_link in enumerate(page_links, 1))
+    next_link = f'<a id="pnnext" href="{next_page}">Next</a>' if next_page else ''
+    return f'<html><body><div id="rso">{results}</div><div id="foot">{links}{next_link}</div></body></html>'
+
+
+# Stands in for Google's scripts of an image results grid, given numOfResults, batchSize and loadImages
+IMAGE_GRID_SCRIPT = '''
+var grid = document.querySelector('#islrg > div');
+var showMore = document.querySelector('.mye4qd');
+var end = document.querySelector('.Yu2Dnd');
+var current = null;
+
+function imageUrl(i) {
+    return 'https://site' + i + '.com/image.jpg';
+}
+
+function open(i) {
+    setTimeout(function () {
+        current = i;
+        grid.children[i].querySelector('a').href =
+            'https://www.google.com/imgres?imgurl=' + encodeURIComponent(imageUrl(i)) + '&';
+        var panel = document.getElementById('islsp');
+        if (!panel) {
+            panel = document.createElement('div');
+            panel.id = 'islsp';
+            document.body.appendChild(panel);
+        }
+        panel.innerHTML = '<div class="BIB1wf"><a href="#"><img src="data:image/gif;base64,R0lGOD"></a>' +
+            '<a rel="noopener" href="https://site' + i + '.com/page"><div class="eYbsle">Title ' + i + '</div>' +
+            '<div class="S4aXnb">site' + i + '.com</div></a>' +
+            '<a class="gvi3cf" role="button"' + (i === numOfResults - 1 ? ' disabled="true"' : '') + '>Next</a></div>';
+        if (loadImages) {
+            setTimeout(function () { panel.querySelector('img').src = imageUrl(i); }, 50);
+        }
+    }, 50);
+}
+
+function addTile(i) {
+    var tile = document.createElement('div');
+    tile.innerHTML = '<a></a><a href="https://site' + i + '.com/page"><div>Title ' + i + '</div>' +
+        '<div><span>site' + i + '.com</span></div></a>';
+    tile.addEventListener('click', function (event) {
+        event.preventDefault();
+        open(i);
+    });
+    grid.appendChild(tile);
+}
+
+function addBatch() {
+    var first = grid.children.length;
+    for (var i = first; i < Math.min(first + batchSize, numOfResults); i++) {
+        addTile(i);
+    }
+    if (grid.children.length === numOfResults) {
+        showMore.style.display = 'none';
+        end.style.display = 'block';
+    }
+}
+
+addBatch();
+showMore.addEventListener('click', function () {
+    setTimeout(addBatch, 50);
+});
+document.addEventListener('click', function (event) {
+    if (event.target.closest('.gvi3cf') && current !== null && current < numOfResults - 1) {
+        event.preventDefault();
+        open(current + 1);
+    }
+});
+'''
+
+
+def image_grid_page(num_of_results, batch_size=None, load_images=True):
+    """
+    Image results grid, whose results open in a side panel when clicked. The full-size image of an opened result is
+    set a while after it was opened (never if load_images is False), while the link of its tile is set right away.
+    Tiles are attached batch_size at a time, whenever "show more" is clicked, until the end of results is displayed
+    """
+    variables = (f'var numOfResults = {num_of_results}; var batchSize = {batch_size or num_of_results};'
+                 f'var loadImages = {json.dumps(load_images)};')
+    return ('<html lang="en"><body>'
+            '<div id="islrg"><div></div></div>'
+            '<input type="button" class="mye4qd" value="Show more results">'
+            '<div class="OuJzKb Yu2Dnd" style="display: none">Looks like you\'ve reached the end</div>'
+            f'<script>{variables}{IMAGE_GRID_SCRIPT}</script>'
+            '</body></html>')
+
+
+class PageHandler(http.server.BaseHTTPRequestHandler):
+    # Base of the request handlers of local test servers, see conftest.serve()
+    protocol_version = 'HTTP/1.1'
+
+    def send_page(self, body, status=200, headers=()):
+        body = body.encode()
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('content-type', 'text/html; charset=utf-8')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
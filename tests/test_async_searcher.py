@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from google_search import AsyncSearcher
+from google_search.const import IMAGES_SECTION
+from google_search.navigation import Route
+from google_search.rate_limit import RateLimiter
+from tests.pages import PageHandler, image_results_page
+
+
+class ImageResultsHandler(PageHandler):
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = ImageResultsHandler
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(0.01)  # So that requests overlap
+            self.send_page(image_results_page(20))
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+
+@pytest.fixture(scope='module')
+def server_url(serve):
+    return serve(ImageResultsHandler)
+
+
+def test_concurrent_image_scans(server_url):
+    async def scan(searcher):
+        s = searcher.fork()
+        await s._non_delayed_get(f'{server_url}/search?tbm=isch')
+        return [result async for result in s.scan_image_results(max_iterations=5)]
+
+    async def main():
+        async with AsyncSearcher(concurrency=4) as searcher:
+            return await asyncio.gather(*(scan(searcher) for _ in range(30)))
+
+    ImageResultsHandler.max_in_flight = 0
+    all_results = asyncio.run(main())
+    assert len(all_results) == 30
+    for results in all_results:
+        assert [result.site for result in results] == [f'site{i}.com' for i in range(5)]
+    assert 1 < ImageResultsHandler.max_in_flight <= 4
+
+
+def test_sections_are_navigated_directly(server_url):
+    async def main():
+        async with AsyncSearcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10)) as s:
+            await s.search('cats')
+            await s.go_to_search_section(IMAGES_SECTION)
+            return s.last_route, s._current_url(), [result async for result in s.scan_image_results(max_iterations=2)]
+
+    route, url, results = asyncio.run(main())
+    assert route == Route.DIRECT
+    assert url == f'{server_url}/search?q=cats&tbm=isch'
+    assert [result.site for result in results] == ['site0.com', 'site1.com']
@@ -0,0 +1,58 @@
+import shutil
+import subprocess
+import urllib.parse
+
+import pytest
+from selenium import webdriver
+from selenium.webdriver.common.proxy import Proxy
+
+from google_search.browser_profile import LEAN_PROFILE, PerformanceProfile
+
+
+def test_lean_profile_options():
+    options = LEAN_PROFILE.firefox_options()
+    assert '-headless' in options.arguments
+    preferences = options.preferences
+    assert preferences['permissions.default.image'] == 2
+    assert preferences['browser.cache.disk.enable'] is False
+    pac = urllib.parse.unquote(preferences['network.proxy.autoconfig_url'].split(',', 1)[1])
+    assert pac == LEAN_PROFILE.proxy_auto_config()
+    assert "shExpMatch(url, '*/gen_204*')" in pac
+
+
+def test_profile_without_blocking():
+    profile = PerformanceProfile(headless=False, block_images=False, block_fonts=False, block_media=False,
+                                 blocked_url_patterns=(), disk_cache=True, window_size=None)
+    assert profile.preferences() == {}
+    assert profile.firefox_options().arguments == []
+
+
+@pytest.mark.parametrize('proxy, route', [(None, 'DIRECT'), ('10.0.0.1:3128', 'PROXY 10.0.0.1:3128'),
+                                          ('socks5://10.0.0.1:1080', 'SOCKS5 10.0.0.1:1080')])
+def test_blocking_composes_with_proxy(proxy, route):
+    pac = PerformanceProfile(proxy=proxy).proxy_auto_config()
+    assert pac.endswith(f": '{route}'; }}")
+    assert "? 'PROXY 127.0.0.1:9' :" in pac
+
+    # Without blocked urls, requests still go through the proxy
+    preferences = PerformanceProfile(blocked_url_patterns=(), proxy=proxy).preferences()
+    assert ('network.proxy.autoconfig_url' in preferences) == (proxy is not None)
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_proxy_auto_config_runs():
+    # shExpMatch is provided by the browser, a stand-in is enough to tell blocked urls apart
+    script = (PerformanceProfile(proxy='10.0.0.1:3128').proxy_auto_config() +
+              'function shExpMatch(url, pattern) { return url.includes("gen_204"); }'
+              'console.log(FindProxyForURL("https://www.google.com/gen_204?a", "www.google.com"));'
+              'console.log(FindProxyForURL("https://www.google.com/search?q=a", "www.google.com"));')
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    assert output.splitlines() == ['PROXY 127.0.0.1:9', 'PROXY 10.0.0.1:3128']
+
+
+def test_proxy_in_options_is_rejected():
+    options = webdriver.FirefoxOptions()
+    options.proxy = Proxy({'httpProxy': '10.0.0.1:3128'})
+    with pytest.raises(ValueError):
+        LEAN_PROFILE.firefox_options(options)
+
@@ -0,0 +1,73 @@
+import os
+import time
+
+from google_search import Searcher
+from google_search.cache import ResponseCache
+from google_search.page import Page
+from google_search.throttle import BLOCK_PAGE_MARKERS
+from tests.pages import PageHandler
+
+
+def store(cache, url, content, **kwargs):
+    cache.set(url, Page(url, content, 'utf-8'), **kwargs)
+
+
+def test_key_normalization():
+    assert ResponseCache.key('https://WWW.google.com/search?q=a&tbm=isch#top') == \
+        ResponseCache.key('https://www.google.com/search?tbm=isch&q=a')
+    assert ResponseCache.key('https://www.google.com/search?q=a', {'User-Agent': 'x'}) != \
+        ResponseCache.key('https://www.google.com/search?q=a', {'User-Agent': 'y'})
+    assert ResponseCache.key('https://www.google.com/search?q=a', {'cookie': 'x'}) == \
+        ResponseCache.key('https://www.google.com/search?q=a')
+
+
+def test_get_and_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    store(cache, 'https://www.google.com/search?q=a', b'<html>a</html>')
+    store(cache, 'https://www.google.com/search?q=b', b'<html>b</html>', ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('https://www.google.com/search?q=a') == Page('https://www.google.com/search?q=a',
+                                                                  b'<html>a</html>', 'utf-8')
+    assert cache.get('https://www.google.com/search?q=b') is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_size=2500)
+    bodies = {name: os.urandom(1000) for name in 'abc'}  # Incompressible
+    store(cache, 'https://www.google.com/search?q=a', bodies['a'])
+    store(cache, 'https://www.google.com/search?q=b', bodies['b'])
+    cache.get('https://www.google.com/search?q=a')
+    store(cache, 'https://www.google.com/search?q=c', bodies['c'])
+    assert cache.get('https://www.google.com/search?q=a') is not None
+    assert cache.get('https://www.google.com/search?q=b') is None
+    assert cache.get('https://www.google.com/search?q=c') is not None
+
+
+def test_searcher_serves_cached_page_without_delay(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    with Searcher(cache=cache) as s:
+        url = 'http://127.0.0.1:9/search?q=a'  # Nothing listens on the discard port
+        cache.set(url, Page(url, '<html><body><p>cached</p></body></html>'.encode(), 'utf-8'), s._cache_key_headers())
+
+        start_time = time.monotonic()
+        s._get(url)
+        assert time.monotonic() - start_time < 0.1
+        assert s._find_element_by_xpath('//p').text == 'cached'
+
+
+class InterstitialHandler(PageHandler):
+    def do_GET(self):
+        if self.path.startswith('/search'):
+            self.send_page(f'<html><body><p>{BLOCK_PAGE_MARKERS[0].decode()}</p></body></html>')
+        else:
+            self.send_page('<html><body><p>served</p></body></html>')
+
+
+def test_interstitials_are_not_cached(tmp_path, serve):
+    server_url = serve(InterstitialHandler)
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    with Searcher(cache=cache) as s:
+        s._non_delayed_get(f'{server_url}/search?q=a')
+        s._non_delayed_get(f'{server_url}/page')
+        assert cache.get(f'{server_url}/search?q=a', s._cache_key_headers()) is None
+        assert cache.get(f'{server_url}/page', s._cache_key_headers()) is not None
@@ -0,0 +1,92 @@
+import contextlib
+import json
+
+import pytest
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import cli
+from google_search.metrics import Counter
+
+NUM_OF_PAGES = 2
+IMAGE_RESULTS = 12
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=IMAGE_RESULTS, padding_kb=1)) as server:
+        yield server.url
+
+
+def run(server_url, tmp_path, lines, *args):
+    input_path = tmp_path / 'input.txt'
+    input_path.write_text(''.join(f'{line}\n' for line in lines), encoding='utf-8')
+    output_path = tmp_path / 'results.jsonl'
+    exit_code = cli.main([str(input_path), '--base-url', server_url, '--rate', '1000', '--workers', '3',
+                          '--output', str(output_path), *args])
+    return exit_code, [json.loads(line) for line in output_path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_identical_images(server_url, tmp_path):
+    urls = [f'https://example.com/image{i}.jpg' for i in range(5)]
+    exit_code, results = run(server_url, tmp_path, urls, '--max-results', '10')
+    assert exit_code == 0
+    assert len(results) == len(urls) * 10
+    assert {result['query'] for result in results} == set(urls)
+    assert {result['type'] for result in results} == {'ImageResult'}
+    assert {'title', 'site', 'link', 'image_url'} <= results[0].keys()
+
+
+def test_search_mode(server_url, tmp_path):
+    exit_code, results = run(server_url, tmp_path, ['cats', '', 'dogs'], '--mode', 'search', '--max-results', '0')
+    assert exit_code == 0
+    for query in ('cats', 'dogs'):
+        positions = [result['position'] for result in results if result['query'] == query]
+        assert positions == list(range(1, NUM_OF_PAGES * 10 + 1))
+
+
+def test_checkpoint_resumes(server_url, tmp_path):
+    checkpoint_path = tmp_path / 'done.txt'
+    checkpoint_path.write_text('query 0\nquery 1\n', encoding='utf-8')
+    queries = [f'query {i}' for i in range(4)]
+
+    _, results = run(server_url, tmp_path, queries, '--mode', 'images', '--checkpoint', str(checkpoint_path))
+    assert {result['query'] for result in results} == {'query 2', 'query 3'}
+    assert sorted(checkpoint_path.read_text(encoding='utf-8').splitlines()) == queries
+
+    # Output is appended to, nothing is left to run
+    _, resumed_results = run(server_url, tmp_path, queries, '--mode', 'images', '--checkpoint', str(checkpoint_path))
+    assert resumed_results == results
+
+
+def test_failed_queries_are_not_checkpointed(tmp_path):
+    job = cli.Job(lambda: FailingSearcher(), 'search', workers=2, checkpoint=cli.Checkpoint(str(tmp_path / 'done')))
+    with open(tmp_path / 'results.jsonl', 'w') as output:
+        job.run(['a', 'b'], output)
+    job._checkpoint.close()
+    assert (job.completed, job.failed) == (0, 2)
+    assert (tmp_path / 'done').read_text() == ''
+
+
+def test_metrics(server_url, tmp_path):
+    metrics_path = tmp_path / 'metrics.json'
+    run(server_url, tmp_path, ['cats', 'dogs'], '--mode', 'search', '--metrics', str(metrics_path))
+    assert json.loads(metrics_path.read_text())['counters'][Counter.QUERIES] == 2
+
+
+def test_input_errors_end_the_job(tmp_path):
+    def lines():
+        yield 'a'
+        raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+    job = cli.Job(lambda: FailingSearcher(), 'search', workers=2)
+    with open(tmp_path / 'results.jsonl', 'w') as output, pytest.raises(UnicodeDecodeError):
+        job.run(lines(), output)
+    assert job.failed == 1  # Queries read before the error are run
+
+
+class FailingSearcher(contextlib.AbstractContextManager):
+    def search(self, text, section=None):
+        raise RuntimeError('Blocked')
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from google_search.driver_pool import SeleniumSearcherPool
+
+
+class FakeSearcher(object):
+    started = 0
+
+    def __init__(self):
+        FakeSearcher.started += 1
+        self.alive = True
+        self.quit = False
+
+    def _is_alive(self):
+        return self.alive
+
+    def _quit(self):
+        self.quit = True
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    FakeSearcher.started = 0
+
+
+def test_searchers_are_reused_and_recycled():
+    with SeleniumSearcherPool(max_size=1, min_size=1, max_uses=2, searcher_factory=FakeSearcher) as pool:
+        assert FakeSearcher.started == 1
+        with pool.borrow() as first:
+            pass
+        with pool.borrow() as second:
+            pass
+        assert first is second and first.quit
+        with pool.borrow() as third:
+            assert third is not first
+    assert third.quit
+    assert FakeSearcher.started == 2
+
+
+def test_crashed_and_unhealthy_searchers_are_replaced():
+    pool = SeleniumSearcherPool(max_size=1, searcher_factory=FakeSearcher)
+    with pytest.raises(WebDriverException):
+        with pool.borrow() as crashed:
+            raise WebDriverException('Browser crashed')
+    assert crashed.quit
+
+    with pool.borrow() as unhealthy:
+        unhealthy.alive = False
+    with pool.borrow() as healthy:
+        assert healthy is not unhealthy and unhealthy.quit
+
+
+def test_checkout_waits_for_full_pool():
+    pool = SeleniumSearcherPool(max_size=1, searcher_factory=FakeSearcher)
+    searcher = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+
+    threading.Timer(0.05, pool.checkin, args=(searcher,)).start()
+    assert pool.checkout(timeout=1) is searcher
+
+
+def test_idle_searchers_are_evicted():
+    pool = SeleniumSearcherPool(max_size=2, idle_timeout=0.05, searcher_factory=FakeSearcher)
+    searcher = pool.checkout()
+    pool.checkin(searcher)
+    time.sleep(0.1)
+    assert pool.checkout() is not searcher
+    time.sleep(0.05)
+    assert searcher.quit
+
+
+def test_idle_searchers_are_evicted_without_traffic():
+    pool = SeleniumSearcherPool(max_size=2, idle_timeout=0.1, searcher_factory=FakeSearcher)
+    first, second = pool.checkout(), pool.checkout()
+    pool.checkin(first)
+    time.sleep(0.06)
+    pool.checkin(second)
+    time.sleep(0.07)
+    assert first.quit and not second.quit
+    time.sleep(0.1)
+    assert second.quit
+    pool.close()
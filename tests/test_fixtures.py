@@ -0,0 +1,59 @@
+import contextlib
+import itertools
+import os
+
+import pytest
+
+from google_search import Searcher
+from google_search.const import GoogleXpaths
+from google_search.exceptions import NoSuchElement
+from google_search.page import Page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.fixture
+def load():
+    """
+    Loads a fixture page into a new Searcher, searchers are closed along with the test
+    """
+    with contextlib.ExitStack() as searchers:
+        def load(name):
+            searcher = searchers.enter_context(Searcher())
+            with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'rb') as f:
+                searcher._load(Page('https://www.google.com/search?q=cat', f.read(), 'utf-8'))
+            return searcher
+
+        yield load
+
+
+@pytest.mark.parametrize('name', ['search_en', 'search_he', 'search_last_page_en', 'searchbyimage_en'])
+def test_search_results(load, name):
+    searcher = load(name)
+    num_of_results = len(searcher._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS))
+    results = list(itertools.islice(searcher.scan_search_results(prefetch=0), num_of_results))
+
+    assert num_of_results >= 8
+    assert [result.position for result in results] == list(range(1, num_of_results + 1))
+    assert all(result.title and result.site and result.link.startswith('http') for result in results)
+
+
+@pytest.mark.parametrize('name', ['images_en', 'images_he'])
+def test_image_results(load, name):
+    results = list(load(name).scan_image_results())
+
+    assert len(results) >= 50
+    assert all(result.image_url and result.link for result in results)
+
+
+def test_last_page_has_no_next_page(load):
+    assert load('search_en')._find_elements_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK)
+    with pytest.raises(NoSuchElement):
+        load('search_last_page_en')._find_element_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK)
+
+
+def test_search_by_image_page(load):
+    searcher = load('searchbyimage_en')
+    assert searcher._find_elements_by_xpath(GoogleXpaths.Search.IMAGE_SIZE_LABEL)
+    assert searcher._find_elements_by_xpath(GoogleXpaths.Search.ALL_SIZES_LINK)
+    assert searcher._find_elements_by_xpath(GoogleXpaths.Search.SIMILAR_IMAGES_LINK)
@@ -0,0 +1,89 @@
+import pytest
+
+from google_search.driver_pool import SeleniumSearcherPool
+from google_search.exceptions import Blocked
+from google_search.hybrid_searcher import HybridSearcher
+from google_search.metrics import Counter, Metrics, tracing
+from tests.pages import PageHandler
+from tests.test_throttle import fast_throttle
+
+
+class ConsentHandler(PageHandler):
+    def do_GET(self):
+        if 'SID=valid' not in (self.headers.get('cookie') or '') and not self.path.startswith('/sorry/'):
+            self.send_page('', status=302, headers=[('location', '/sorry/index')])
+            return
+        self.send_page(f'<html><body><p id="ua">{self.headers.get("user-agent")}</p></body></html>')
+
+
+class FakeBrowser(object):
+    sessions = 0
+
+    def __init__(self, cookie_value='valid'):
+        self._cookie_value = cookie_value
+        self._url = None
+
+    def _non_delayed_get(self, url):
+        self._url = url
+        FakeBrowser.sessions += 1
+
+    def accept_consent(self):
+        return False
+
+    def _current_url(self):
+        return self._url
+
+    def _get_cookies(self):
+        return [{'name': 'SID', 'value': self._cookie_value, 'domain': '127.0.0.1', 'path': '/'}]
+
+    def _get_user_agent(self):
+        return 'Browser/1.0'
+
+    def _is_alive(self):
+        return True
+
+
+@pytest.fixture(scope='module')
+def server_url(serve):
+    return serve(ConsentHandler)
+
+
+def test_session_is_established_by_browser(server_url):
+    pool = SeleniumSearcherPool(searcher_factory=FakeBrowser)
+    with HybridSearcher(pool) as s:
+        s._non_delayed_get(f'{server_url}/search?q=a')
+        assert s._find_element_by_xpath('//p[@id="ua"]').text == 'Browser/1.0'
+
+
+def test_blocked_session_is_refreshed(server_url):
+    FakeBrowser.sessions = 0
+    pool = SeleniumSearcherPool(searcher_factory=FakeBrowser)
+    with HybridSearcher(pool) as s:
+        s._session.cookies.clear()
+        s._non_delayed_get(f'{server_url}/search?q=a')
+        assert FakeBrowser.sessions == 2
+
+
+def test_unresolved_block_raises(server_url):
+    pool = SeleniumSearcherPool(searcher_factory=FakeBrowser, cookie_value='invalid')
+    with HybridSearcher(pool, max_refreshes=2) as s:
+        with pytest.raises(Blocked):
+            s._non_delayed_get(f'{server_url}/search?q=a')
+
+
+def test_requests_are_throttled(server_url):
+    FakeBrowser.sessions = 0
+    metrics = Metrics()
+    throttle = fast_throttle(max_retries=1)
+    pool = SeleniumSearcherPool(searcher_factory=FakeBrowser)
+    with tracing(metrics), HybridSearcher(pool, throttle=throttle) as s:
+        s._session.cookies.clear()
+        s._non_delayed_get(f'{server_url}/search?q=a')
+        assert s._find_element_by_xpath('//p[@id="ua"]').text == 'Browser/1.0'
+
+    # The block is retried by the throttle before the session is refreshed
+    assert FakeBrowser.sessions == 2
+    counters = metrics.snapshot()['counters']
+    assert (counters[Counter.BLOCKED], counters[Counter.RETRIES]) == (2, 1)
+    state = throttle.state()
+    assert (state['in_flight'], state['blocks_in_a_row']) == (0, 0)  # The served request was reported
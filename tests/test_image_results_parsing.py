@@ -0,0 +1,61 @@
+import re
+
+import pytest
+from lxml import html
+
+from google_search import Searcher
+from google_search.basic_searcher import BasicSearcher
+from google_search.const import GoogleRegex, GoogleXpaths
+from google_search.exceptions import NoSuchElement
+from google_search.page import Page
+from google_search.payload import find_script_payload
+from google_search.utils import iter_json_array
+from tests.pages import image_results_page
+
+
+def test_iter_json_array():
+    text = 'x = [ 1 , {"a": [2, "]"]} ,[3]\n] , "trailing garbage'
+    assert list(iter_json_array(text, text.index('['))) == [1, {'a': [2, ']']}, [3]]
+    assert list(iter_json_array('[ ]')) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array('[1 2]'))
+
+
+def test_parse_image_results_matches_regex_extraction():
+    script_text = image_results_page(30)
+    results = list(BasicSearcher._parse_image_results(script_text))
+    expected_count = len(re.search(GoogleRegex.EXTRACT_IMAGE_RESULTS_FROM_JSON, script_text).group(0).split('"2008"'))
+    assert len(results) == expected_count - 1 == 30
+    assert results[7].title == 'Title 7'
+    assert results[7].site == 'site7.com'
+    assert results[7].link == 'https://site7.com/page'
+    assert results[7].image_url == 'https://site7.com/image.jpg'
+
+
+def test_parse_image_results_stops_at_limit():
+    # Entries after the limit are not decoded, so they may even be malformed
+    script_text = image_results_page(3).replace('"GRID_STATE0",null,[', '"GRID_STATE0",null,[[1,[0]],[1,[0]],{bad')
+    assert len(list(BasicSearcher._parse_image_results(script_text, max_iterations=2))) == 2
+
+
+def test_parse_image_results_without_results():
+    with pytest.raises(NoSuchElement):
+        list(BasicSearcher._parse_image_results('AF_initDataCallback({})'))
+
+
+def test_find_script_payload():
+    page = image_results_page(3)
+    expected = html.fromstring(page).xpath(GoogleXpaths.ImageSearch.RESULTS_JSON)[0].text_content()
+    prefix = GoogleXpaths.ImageSearch.RESULTS_JSON_SCRIPT_PREFIX
+    assert find_script_payload(page.encode(), prefix) == expected
+    # Mentions of the prefix outside of a script's beginning are skipped
+    assert find_script_payload(f'<p>{prefix}</p><script>var a = "{prefix}";</script>'.encode(), prefix) is None
+
+
+def test_scan_image_results_without_building_tree():
+    with Searcher() as s:
+        s._load(Page('https://www.google.com/search?tbm=isch', image_results_page(5).encode(), 'utf-8'))
+        assert len(list(s.scan_image_results())) == 5
+        assert s._html is None
+        assert s._find_elements_by_xpath('//*[@id="islrg"]')
+        assert s._html is not None
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+
+import pytest
+
+import google_search
+from benchmarks.imports import IMPORTS, ROOT_DIR
+
+
+@pytest.mark.parametrize('name', sorted(IMPORTS))
+def test_heavy_packages_are_not_imported(name):
+    statement, forbidden = IMPORTS[name]
+    script = f'import sys\n{statement}\nprint(" ".join(sorted({{m.split(".")[0] for m in sys.modules}})))'
+    packages = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, check=True, stdout=subprocess.PIPE,
+                              universal_newlines=True).stdout.split()
+    assert not set(forbidden) & set(packages)
+
+
+def test_lazy_exports():
+    from google_search.searcher import Searcher
+
+    assert set(google_search.__all__) <= set(dir(google_search))
+    assert google_search.Searcher is Searcher
+    with pytest.raises(AttributeError):
+        google_search.NoSuchSearcher
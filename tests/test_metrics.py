@@ -0,0 +1,109 @@
+import json
+
+import lxml.html
+import pytest
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import Searcher
+from google_search.basic_searcher import parse_search_result
+from google_search.exceptions import NoSuchElement
+from google_search.metrics import Counter, Metrics, Observation, Stage, Tracer, current_tracer, set_default_tracer, \
+    timed, tracing
+from google_search.rate_limit import RateLimiter
+
+NUM_OF_PAGES = 3
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=20, padding_kb=1)) as server:
+        yield server.url
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_search_is_traced(server_url, prefetch):
+    metrics = Metrics()
+    with tracing(metrics), Searcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10)) as searcher:
+        searcher.search('cats')
+        assert len(list(searcher.scan_search_results(max_iterations=None, prefetch=prefetch))) == NUM_OF_PAGES * 10
+
+    snapshot = metrics.snapshot()
+    assert set(snapshot['stages']) == {Stage.WAIT, Stage.NETWORK, Stage.HTML_PARSE, Stage.XPATH, Stage.RESULTS_PARSE}
+    # A page beyond the last one may be fetched ahead
+    assert snapshot['stages'][Stage.NETWORK]['count'] >= NUM_OF_PAGES
+    assert snapshot['stages'][Stage.WAIT]['count'] >= NUM_OF_PAGES - 1  # The search itself is not delayed
+    assert {name: snapshot['counters'][name] for name in (Counter.QUERIES, Counter.PAGES, Counter.RESULTS)} == \
+        {Counter.QUERIES: 1, Counter.PAGES: NUM_OF_PAGES, Counter.RESULTS: NUM_OF_PAGES * 10}
+    assert snapshot['counters'][Counter.BYTES_DOWNLOADED] > 0
+    assert snapshot['observations'][Observation.RESULTS_PER_PAGE] == \
+        {'count': NUM_OF_PAGES, 'sum': NUM_OF_PAGES * 10, 'min': 10, 'max': 10}
+    assert snapshot['pages_per_query'] == NUM_OF_PAGES
+
+
+def test_image_search_is_traced(server_url):
+    metrics = Metrics()
+    with tracing(metrics), Searcher(base_url=server_url) as searcher:
+        searcher.search_image('https://example.com/cat.jpg')
+        searcher._non_delayed_get(searcher._planner.identical_images_url(searcher._current_url()))
+        results = list(searcher.scan_image_results(max_iterations=15))
+
+    snapshot = metrics.snapshot()
+    assert len(results) == snapshot['counters'][Counter.RESULTS] == 15
+    assert snapshot['stages'][Stage.RESULTS_PARSE]['count'] == 15
+    assert Stage.HTML_PARSE not in snapshot['stages']  # Results are found in the page's script without a tree
+
+
+def test_failed_parses_are_not_counted():
+    metrics = Metrics()
+    with tracing(metrics), pytest.raises(NoSuchElement):
+        parse_search_result(lxml.html.fromstring('<div class="g"><p>No title</p></div>'), 1, Searcher)
+
+    snapshot = metrics.snapshot()
+    assert Counter.RESULTS not in snapshot['counters']
+    assert snapshot['stages'][Stage.RESULTS_PARSE]['count'] == 1
+
+
+def test_disabled_by_default():
+    assert current_tracer() is None
+    with timed(Stage.XPATH) as timer:
+        assert timer is None
+
+
+def test_tracers():
+    class RecordingTracer(Tracer):
+        def __init__(self):
+            self.stages = []
+
+        def stage(self, name, seconds):
+            self.stages.append(name)
+
+    tracer = RecordingTracer()
+    set_default_tracer(tracer)
+    try:
+        with tracing(Metrics()) as metrics:
+            with timed(Stage.XPATH):
+                pass
+        with timed(Stage.NETWORK):
+            pass
+    finally:
+        set_default_tracer(None)
+
+    assert tracer.stages == [Stage.NETWORK]
+    assert metrics.snapshot()['stages'][Stage.XPATH]['count'] == 1
+
+
+def test_exporters():
+    metrics = Metrics(duration_buckets=(0.1, 1))
+    metrics.stage(Stage.NETWORK, 0.05)
+    metrics.stage(Stage.NETWORK, 0.5)
+    metrics.stage(Stage.NETWORK, 5)
+    metrics.increment(Counter.PAGES, 2)
+    metrics.observe(Observation.RESULTS_PER_PAGE, 10)
+
+    assert json.loads(metrics.to_json())['stages'][Stage.NETWORK]['buckets'] == {'0.1': 1, '1': 2}
+    lines = metrics.to_prometheus().splitlines()
+    assert 'google_search_stage_duration_seconds_bucket{stage="network",le="1"} 2' in lines
+    assert 'google_search_stage_duration_seconds_bucket{stage="network",le="+Inf"} 3' in lines
+    assert 'google_search_stage_duration_seconds_count{stage="network"} 3' in lines
+    assert 'google_search_pages_total 2' in lines
+    assert 'google_search_results_per_page_count 1' in lines
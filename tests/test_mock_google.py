@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+
+import pytest
+import requests
+
+from benchmarks import load_test
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer, add_mock_arguments, options_from_arguments
+from google_search import AsyncSearcher, Searcher
+from google_search.rate_limit import RateLimiter
+from google_search.throttle import BlockReason, detect_block
+
+NUM_OF_PAGES = 3
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=30, padding_kb=1)) as server:
+        yield server.url
+
+
+@pytest.fixture
+def searcher(server_url):
+    with Searcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10)) as s:
+        yield s
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_search_follows_pagination(searcher, prefetch):
+    searcher.search('cats')
+    results = list(searcher.scan_search_results(max_iterations=None, prefetch=prefetch))
+    assert [result.position for result in results] == list(range(1, NUM_OF_PAGES * 10 + 1))
+    assert results[0].title == 'Result 1 for cats'
+
+
+def test_search_by_image(searcher, server_url):
+    searcher.search_image('https://example.com/cat.jpg')
+    assert searcher._current_url().startswith(f'{server_url}/search?tbs=sbi')
+    searcher.navigate_to_identical_images()
+    assert len(list(searcher.scan_image_results())) == 30
+
+
+def test_async_searcher_base_url(server_url):
+    async def main():
+        async with AsyncSearcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10)) as searcher:
+            await searcher.fork().search('cats')
+            s = searcher.fork()
+            await s.search_image('https://example.com/cat.jpg')
+            await s.navigate_to_identical_images()
+            return [result async for result in s.scan_image_results(max_iterations=5)]
+
+    assert len(asyncio.run(main())) == 5
+
+
+def test_throttling_is_injected():
+    with MockGoogleServer(MockGoogleOptions(throttle_rate=1, padding_kb=1)) as server:
+        with Searcher(base_url=server.url, rate_limiter=RateLimiter(rate=1000)) as searcher:
+            with pytest.raises(requests.HTTPError) as error:
+                searcher.search('cats')
+
+    response = error.value.response
+    assert response.status_code == 429
+    assert detect_block(response.status_code, response.url, response.content) == BlockReason.UNUSUAL_TRAFFIC
+
+
+def test_load_test(server_url):
+    result = load_test.run(server_url, workers=4, queries=8, max_results=15)
+    assert (result.queries, len(result.latencies), sum(result.errors.values())) == (8, 8, 0)
+    assert len(load_test.report([result]).splitlines()) == 3
+
+
+def test_mock_arguments():
+    parser = argparse.ArgumentParser()
+    add_mock_arguments(parser.add_argument_group('mock server'))
+    options = options_from_arguments(parser.parse_args(['--pages', '3', '--latency', '0.1', '--compression']))
+    assert (options.pages, options.latency, options.compression) == (3, 0.1, True)
@@ -0,0 +1,58 @@
+import urllib.parse
+
+from google_search import Searcher
+from google_search.const import IMAGES_SECTION, NEWS_SECTION
+from google_search.navigation import NavigationPlanner, Route
+from google_search.page import Page
+
+
+def query(url):
+    return dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+
+
+def test_section_urls():
+    planner = NavigationPlanner()
+    assert query(planner.search_url('cute cats', IMAGES_SECTION)) == {'q': 'cute cats', 'tbm': 'isch'}
+    assert query(planner.section_url('https://www.google.com/search?q=a&start=10', 'news')) == {'q': 'a', 'tbm': 'nws'}
+    assert planner.section_url('http://127.0.0.1:8000/search?q=a&hl=he&tbm=nws&tbs=qdr:d', IMAGES_SECTION) == \
+        'http://127.0.0.1:8000/search?q=a&hl=he&tbs=qdr%3Ad&tbm=isch'
+    assert planner.section_parameter(('Shopping', 'קניות')) is None
+    assert planner.section_url('https://www.google.com/search?tbs=sbi:abc', NEWS_SECTION) is None
+
+
+def test_identical_images_url():
+    planner = NavigationPlanner(base_url='http://localhost:8000')
+    url = planner.identical_images_url('https://www.google.com/search?tbs=sbi:AMhZZ1&hl=en')
+    assert url.startswith('http://localhost:8000/search?')
+    assert query(url) == {'tbs': 'sbi:AMhZZ1', 'tbm': 'isch'}
+    assert planner.identical_images_url('https://www.google.com/search?q=a') is None
+
+
+def test_base_url():
+    planner = NavigationPlanner(base_url='http://localhost:8000/')
+    assert planner.search_url('a b') == 'http://localhost:8000/search?q=a+b'
+    assert planner.search_by_image_url('https://a.com/b.jpg?c=d') == \
+        'http://localhost:8000/searchbyimage?image_url=https%3A%2F%2Fa.com%2Fb.jpg%3Fc%3Dd'
+
+
+class RecordingSearcher(Searcher):
+    def __init__(self):
+        super().__init__()
+        self.requested_urls = []
+
+    def _get(self, url):
+        self.requested_urls.append(url)
+
+
+def test_navigation_routes():
+    with RecordingSearcher() as s:
+        s._load(Page('https://www.google.com/search?q=a', b'<html></html>', 'utf-8'))
+        s.go_to_search_section(IMAGES_SECTION)
+        assert s.last_route == Route.DIRECT
+        assert query(s.requested_urls[-1]) == {'q': 'a', 'tbm': 'isch'}
+
+        page = b'<html><div id="hdtb-msb"><a href="/search?q=a&tbm=shop">Shopping</a></div></html>'
+        s._load(Page('https://www.google.com/search?q=a', page, 'utf-8'))
+        s.go_to_search_section('Shopping')
+        assert s.last_route == Route.LINK
+        assert s.requested_urls[-1] == '/search?q=a&tbm=shop'
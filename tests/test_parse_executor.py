@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import Searcher
+from google_search.background_browser import BackgroundBrowser
+from google_search.exceptions import NoSuchElement
+from google_search.parse_executor import ParseExecutor, _PageParser
+from google_search.rate_limit import RateLimiter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+NUM_OF_PAGES = 3
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=30, padding_kb=1)) as server:
+        yield server.url
+
+
+@pytest.fixture(scope='module')
+def parse_executor():
+    with ParseExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def scan(server_url, parse_executor, prefetch):
+    with Searcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10),
+                  parse_executor=parse_executor) as searcher:
+        searcher.search('cats')
+        search_results = list(searcher.scan_search_results(max_iterations=25, prefetch=prefetch))
+        searcher.search_image('https://example.com/cat.jpg')
+        searcher.navigate_to_identical_images()
+        image_results = list(searcher.scan_image_results(max_iterations=20))
+    return search_results, image_results
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_results_match_in_process_parsing(server_url, parse_executor, prefetch):
+    search_results, image_results = scan(server_url, parse_executor, prefetch)
+    expected_search_results, expected_image_results = scan(server_url, None, prefetch)
+
+    assert [result.position for result in search_results] == list(range(1, 26))
+    assert [(r.title, r.site, r.link, r.snippet, r.position) for r in search_results] == \
+        [(r.title, r.site, r.link, r.snippet, r.position) for r in expected_search_results]
+    assert len(image_results) == 20
+    assert [(r.title, r.site, r.link, r.image_url) for r in image_results] == \
+        [(r.title, r.site, r.link, r.image_url) for r in expected_image_results]
+
+
+def test_pages_are_batched_while_workers_are_busy():
+    with open(os.path.join(FIXTURES_DIR, 'images_en.html'), 'rb') as f:
+        content = f.read()
+
+    with ParseExecutor(max_workers=1, batch_size=4) as executor:
+        futures = [executor.parse_image_results(content, 'utf-8', max_iterations=1)]
+        assert executor.batches_sent == 1  # Sent right away, while the worker was idle
+        futures += [executor.parse_image_results(content, 'utf-8', max_iterations=i + 1) for i in range(1, 12)]
+        assert [len(future.result()) for future in futures] == list(range(1, 13))
+
+    assert executor.pages_sent == 12
+    assert executor.batches_sent < 12
+
+
+def test_cancelled_pages_are_not_sent():
+    with open(os.path.join(FIXTURES_DIR, 'images_en.html'), 'rb') as f:
+        content = f.read()
+
+    with ParseExecutor(max_workers=1) as executor:
+        futures = [executor.parse_image_results(content, 'utf-8', max_iterations=i + 1) for i in range(4)]
+        # The first page was sent while the worker was idle, the rest wait for it
+        assert not futures[0].cancel()
+        assert futures[1].cancel() and futures[2].cancel()
+        assert len(futures[3].result()) == 4
+        assert len(futures[0].result()) == 1
+
+    assert executor.pages_sent == 2
+
+
+def test_errors_are_raised_per_page(parse_executor):
+    with open(os.path.join(FIXTURES_DIR, 'images_en.html'), 'rb') as f:
+        content = f.read()
+
+    good = parse_executor.parse_image_results(content, 'utf-8', max_iterations=3)
+    bad = parse_executor.parse_image_results(b'<html><body id="yDmH0d"></body></html>', 'utf-8')
+    assert len(good.result()) == 3
+    with pytest.raises(NoSuchElement):
+        bad.result()
+
+
+def test_workers_do_not_download():
+    parser = _PageParser()
+    assert not isinstance(parser, BackgroundBrowser)
+    assert not hasattr(parser, '_session')
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from google_search.rate_limit import RateLimiter, _lock_file, _unlock_file
+
+
+def test_burst_then_rate():
+    limiter = RateLimiter(rate=10, burst=3)
+    delays = [limiter.reserve('a').delay() for _ in range(5)]
+    assert delays[:3] == [0, 0, 0]
+    assert delays[3] == pytest.approx(0.1, abs=0.02)
+    assert delays[4] == pytest.approx(0.2, abs=0.02)
+
+
+def test_keys_are_independent():
+    limiter = RateLimiter(rate=1)
+    limiter.reserve(RateLimiter.key('https://www.google.com/search', 'proxy1'))
+    assert limiter.reserve(RateLimiter.key('https://www.google.com/search', 'proxy2')).delay() == 0
+    assert limiter.reserve(RateLimiter.key('https://www.google.com/imgres', 'proxy1')).delay() > 0.9
+
+
+def test_state_file_is_shared(tmp_path):
+    state_path = str(tmp_path / 'limiter.json')
+    first = RateLimiter(rate=2, state_path=state_path)
+    second = RateLimiter(rate=2, state_path=state_path)
+    assert first.reserve('a').delay() == 0
+    assert second.reserve('a').delay() == pytest.approx(0.5, abs=0.05)
+
+
+def test_locked_state_file_does_not_block_the_loop(tmp_path):
+    state_path = str(tmp_path / 'limiter.json')
+    limiter = RateLimiter(rate=2, state_path=state_path)
+
+    async def main():
+        with open(state_path, 'a+') as f:
+            _lock_file(f)  # As if another process was reserving
+            timer = threading.Timer(0.5, _unlock_file, (f,))
+            timer.start()
+            start_time = time.monotonic()
+            acquire = asyncio.ensure_future(limiter.acquire_async('a'))
+            await asyncio.sleep(0.05)
+            assert time.monotonic() - start_time < 0.3 and not acquire.done()
+            assert await acquire == 0
+            timer.join()
+
+    asyncio.run(main())
+
+
+def test_jitter_does_not_consume_budget():
+    limiter = RateLimiter(rate=100, burst=1, jitter=1)
+    reservations = [limiter.reserve('a') for _ in range(3)]
+    assert all(0 <= reservation.delay() <= 1.03 for reservation in reservations)
+    assert limiter._theoretical_arrival_times['a'] - reservations[0].start_time < 0.04
@@ -0,0 +1,56 @@
+import pickle
+
+import pytest
+
+from google_search.result import ImageResult, ResultBase, SearchResult
+from google_search.result_batch import ResultBatch
+
+
+def image_result(index, link=None):
+    return ImageResult(title=f'Title {index}', site=f'site{index % 3}.com',
+                       link=link or f'https://site{index}.com/page', image_url=f'https://site{index}.com/image.jpg')
+
+
+def test_results_are_hashable_by_normalized_key():
+    first = image_result(1, link='https://SITE1.com/page/#comments')
+    second = image_result(1, link='https://site1.com/page')
+    assert first == second
+    assert len({first, second, image_result(2)}) == 2
+    assert ResultBase('a', 'b', 'https://a.com') != ImageResult('a', 'b', 'https://a.com', None)
+
+
+def test_results_are_immutable_and_picklable():
+    result = image_result(1)
+    with pytest.raises(AttributeError):
+        result.title = 'Other'
+    with pytest.raises(AttributeError):
+        result.extra = 1
+    assert pickle.loads(pickle.dumps(result)).title == 'Title 1'
+
+
+def test_result_batch():
+    results = [image_result(i) for i in range(10)] + [image_result(3), ImageResult(None, 'site0.com', None, None)]
+    batch = ResultBatch(results=results)
+    assert len(batch) == 11
+    assert image_result(5) in batch
+    assert not batch.append(image_result(5))
+    assert list(batch) == results[:10] + results[11:]
+    assert batch[4].title == 'Title 4'
+    assert batch[-1].title is None
+    assert batch.column('site').distinct() == ['site0.com', 'site1.com', 'site2.com']
+
+
+def test_result_batch_of_search_results():
+    batch = ResultBatch(SearchResult, [SearchResult(f'Title {i}', 'site.com', f'https://site.com/{i}', None, i + 1)
+                                       for i in range(3)])
+    assert [result.position for result in batch] == [1, 2, 3]
+    assert batch[1] == SearchResult('Title 1', 'site.com', 'https://site.com/1', None, 2)
+
+
+def test_result_batch_without_positions():
+    results = [SearchResult('Title', 'site.com', 'https://site.com/', None, None),
+               SearchResult('Title', 'site.com', 'https://site.com/other', None, 0)]
+    batch = ResultBatch(SearchResult, results)
+    assert list(batch) == results
+    assert batch[0].position is None and batch[-1].position == 0
+    assert list(batch.column('position')) == [None, 0]
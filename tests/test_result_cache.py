@@ -0,0 +1,116 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from google_search import Searcher
+from google_search.result_cache import ResultCache
+
+
+def test_concurrent_callers_share_computation():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return ('result',)
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(cache.get_or_compute, 'key', compute) for _ in range(8)]
+        values = [future.result() for future in futures]
+
+    assert values == [('result',)] * 8
+    assert len(calls) == 1
+    assert cache.get_or_compute('key', lambda: pytest.fail('Value should be cached')) == ('result',)
+
+
+def test_failures_are_shared_but_not_cached():
+    cache = ResultCache()
+
+    def fail():
+        raise RuntimeError('blocked')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('key', fail)
+    assert cache.get_or_compute('key', lambda: 'ok') == 'ok'
+
+
+def test_ttl_and_eviction():
+    cache = ResultCache(ttl=0.05, max_entries=2)
+    for key in 'abc':
+        cache.get_or_compute(key, lambda: key)
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 'recomputed'
+    time.sleep(0.06)
+    assert cache.get_or_compute('a', lambda: 'expired') == 'expired'
+
+
+def test_async_callers_share_computation():
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute_async('key', compute) for _ in range(10)))
+
+    assert asyncio.run(main()) == ['result'] * 10
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_is_taken_over():
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def main():
+        leader = asyncio.ensure_future(cache.get_or_compute_async('key', compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(cache.get_or_compute_async('key', compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(main()) == ['result'] * 3
+    assert len(calls) == 2
+
+
+def test_threads_and_tasks_share_computation():
+    cache = ResultCache()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 'result'
+
+    async def compute_async():
+        return compute()
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        future = executor.submit(cache.get_or_compute, 'key', compute)
+        started.wait()
+        assert asyncio.run(cache.get_or_compute_async('key', compute_async)) == 'result'
+        assert future.result() == 'result'
+    assert len(calls) == 1
+
+
+def test_keys_of_hosts_differ():
+    with Searcher() as google, Searcher(base_url='http://127.0.0.1:8000') as mock:
+        assert google._identical_images_key('https://a.com/b.jpg', 10) != \
+            mock._identical_images_key('https://a.com/b.jpg', 10)
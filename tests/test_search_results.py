@@ -0,0 +1,78 @@
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from google_search import Searcher
+from google_search.rate_limit import RateLimiter
+from google_search.result import SearchResult
+from tests.pages import PageHandler, search_results_page
+
+NUM_OF_PAGES = 5
+LINKED_PAGES = 2  # Following pages that each page links to
+
+
+class SearchHandler(PageHandler):
+    requested_starts = []
+    following_pages_served = threading.Event()  # Following pages are held back while it is cleared
+
+    def do_GET(self):
+        start = int(urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get('start', ['0'])[0])
+        SearchHandler.requested_starts.append(start)
+        if start:
+            SearchHandler.following_pages_served.wait(timeout=5)
+        page = start // 10
+        next_page = f'/search?q=a&start={start + 10}' if page < NUM_OF_PAGES - 1 else None
+        page_links = [f'/search?q=a&start={linked_page * 10}'
+                      for linked_page in range(page + 1, min(page + 1 + LINKED_PAGES, NUM_OF_PAGES))]
+        self.send_page(search_results_page(10, next_page=next_page, first_position=start, page_links=page_links))
+
+
+@pytest.fixture(scope='module')
+def server_url(serve):
+    return serve(SearchHandler)
+
+
+@pytest.fixture
+def searcher(server_url):
+    SearchHandler.requested_starts = []
+    SearchHandler.following_pages_served.set()
+    with Searcher(rate_limiter=RateLimiter(rate=1000, burst=10)) as s:
+        s._non_delayed_get(f'{server_url}/search?q=a')
+        yield s
+
+
+def test_parse_search_result(searcher):
+    result = next(searcher.scan_search_results(max_iterations=1))
+    assert result == SearchResult('Title 0', 'site0.com', 'https://site0.com/', 'Snippet 0', 1)
+    assert (result.title, result.site, result.snippet, result.position) == ('Title 0', 'site0.com', 'Snippet 0', 1)
+
+
+@pytest.mark.parametrize('prefetch', [0, 1, 3])
+def test_pages_are_scanned_in_order(searcher, prefetch):
+    results = list(searcher.scan_search_results(max_iterations=None, prefetch=prefetch))
+    assert [result.position for result in results] == list(range(1, 10 * NUM_OF_PAGES + 1))
+    assert [result.title for result in results] == [f'Title {i}' for i in range(10 * NUM_OF_PAGES)]
+    # Pages are fetched ahead only as far as they are linked, never beyond the last one
+    assert sorted(SearchHandler.requested_starts) == [page * 10 for page in range(NUM_OF_PAGES)]
+
+
+def test_prefetching_stops_at_max_iterations(searcher):
+    results = list(searcher.scan_search_results(max_iterations=25, prefetch=3))
+    assert len(results) == 25
+    assert sorted(SearchHandler.requested_starts) == [0, 10, 20]
+
+
+def test_early_break_drops_prefetched_pages(searcher):
+    SearchHandler.following_pages_served.clear()
+    results = searcher.scan_search_results(max_iterations=None, prefetch=2)
+    next(results)
+    start_time = time.monotonic()
+    results.close()
+    # Pages that were fetched ahead are not waited for
+    assert time.monotonic() - start_time < 0.5
+
+    SearchHandler.following_pages_served.set()
+    time.sleep(0.2)  # Nothing more is fetched once they arrive
+    assert sorted(SearchHandler.requested_starts) == [0, 10, 20]
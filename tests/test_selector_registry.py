@@ -0,0 +1,32 @@
+import threading
+
+from lxml import html
+
+from google_search.selector_registry import FallbackSelectors, compiled_regex, compiled_xpath
+from google_search.utils import extract_value_from_url
+
+
+def test_compiled_xpath_is_reused_per_thread():
+    xpath = compiled_xpath('//a/@href')
+    assert compiled_xpath('//a/@href') is xpath
+    assert xpath(html.fromstring('<div><a href="x">y</a></div>')) == ['x']
+
+    other_thread_xpaths = []
+    thread = threading.Thread(target=lambda: other_thread_xpaths.append(compiled_xpath('//a/@href')))
+    thread.start()
+    thread.join()
+    assert other_thread_xpaths[0] is not xpath
+
+
+def test_compiled_regex_and_url_values():
+    assert compiled_regex('a+') is compiled_regex('a+')
+    url = 'https://www.google.com/imgres?imgurl=https%3A%2F%2Fa.com%2Fb.jpg&imgrefurl=x'
+    assert extract_value_from_url('imgurl', url) == 'https://a.com/b.jpg'
+
+
+def test_fallback_selectors_learn_per_context():
+    selectors = FallbackSelectors(('he', 'en', 'other'))
+    assert [option for _, option in selectors.ordered('en')] == ['he', 'en', 'other']
+    selectors.matched(1, 'en')
+    assert [option for _, option in selectors.ordered('en')] == ['en', 'he', 'other']
+    assert [option for _, option in selectors.ordered('he')] == ['he', 'en', 'other']
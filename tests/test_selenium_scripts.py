@@ -0,0 +1,53 @@
+import time
+import urllib.parse
+
+import pytest
+
+from google_search.result import ImageResult
+from google_search.selenium_searcher import MAX_DELAY
+from tests import TestingSeleniumSearcher
+from tests.pages import PageHandler, image_grid_page
+
+NUM_OF_RESULTS = 5
+
+
+class ImageGridHandler(PageHandler):
+    def do_GET(self):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        self.send_page(image_grid_page(int(query.get('num', NUM_OF_RESULTS)), batch_size=int(query.get('batch', 0)),
+                                       load_images=query.get('load_images') == '1'))
+
+
+@pytest.fixture(scope='module')
+def server_url(serve):
+    return serve(ImageGridHandler)
+
+
+@pytest.mark.parametrize('load_images', [True, False])
+def test_opened_image_results_are_extracted_by_script(server_url, monkeypatch, load_images):
+    with TestingSeleniumSearcher() as s:
+        round_trips = []
+        execute_async_script = s._driver.execute_async_script
+        monkeypatch.setattr(s._driver, 'execute_async_script',
+                            lambda *args: round_trips.append(args) or execute_async_script(*args))
+        monkeypatch.setattr(s, '_images_enabled', lambda: load_images)
+        monkeypatch.setattr(s, '_get_result_image_url', lambda index: pytest.fail('Image url should be extracted'))
+
+        s._non_delayed_get(f'{server_url}/search?tbm=isch&load_images={int(load_images)}')
+        results = list(s.scan_image_results_by_opening(max_iterations=10))
+
+    assert results == [ImageResult(f'Title {i}', f'site{i}.com', f'https://site{i}.com/page',
+                                   f'https://site{i}.com/image.jpg') for i in range(NUM_OF_RESULTS)]
+    assert len(round_trips) == NUM_OF_RESULTS
+
+
+def test_shallow_scan_follows_show_more_until_the_end(server_url):
+    with TestingSeleniumSearcher() as s:
+        s._non_delayed_get(f'{server_url}/search?tbm=isch&num=25&batch=10')
+        start = time.monotonic()
+        results = list(s.shallow_scan_image_results())
+        duration = time.monotonic() - start
+
+    assert [(result.title, result.site) for result in results] == [(f'Title {i}', f'site{i}.com') for i in range(25)]
+    # The end of results is displayed, rather than waited for tiles that will not come
+    assert duration < MAX_DELAY / 2
@@ -0,0 +1,33 @@
+import pytest
+
+from google_search import Searcher
+from google_search.session import create_session
+from tests.pages import PageHandler
+
+
+class CookieHandler(PageHandler):
+    def do_GET(self):
+        self.send_page(f'<html><body><p id="cookie">{self.headers.get("cookie")}</p></body></html>',
+                       headers=[('set-cookie', 'NID=1; Path=/')])
+
+
+@pytest.fixture(scope='module')
+def server_url(serve):
+    return serve(CookieHandler)
+
+
+def test_cookies_carry_over(server_url):
+    with Searcher() as s:
+        s._non_delayed_get(f'{server_url}/first')
+        assert s._find_element_by_xpath('//p[@id="cookie"]').text == 'None'
+        s._non_delayed_get('/second')
+        assert s._find_element_by_xpath('//p[@id="cookie"]').text == 'NID=1'
+
+
+def test_shared_session_is_not_closed_by_browser(server_url):
+    session = create_session(pool_maxsize=2)
+    with Searcher(session=session) as s:
+        s._non_delayed_get(f'{server_url}/')
+    with Searcher(session=session) as s:
+        s._non_delayed_get(f'{server_url}/')
+        assert s._find_element_by_xpath('//p[@id="cookie"]').text == 'NID=1'
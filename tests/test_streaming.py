@@ -0,0 +1,137 @@
+import itertools
+import os
+
+import pytest
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import Searcher
+from google_search.cache import ResponseCache
+from google_search.const import GoogleXpaths
+from google_search.metrics import Counter, Metrics, tracing
+from google_search.page import Page
+from google_search.rate_limit import RateLimiter
+from google_search.streaming import PayloadReader, TreeReader, page_reader, read_streamed
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+NUM_OF_PAGES = 3
+
+
+class ChunkedResponse(object):
+    # Stands in for a streamed requests.Response
+    encoding = 'utf-8'
+
+    def __init__(self, content):
+        self.content = content
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            self.chunks_read += 1
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'rb') as f:
+        return f.read()
+
+
+def load(content, document=None):
+    searcher = Searcher()
+    searcher._load(Page('https://www.google.com/search?q=cat', content, 'utf-8', document))
+    return searcher
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=30, padding_kb=64)) as server:
+        yield server.url
+
+
+@pytest.mark.parametrize('name', ['search_en', 'search_last_page_en', 'searchbyimage_en'])
+def test_tree_reader_stops_after_results(name):
+    content = fixture(name)
+    response = ChunkedResponse(content)
+    reader = TreeReader([GoogleXpaths.Search.FOOTER_ID])
+
+    streamed_response = read_streamed(response, reader, chunk_size=8 * 1024)
+    assert streamed_response.truncated
+    assert response.closed
+    assert len(streamed_response.content) < len(content)
+
+    full = load(content)
+    streamed = load(streamed_response.content, reader.document)
+    assert streamed._html is reader.document
+    num_of_results = len(full._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS))
+    assert num_of_results
+    assert (list(itertools.islice(streamed.scan_search_results(prefetch=0), num_of_results)) ==
+            list(itertools.islice(full.scan_search_results(prefetch=0), num_of_results)))
+    assert (bool(streamed._find_elements_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK)) ==
+            bool(full._find_elements_by_xpath(GoogleXpaths.Search.NEXT_PAGE_LINK)))
+
+
+@pytest.mark.parametrize('name', ['images_en', 'images_he'])
+def test_payload_reader_stops_after_script(name):
+    content = fixture(name)
+    response = ChunkedResponse(content)
+
+    streamed_response = read_streamed(response, PayloadReader(GoogleXpaths.ImageSearch.RESULTS_JSON_SCRIPT_PREFIX),
+                                      chunk_size=1000)
+    assert streamed_response.truncated
+    assert len(streamed_response.content) < len(content)
+    assert list(load(streamed_response.content).scan_image_results()) == list(load(content).scan_image_results())
+
+
+def test_reader_reads_whole_page_without_marker():
+    content = b'<html><body><div id="rso"></div></body></html>'
+    response = ChunkedResponse(content)
+    reader = TreeReader([GoogleXpaths.Search.FOOTER_ID])
+    streamed_response = read_streamed(response, reader, chunk_size=10)
+    assert not streamed_response.truncated
+    assert streamed_response.content == content
+    assert streamed_response.encoding == 'utf-8'
+    assert reader.document.xpath('//*[@id="rso"]')
+
+
+def test_page_reader():
+    assert isinstance(page_reader('https://www.google.com/search?q=a&tbm=isch', ['foot'], 'x'), PayloadReader)
+    assert isinstance(page_reader('https://www.google.com/search?q=a', ['foot'], 'x'), TreeReader)
+    assert page_reader('https://www.google.com/searchbyimage?image_url=a', ['foot'], 'x') is None
+
+
+def test_streaming_searcher(server_url):
+    def run(streaming):
+        metrics = Metrics()
+        with tracing(metrics), Searcher(base_url=server_url, rate_limiter=RateLimiter(rate=1000, burst=10),
+                                        streaming=streaming) as searcher:
+            searcher.search('cats')
+            search_results = list(searcher.scan_search_results(max_iterations=None, prefetch=2))
+            searcher.search_image('https://example.com/cat.jpg')
+            searcher.navigate_to_identical_images()
+            image_results = list(searcher.scan_image_results())
+        return search_results, image_results, metrics.snapshot()['counters']
+
+    search_results, image_results, counters = run(streaming=False)
+    streamed_search_results, streamed_image_results, streamed_counters = run(streaming=True)
+
+    assert len(streamed_search_results) == NUM_OF_PAGES * 10
+    assert streamed_search_results == search_results
+    assert streamed_image_results == image_results
+    assert streamed_counters[Counter.EARLY_CLOSES] >= NUM_OF_PAGES + 1  # And a page fetched ahead, at times
+    assert streamed_counters[Counter.BYTES_DOWNLOADED] < counters[Counter.BYTES_DOWNLOADED]
+
+
+def test_truncated_pages_are_not_cached(server_url, tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    url = f'{server_url}/search?q=cats'
+    with Searcher(cache=cache, streaming=True, rate_limiter=RateLimiter(rate=1000, burst=10)) as searcher:
+        searcher._get(url)
+
+    assert cache.get(url, searcher._cache_key_headers()) is None
+    with Searcher(cache=cache) as searcher:
+        searcher._get(url)
+        assert searcher._find_elements_by_xpath(GoogleXpaths.Search.RESULTS_DIVS)
+    assert cache.get(url, searcher._cache_key_headers()).content == searcher._content
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import AsyncSearcher, Searcher
+from google_search.exceptions import Blocked, CircuitOpen
+from google_search.metrics import Counter, Metrics, tracing
+from google_search.throttle import AdaptiveThrottle, BlockReason, backoff_delay
+
+NUM_OF_PAGES = 3
+
+
+def fast_throttle(**options):
+    options = {'initial_delay': 0.0, 'delay_decrease': 0.01, 'backoff_base': 0.01, 'backoff_cap': 0.05,
+               'max_retries': 10, 'failure_threshold': 100, **options}
+    return AdaptiveThrottle(**options)
+
+
+@pytest.fixture(scope='module')
+def throttling_server_url():
+    options = MockGoogleOptions(pages=NUM_OF_PAGES, image_results=20, padding_kb=1, throttle_rate=0.2,
+                                unavailable_rate=0.1, seed=3)
+    with MockGoogleServer(options) as server:
+        yield server.url
+
+
+def test_backoff_delay_grows_up_to_cap():
+    assert all(0 <= backoff_delay(1, base=1, cap=100) <= 1 for _ in range(100))
+    assert all(0 <= backoff_delay(4, base=1, cap=100) <= 8 for _ in range(100))
+    assert all(backoff_delay(30, base=1, cap=5) <= 5 for _ in range(100))
+
+
+def test_aimd():
+    throttle = AdaptiveThrottle(initial_delay=0.1, delay_decrease=0.02, initial_concurrency=2, max_concurrency=4,
+                                backoff_base=0.0)
+    for _ in range(3):
+        with throttle.acquire() as permit:
+            permit.report(None)
+    state = throttle.state()
+    assert state['delay'] == pytest.approx(0.04)
+    assert state['concurrency'] == 3
+
+    with throttle.acquire() as permit:
+        permit.report(BlockReason.RATE_LIMITED)
+    state = throttle.state()
+    assert state['delay'] == pytest.approx(0.08)
+    assert state['concurrency'] == 1
+    assert state['blocks_in_a_row'] == 1
+
+
+def test_unreported_and_consent_do_not_adjust():
+    throttle = fast_throttle(initial_delay=0.01)
+    with pytest.raises(ConnectionError):
+        with throttle.acquire():
+            raise ConnectionError()
+    with throttle.acquire() as permit:
+        permit.report(BlockReason.CONSENT)
+    assert throttle.state() == {'delay': 0.01, 'concurrency': 1, 'in_flight': 0, 'blocks_in_a_row': 0,
+                                'circuit_open': False}
+
+
+def test_concurrency_limit():
+    throttle = fast_throttle(initial_concurrency=1)
+    permit = throttle.acquire('a')
+    throttle.acquire('b').release()  # Identities are limited separately
+    with throttle._condition:
+        assert isinstance(throttle._try_acquire('a'), float)  # Seconds to wait
+    permit.release()
+    throttle.acquire('a').release()
+
+
+def test_circuit_breaker():
+    throttle = fast_throttle(failure_threshold=2, open_time=0.2)
+    for _ in range(2):
+        with throttle.acquire('proxy') as permit:
+            permit.report(BlockReason.UNUSUAL_TRAFFIC)
+    assert throttle.state('proxy')['circuit_open']
+
+    with pytest.raises(CircuitOpen) as error:
+        throttle.acquire('proxy')
+    assert error.value.reason == BlockReason.UNUSUAL_TRAFFIC
+    assert isinstance(error.value, Blocked)
+    throttle.acquire('other').release()
+
+    # A blocked trial opens the circuit again
+    time.sleep(0.2)
+    with throttle.acquire('proxy') as permit:
+        with pytest.raises(CircuitOpen):
+            throttle.acquire('proxy')  # Only the trial is let through
+        permit.report(BlockReason.RATE_LIMITED)
+    with pytest.raises(CircuitOpen):
+        throttle.acquire('proxy')
+
+    # A served trial closes it
+    time.sleep(0.2)
+    with throttle.acquire('proxy') as permit:
+        permit.report(None)
+    assert not throttle.state('proxy')['circuit_open']
+    throttle.acquire('proxy').release()
+
+
+def test_searcher_retries_blocked_requests(throttling_server_url):
+    metrics = Metrics()
+    throttle = fast_throttle(max_concurrency=2)
+    with tracing(metrics), Searcher(base_url=throttling_server_url, throttle=throttle) as searcher:
+        for i in range(5):
+            searcher.search(f'query {i}')
+            assert len(list(searcher.scan_search_results(max_iterations=None, prefetch=2))) == NUM_OF_PAGES * 10
+
+    counters = metrics.snapshot()['counters']
+    assert counters[Counter.BLOCKED] > 0
+    assert counters[Counter.RETRIES] == counters[Counter.BLOCKED]
+
+
+def test_searcher_gives_up():
+    with MockGoogleServer(MockGoogleOptions(throttle_rate=1.0)) as server:
+        with Searcher(base_url=server.url, throttle=fast_throttle(max_retries=2, failure_threshold=10)) as searcher:
+            with pytest.raises(Blocked) as error:
+                searcher.search('cats')
+    assert error.value.reason == BlockReason.UNUSUAL_TRAFFIC
+
+
+def test_async_searcher_retries_blocked_requests(throttling_server_url):
+    async def main():
+        async with AsyncSearcher(base_url=throttling_server_url, throttle=fast_throttle()) as searcher:
+            async def identical_images(i):
+                s = searcher.fork()
+                await s.search_image(f'https://example.com/image{i}.jpg')
+                await s.navigate_to_identical_images()
+                return [result async for result in s.scan_image_results()]
+
+            return await asyncio.gather(*map(identical_images, range(5)))
+
+    metrics = Metrics()
+    with tracing(metrics):
+        results = asyncio.run(main())
+    assert [len(image_results) for image_results in results] == [20] * 5
+    assert metrics.snapshot()['counters'][Counter.BLOCKED] > 0
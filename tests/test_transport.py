@@ -0,0 +1,119 @@
+import concurrent.futures
+
+import pytest
+import requests
+
+from benchmarks.mock_google import MockGoogleOptions, MockGoogleServer
+from google_search import Searcher
+from google_search.metrics import Counter, Metrics, tracing
+from google_search.rate_limit import RateLimiter
+from google_search.session import create_session
+from tests.pages import PageHandler
+from tests.test_session import CookieHandler
+
+pytest.importorskip('httpx')
+pytest.importorskip('h2')
+
+from google_search.transport import HTTP2Adapter  # noqa: E402
+
+NUM_OF_PAGES = 3
+
+
+@pytest.fixture
+def http2_server():
+    with MockGoogleServer(MockGoogleOptions(pages=NUM_OF_PAGES, image_results=30, padding_kb=16, compression=True),
+                          http2=True) as server:
+        yield server
+
+
+def search(metrics, session, base_url, index, streaming=False):
+    # Searches run in threads of their own, which do not inherit the tracing context
+    with tracing(metrics), Searcher(session=session, base_url=base_url, rate_limiter=RateLimiter(rate=1000, burst=10),
+                                    streaming=streaming) as searcher:
+        searcher.search(f'query {index}')
+        return list(searcher.scan_search_results(max_iterations=None, prefetch=2))
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_concurrent_searches_share_a_connection(http2_server, streaming):
+    session = create_session(http2=True)
+    metrics = Metrics()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(search, metrics, session, http2_server.url, i, streaming) for i in range(8)]
+        results = [future.result() for future in futures]
+    session.close()
+
+    assert [len(query_results) for query_results in results] == [NUM_OF_PAGES * 10] * 8
+    assert results[3][0].title == 'Result 1 for query 3'
+    # Streams cut short are reset, rather than their connection being closed
+    assert http2_server.connections == 1
+    assert (metrics.snapshot()['counters'].get(Counter.EARLY_CLOSES, 0) > 0) == streaming
+
+
+def test_wire_bytes(http2_server):
+    metrics = Metrics()
+    search(metrics, create_session(http2=True), http2_server.url, 0)
+    counters = metrics.snapshot()['counters']
+    assert counters[Counter.REQUESTS] == NUM_OF_PAGES
+    assert 0 < counters[Counter.WIRE_BYTES] < counters[Counter.BYTES_DOWNLOADED] / 2
+
+
+def test_compression_over_http1():
+    with MockGoogleServer(MockGoogleOptions(pages=1, padding_kb=16, compression=True)) as server:
+        response = create_session().get(f'{server.url}/search?q=cats')
+        session = requests.Session()
+        session.mount('http://', HTTP2Adapter())  # Negotiates HTTP/1.1 with a server that does not speak HTTP/2
+        http2_response = session.get(f'{server.url}/search?q=cats')
+
+    assert response.headers['content-encoding'] == http2_response.headers['content-encoding']
+    assert http2_response.raw.version == 'HTTP/1.1'
+    assert http2_response.content == response.content
+    assert http2_response.raw.tell() == response.raw.tell() < len(response.content)
+
+
+def test_cookies_carry_over(serve):
+    session = requests.Session()
+    session.mount('http://', HTTP2Adapter())
+    with Searcher(session=session) as s:
+        s._non_delayed_get(f'{serve(CookieHandler)}/first')
+        s._non_delayed_get('/second')
+        assert s._find_element_by_xpath('//p[@id="cookie"]').text == 'NID=1'
+
+
+class ProxyHandler(PageHandler):
+    # Serves requests for any host, as a forwarding proxy receives them
+    def do_GET(self):
+        self.send_page(f'<html><body><p id="url">{self.path}</p></body></html>')
+
+
+@pytest.mark.parametrize('from_environment', [False, True])
+def test_proxies(serve, monkeypatch, from_environment):
+    proxy_url = serve(ProxyHandler)
+    session = requests.Session()
+    session.mount('http://', HTTP2Adapter())
+    for name in ('HTTP_PROXY', 'http_proxy', 'NO_PROXY', 'no_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    if from_environment:
+        monkeypatch.setenv('HTTP_PROXY', proxy_url)
+    else:
+        session.proxies = {'http': proxy_url}
+
+    with Searcher(session=session) as s:
+        s._non_delayed_get('http://www.google.invalid/search?q=cats')
+        assert s._find_element_by_xpath('//p[@id="url"]').text == 'http://www.google.invalid/search?q=cats'
+
+
+def test_redirects_and_errors(http2_server):
+    session = create_session(http2=True)
+    response = session.get(f'{http2_server.url}/searchbyimage?image_url=https://example.com/cat.jpg')
+    assert response.raw.version == 'HTTP/2'
+    assert response.history[0].status_code == 302
+    assert '/search?tbs=sbi' in response.url
+    with pytest.raises(requests.HTTPError):
+        session.get(f'{http2_server.url}/nowhere').raise_for_status()
+    session.close()
+    assert session.get(f'{http2_server.url}/search?q=cats').ok  # Connections are opened again, as requests does
+    session.close()
+
+    with pytest.raises(requests.ConnectionError):
+        create_session(http2=True).get('http://127.0.0.1:1/')